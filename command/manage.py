@@ -1,12 +1,16 @@
 __all__ = ["ServiceProcessManager"]
 
-from typing import Union
+import os
+import socket
+from contextlib import contextmanager
+from typing import Union, Dict, List, Tuple, Set, Any, Iterator, Optional
 from multiprocessing import Queue, Process
 
 import psutil
 
-from model.file import FileModel, DirModel
+from model.file import FileModel, DirModel, ShareDescriptor
 from model import public_types as ptype
+from settings import settings
 from utils.logger import sysLogger
 from .services import HttpService, FtpService
 
@@ -19,34 +23,99 @@ class ServiceProcessManager:
         Args:
             output_q: 结果输出的进程队列
         """
-        self._http_service = None
+        # HTTP服务的各工作进程及其输入队列, 任务下发给每个工作进程
+        self._http_services: List[Process] = []
         self._ftp_service = None
-        self._http_input_q = None
+        self._http_input_qs: List[Queue] = []
         self._ftp_input_q = None
         self._output_q = output_q
+        # 任务编号计数, 每次下发(或每个批量上下文)分配一个编号
+        self._ack_id = 0
+        # 批量上下文中暂存的任务: 服务名称 -> 任务列表, 不在批量上下文中时为None
+        self._batch_commands: Optional[Dict[str, List[Tuple[str, Any]]]] = None
+        # 批量上下文中添加的分享uuid
+        self._batch_uuids: List[str] = []
+        # 未完成的任务: 任务编号 -> (尚未回复的服务名称, 添加的分享uuid, 未能开始服务的服务名称)
+        self._pending_acks: Dict[int, Tuple[Set[str], List[str], Set[str]]] = {}
+
+    @contextmanager
+    def batch(self) -> Iterator[int]:
+        """
+        批量下发任务的上下文, 上下文中的任务按服务合并为一条消息, 退出上下文时统一下发
+
+        Returns:
+            Iterator[int]: 本次批量任务的编号
+        """
+        if self._batch_commands is not None:
+            yield self._ack_id
+            return
+
+        self._ack_id += 1
+        self._batch_commands, self._batch_uuids = {}, []
+        try:
+            yield self._ack_id
+        finally:
+            batch_commands, self._batch_commands = self._batch_commands, None
+            self._flush(self._ack_id, batch_commands, self._batch_uuids)
+
+    def acknowledge(
+        self, service_name: str, ack_id: int, ready: bool
+    ) -> Tuple[List[str], bool]:
+        """
+        处理分享服务回复的任务完成消息
+
+        Args:
+            service_name: 回复的服务名称
+            ack_id: 任务编号
+            ready: 服务是否已可访问
 
-    def add_share(self, fileObj: Union[FileModel, DirModel]) -> bool:
+        Returns:
+            Tuple[List[str], bool]: 任务在所有服务中均完成时, 返回本次添加的分享uuid及
+                是否所有服务均已可访问, 否则为空列表
+        """
+        pending = self._pending_acks.get(ack_id)
+        if pending is None:
+            return [], True
+        services, uuids, not_ready = pending
+        if not ready:
+            sysLogger.error(f"[{service_name}] 服务未能在超时时间内开始服务, 任务编号: {ack_id}")
+            not_ready.add(service_name)
+        services.discard(service_name)
+        if services:
+            return [], True
+
+        del self._pending_acks[ack_id]
+        sysLogger.debug(f"任务已完成, 任务编号: {ack_id}")
+        return uuids, not not_ready
+
+    def add_share(self, fileObj: Union[FileModel, DirModel]) -> int:
         """
-        添加分享文件或文件夹
+        添加分享文件或文件夹, 仅下发分享描述, 子级由各服务进程按需读取
 
         Args:
             fileObj: 待添加共享的文件或文件夹对象
 
         Returns:
-            bool: 是否成功添加
+            int: 任务编号, 分享可访问时由`acknowledge`返回其uuid; 添加失败时为0
         """
         sysLogger.debug(
             f"正在添加分享, 分享路径: {fileObj.targetPath}, 分享类型: {fileObj.shareType}"
         )
         share_type = fileObj.shareType
-        if share_type is ptype.ShareType.http:
-            return self._add_http_share(fileObj)
-        elif share_type is ptype.ShareType.ftp:
-            self._add_http_share(fileObj)
-            return self._add_ftp_share(fileObj)
-        else:
+        if share_type not in (ptype.ShareType.http, ptype.ShareType.ftp):
             sysLogger.error(f"未知的共享类型参数: {share_type}, 共享失败！")
-            return False
+            return 0
+
+        with self.batch() as ack_id:
+            # 重新打开的分享不再接受上次分享期间签发的会话令牌
+            fileObj.token_generation += 1
+            descriptor = fileObj.to_descriptor()
+            self._add_http_share(descriptor)
+            if share_type is ptype.ShareType.ftp:
+                self._add_ftp_share(descriptor)
+            self._batch_uuids.append(fileObj.uuid)
+
+        return ack_id
 
     def remove_share(self, uuid: str) -> bool:
         """
@@ -60,15 +129,16 @@ class ServiceProcessManager:
         """
         sysLogger.debug(f"正在移除分享, 分享的uuid: {uuid}")
         share_type = uuid[0]
-        if share_type == "f":
-            self._remove_http_share(uuid)
-            return self._remove_ftp_share(uuid)
-        elif share_type == "h":
-            return self._remove_http_share(uuid)
-        else:
+        if share_type not in ("f", "h"):
             sysLogger.error(f"未知的共享类型参数: {share_type}, 共享失败！")
             return False
 
+        with self.batch():
+            self._remove_http_share(uuid)
+            if share_type == "f":
+                self._remove_ftp_share(uuid)
+        return True
+
     def modify_settings(self, key: str, value: Union[bool, str]) -> bool:
         """
         同步更改配置项
@@ -81,10 +151,11 @@ class ServiceProcessManager:
             bool: 是否成功同步更改
         """
         sysLogger.debug(f"正在同步配置, 配置项名称: {key}, 配置项值: {value}")
-        if self._http_input_q is not None:
-            self._http_input_q.put(("settings", (key, value)))
-        if self._ftp_input_q is not None:
-            self._ftp_input_q.put(("settings", (key, value)))
+        with self.batch():
+            if self._http_input_qs:
+                self._send("HTTP", ("settings", (key, value)))
+            if self._ftp_input_q is not None:
+                self._send("FTP", ("settings", (key, value)))
 
         return True
 
@@ -100,8 +171,9 @@ class ServiceProcessManager:
             bool: 是否成功修改免密状态
         """
         sysLogger.debug(f"正在修改免密状态, 文件的uuid: {key}, 新的免密状态: {value}")
-        if self._http_input_q is not None:
-            self._http_input_q.put(("free-secret", (key, value)))
+        if self._http_input_qs:
+            with self.batch():
+                self._send("HTTP", ("free-secret", (key, value)))
 
         return True
 
@@ -133,38 +205,110 @@ class ServiceProcessManager:
         """
         sysLogger.debug("正在关闭所有分享服务")
         self.close_ftp()
-        if self._http_service is not None:
+        for http_service in self._http_services:
             sysLogger.debug("[HTTP] 正在关闭服务")
-            self._kill_process(self._http_service.pid)
+            self._kill_process(http_service.pid)
 
-        self._http_service = None
-        if self._http_input_q is not None:
+        self._http_services = []
+        self._pending_acks.clear()
+        if self._http_input_qs:
             sysLogger.debug("[HTTP] 正在关闭输入队列")
-            self._http_input_q.close()
-            self._http_input_q = None
+            for http_input_q in self._http_input_qs:
+                http_input_q.close()
+            self._http_input_qs = []
             sysLogger.debug("[HTTP] 关闭输入队列成功")
         sysLogger.debug("关闭所有分享服务成功")
         return True
 
-    def _add_http_share(self, fileObj: Union[FileModel, DirModel]) -> bool:
-        sysLogger.debug(f"[HTTP] 开始添加分享, 分享路径: {fileObj.targetPath}")
-        if self._http_input_q is None:
-            sysLogger.debug("[HTTP] 开始初始化输入队列")
-            self._http_input_q = Queue()
-            sysLogger.debug("[HTTP] 初始化输入队列成功")
-        if self._http_service is None:
-            sysLogger.debug("[HTTP] 开始初始化服务")
-            http_service = HttpService(self._http_input_q, self._output_q)
-            self._http_service = Process(target=http_service.run)
-            self._http_service.daemon = True
-            self._http_service.start()
+    def _send(self, service_name: str, command: Tuple[str, Any]) -> None:
+        """
+        将任务加入当前批量任务, 须在批量上下文中调用
+
+        Args:
+            service_name: 服务名称
+            command: (任务类型, 任务参数)
+
+        Returns:
+            None
+        """
+        self._batch_commands.setdefault(service_name, []).append(command)
+
+    def _flush(
+        self,
+        ack_id: int,
+        batch_commands: Dict[str, List[Tuple[str, Any]]],
+        uuids: List[str],
+    ) -> None:
+        """
+        按服务下发批量任务, 每个服务一条消息
+
+        Args:
+            ack_id: 任务编号
+            batch_commands: 服务名称 -> 任务列表
+            uuids: 本次添加的分享uuid
+
+        Returns:
+            None
+        """
+        # HTTP服务的每个工作进程各自回复, 全部回复后任务才完成
+        input_qs = {
+            "HTTP": {
+                HttpService.worker_name(worker_id): input_q
+                for worker_id, input_q in enumerate(self._http_input_qs)
+            },
+            "FTP": {"FTP": self._ftp_input_q} if self._ftp_input_q is not None else {},
+        }
+        services = set()
+        for service_name, commands in batch_commands.items():
+            for worker_name, input_q in input_qs[service_name].items():
+                input_q.put(("batch", (ack_id, commands)))
+                services.add(worker_name)
+            sysLogger.debug(
+                f"[{service_name}] 下发批量任务, 任务编号: {ack_id}, 任务个数: {len(commands)}"
+            )
+        if services:
+            self._pending_acks[ack_id] = (services, uuids, set())
+
+    def _add_http_share(self, descriptor: ShareDescriptor) -> bool:
+        sysLogger.debug(f"[HTTP] 开始添加分享, 分享路径: {descriptor.path}")
+        if not self._http_services:
+            self._start_http_workers()
 
         sysLogger.debug("[HTTP] 开始添加分享")
-        self._http_input_q.put(("add", fileObj))
+        self._send("HTTP", ("add", descriptor))
         return True
 
-    def _add_ftp_share(self, fileObj: Union[FileModel, DirModel]) -> bool:
-        sysLogger.debug(f"[FTP] 开始添加分享, 分享路径: {fileObj.targetPath}")
+    def _start_http_workers(self) -> None:
+        """
+        开启HTTP服务的工作进程, 多个工作进程时由管理器统一确定端口,
+        各进程以端口复用方式监听并共用会话令牌的签名密钥
+
+        Returns:
+            None
+        """
+        worker_count = settings.HTTP_WORKERS
+        if worker_count > 1 and not hasattr(socket, "SO_REUSEPORT"):
+            sysLogger.warning("[HTTP] 当前系统不支持端口复用, 仅开启1个工作进程")
+            worker_count = 1
+        if worker_count > 1:
+            port, session_key = settings.init_wsgi_port(), os.urandom(32)
+        else:
+            port = session_key = None
+
+        sysLogger.debug(f"[HTTP] 开始初始化服务, 工作进程数: {worker_count}")
+        for worker_id in range(worker_count):
+            http_input_q = Queue()
+            http_service = HttpService(
+                http_input_q, self._output_q, worker_id, port, session_key
+            )
+            process = Process(target=http_service.run)
+            process.daemon = True
+            process.start()
+            self._http_input_qs.append(http_input_q)
+            self._http_services.append(process)
+
+    def _add_ftp_share(self, descriptor: ShareDescriptor) -> bool:
+        sysLogger.debug(f"[FTP] 开始添加分享, 分享路径: {descriptor.path}")
         if self._ftp_input_q is None:
             sysLogger.debug("[FTP] 开始初始化输入队列")
             self._ftp_input_q = Queue()
@@ -177,17 +321,17 @@ class ServiceProcessManager:
             self._ftp_service.start()
 
         sysLogger.debug("[FTP] 开始追加分享")
-        self._ftp_input_q.put(("add", fileObj))
+        self._send("FTP", ("add", descriptor))
         return True
 
     def _remove_http_share(self, uuid: str) -> bool:
         sysLogger.debug(f"[HTTP] 正在移除分享, 分享的uuid: {uuid}")
-        self._http_input_q.put(("remove", uuid))
+        self._send("HTTP", ("remove", uuid))
         return True
 
     def _remove_ftp_share(self, uuid: str) -> bool:
         sysLogger.debug(f"[FTP] 正在移除分享, 分享的uuid: {uuid}")
-        self._ftp_input_q.put(("remove", uuid))
+        self._send("FTP", ("remove", uuid))
         return True
 
     @staticmethod
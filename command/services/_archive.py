@@ -0,0 +1,479 @@
+__all__ = ["ArchiveResponse", "collect_entries", "ARCHIVE_FORMATS"]
+
+import os
+import time
+import zlib
+import struct
+import hashlib
+import tarfile
+from typing import List, NamedTuple, Optional, Callable, Mapping, Set, Tuple
+
+import anyio
+from starlette.responses import Response
+from starlette.types import Scope, Receive, Send
+
+from model.file import DirModel
+from utils.logger import sysLogger
+from utils.stat_cache import stat_cache
+from ._file_response import FileRangeResponse, parse_ranges, if_range_matches
+
+ARCHIVE_FORMATS = {"zip": "application/zip", "tar": "application/x-tar"}
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP_FILECOUNT_LIMIT = 0xFFFF
+# 中央目录文件头的固定部分长度, 其后为文件名和扩展字段
+ZIP_CENTRAL_HEADER_SIZE = struct.calcsize("<IHHHHHHIIIHHHHHII")
+
+
+class ArchiveEntry(NamedTuple):
+    arcname: str
+    path: str
+    size: int
+    mtime: float
+    isDir: bool
+
+
+class _Segment(NamedTuple):
+    length: int
+    data: bytes = b""
+    entry_index: Optional[int] = None
+    render: Optional[Callable[[], bytes]] = None
+    crc_deps: Tuple[int, ...] = ()
+
+
+def collect_entries(dirObj: DirModel) -> List[ArchiveEntry]:
+    """
+    遍历文件夹对象的子级, 生成归档条目列表(仅元数据, 不读取文件内容), 存在阻塞IO,
+    需在线程中调用; 文件夹内容有变化时先重新读取子级, 与当前内容保持一致;
+    已遍历过的文件夹(如指向上级的符号链接)不再重复遍历, 避免死循环;
+    无法访问的文件/文件夹(如已删除或失效的符号链接)跳过不打包
+
+    Args:
+        dirObj: 待归档的文件夹对象
+
+    Returns:
+        List[ArchiveEntry]: 归档条目列表
+    """
+    entries: List[ArchiveEntry] = []
+    visited: Set[Tuple[int, int]] = set()
+    stack = [(dirObj, dirObj.file_name)]
+    while stack:
+        currObj, arcname = stack.pop()
+        try:
+            stat_result = os.stat(currObj.targetPath)
+        except OSError as e:
+            sysLogger.warning(f"打包时跳过无法访问的文件/文件夹: {currObj.targetPath}, {e}")
+            continue
+        if currObj.isDir:
+            dir_id = (stat_result.st_dev, stat_result.st_ino)
+            if dir_id in visited:
+                sysLogger.warning(f"打包时跳过重复的文件夹(符号链接循环): {currObj.targetPath}")
+                continue
+            visited.add(dir_id)
+            entries.append(
+                ArchiveEntry(
+                    arcname + "/", currObj.targetPath, 0, stat_result.st_mtime, True
+                )
+            )
+            # 与文件列表相同, 文件夹修改时间变化时重新读取子级; 打包时不使用缓存的修改时间
+            stat_cache.invalidate(currObj.targetPath)
+            currObj.sync_children()
+            children = sorted(currObj.children, key=lambda child: child.file_name)
+            for child in reversed(children):
+                stack.append((child, f"{arcname}/{child.file_name}"))
+        else:
+            entries.append(
+                ArchiveEntry(
+                    arcname,
+                    currObj.targetPath,
+                    stat_result.st_size,
+                    stat_result.st_mtime,
+                    False,
+                )
+            )
+
+    return entries
+
+
+class ArchiveResponse(Response):
+    chunk_size = 1048576
+
+    def __init__(
+        self,
+        entries: List[ArchiveEntry],
+        archive_format: str = "zip",
+        range_str: str = "",
+        if_range: str = "",
+        headers: Optional[Mapping[str, str]] = None,
+    ):
+        """
+        文件夹归档流式响应类初始化函数, 边读边发不落盘, 内存占用恒定;
+        zip使用存储模式(不压缩), 超大文件/文件数自动使用ZIP64, 归档大小可预先计算,
+        因此支持Content-Length和单区间续传
+
+        Args:
+            entries: 归档条目列表
+            archive_format: 归档格式, zip或tar
+            range_str: Range请求头的值
+            if_range: If-Range请求头的值, 与归档ETag不一致时忽略Range
+            headers: 响应头
+        """
+        self._entries = entries
+        self._etag: Optional[str] = None
+        self._crcs: List[Optional[int]] = [None] * len(entries)
+        if archive_format == "tar":
+            self._segments = self._tar_segments()
+        else:
+            self._segments = self._zip_segments()
+        self.background = None
+        self.media_type = ARCHIVE_FORMATS.get(archive_format, ARCHIVE_FORMATS["zip"])
+        self.init_headers(headers)
+
+        self._total_size = sum(segment.length for segment in self._segments)
+        self._range: Optional[Tuple[int, int]] = None
+        self.headers["accept-ranges"] = "bytes"
+        self.headers["etag"] = self.etag
+        ranges = None
+        if range_str and if_range_matches(if_range, self.etag, ""):
+            ranges = parse_ranges(range_str, self._total_size)
+        if ranges == []:
+            self.status_code = 416
+            self.headers["content-range"] = f"bytes */{self._total_size}"
+            self.headers["content-length"] = "0"
+        elif ranges and len(ranges) == 1:
+            # 归档仅支持单区间续传, 多区间时返回整个归档;
+            # CRC不做持久化, 续传区间与某个文件的数据描述符或中央目录文件头(zip)重叠时
+            # 需重新读取该文件计算CRC, 续传区间覆盖整个中央目录时耗时接近完整打包
+            start, end = self._range = ranges[0]
+            self.status_code = 206
+            self.headers["content-range"] = f"bytes {start}-{end}/{self._total_size}"
+            self.headers["content-length"] = str(end - start + 1)
+        else:
+            self.status_code = 200
+            self.headers["content-length"] = str(self._total_size)
+
+    @property
+    def etag(self) -> str:
+        """
+        归档的ETag, 由条目的名称, 大小和修改时间决定, 首次访问时计算
+
+        Returns:
+            str: 归档的ETag
+        """
+        if self._etag is None:
+            digest = hashlib.sha1()
+            for entry in self._entries:
+                digest.update(
+                    f"{entry.arcname}\0{entry.size}\0{entry.mtime}\0".encode()
+                )
+            digest.update(self.media_type.encode())
+            self._etag = f'"{digest.hexdigest()}"'
+        return self._etag
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        if scope.get("method") != "HEAD" and self.status_code != 416:
+            await self._send_segments(send)
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def _send_segments(self, send: Send) -> None:
+        start, end = self._range or (0, self._total_size - 1)
+        required_crcs = set()
+        position = 0
+        for segment in self._segments:
+            if position <= end and position + segment.length > start:
+                required_crcs.update(segment.crc_deps)
+            position += segment.length
+
+        # 文件头等小段合并到不超过chunk_size后再发送
+        pending: List[bytes] = []
+        pending_size = 0
+        position = 0
+        for segment in self._segments:
+            seg_start, seg_end = position, position + segment.length - 1
+            position += segment.length
+            overlaps = seg_start <= end and seg_end >= start and segment.length > 0
+            if segment.entry_index is not None:
+                if overlaps or segment.entry_index in required_crcs:
+                    if overlaps and pending:
+                        await self._send_body(send, pending)
+                        pending, pending_size = [], 0
+                    await self._send_file(
+                        send, segment.entry_index, seg_start, start, end, overlaps
+                    )
+                continue
+            if not overlaps:
+                continue
+            data = segment.render() if segment.render else segment.data
+            body = data[max(start - seg_start, 0) : end - seg_start + 1]
+            pending.append(body)
+            pending_size += len(body)
+            if pending_size >= self.chunk_size:
+                await self._send_body(send, pending)
+                pending, pending_size = [], 0
+        if pending:
+            await self._send_body(send, pending)
+
+    @staticmethod
+    async def _send_body(send: Send, parts: List[bytes]) -> None:
+        await send(
+            {"type": "http.response.body", "body": b"".join(parts), "more_body": True}
+        )
+
+    async def _send_file(
+        self,
+        send: Send,
+        entry_index: int,
+        seg_start: int,
+        start: int,
+        end: int,
+        overlaps: bool,
+    ) -> None:
+        entry = self._entries[entry_index]
+        crc, position = 0, 0
+        try:
+            file = await anyio.to_thread.run_sync(open, entry.path, "rb", 0)
+        except OSError:
+            file = None
+        try:
+            while position < entry.size:
+                size = min(self.chunk_size, entry.size - position)
+                chunk = b""
+                if file is not None:
+                    chunk = await anyio.to_thread.run_sync(
+                        FileRangeResponse._read_at, file, position, size
+                    )
+                # 文件在归档过程中被截断或无法读取, 补0以保证与预计算的长度一致
+                chunk = chunk.ljust(size, b"\0")
+                crc = zlib.crc32(chunk, crc)
+                chunk_start = seg_start + position
+                position += size
+                if overlaps and chunk_start <= end and chunk_start + size > start:
+                    body = chunk[max(start - chunk_start, 0) : end - chunk_start + 1]
+                    await send(
+                        {"type": "http.response.body", "body": body, "more_body": True}
+                    )
+        finally:
+            if file is not None:
+                await anyio.to_thread.run_sync(file.close)
+        self._crcs[entry_index] = crc
+
+    def _tar_segments(self) -> List[_Segment]:
+        segments = []
+        for index, entry in enumerate(self._entries):
+            tarinfo = tarfile.TarInfo(entry.arcname.rstrip("/"))
+            tarinfo.mtime = int(entry.mtime)
+            tarinfo.mode = 0o755 if entry.isDir else 0o644
+            tarinfo.type = tarfile.DIRTYPE if entry.isDir else tarfile.REGTYPE
+            tarinfo.size = entry.size
+            header = tarinfo.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+            segments.append(_Segment(len(header), data=header))
+            if entry.isDir:
+                continue
+            segments.append(_Segment(entry.size, entry_index=index))
+            padding = -entry.size % tarfile.BLOCKSIZE
+            if padding:
+                segments.append(_Segment(padding, data=b"\0" * padding))
+        # 归档结尾为两个空块, 并补齐至记录大小
+        written = sum(segment.length for segment in segments) + tarfile.BLOCKSIZE * 2
+        trailer = tarfile.BLOCKSIZE * 2 + (-written % tarfile.RECORDSIZE)
+        segments.append(_Segment(trailer, data=b"\0" * trailer))
+        return segments
+
+    def _zip_segments(self) -> List[_Segment]:
+        segments, offsets = [], []
+        offset = 0
+        for index, entry in enumerate(self._entries):
+            offsets.append(offset)
+            header = self._zip_local_header(entry, offset)
+            segments.append(_Segment(len(header), data=header))
+            offset += len(header)
+            if entry.isDir:
+                continue
+            segments.append(_Segment(entry.size, entry_index=index))
+            offset += entry.size
+            zip64 = self._is_zip64(entry, offsets[index])
+            descriptor_length = 24 if zip64 else 16
+            segments.append(
+                _Segment(
+                    descriptor_length,
+                    render=self._zip_descriptor_render(index, zip64),
+                    crc_deps=(index,),
+                )
+            )
+            offset += descriptor_length
+
+        # 中央目录按条目逐个生成文件头, 长度由文件名和扩展字段计算, 无需预先生成
+        central_offset = offset
+        for index, entry in enumerate(self._entries):
+            length = self._zip_central_header_length(entry, offsets[index])
+            segments.append(
+                _Segment(
+                    length,
+                    render=self._zip_central_render(index, offsets[index]),
+                    crc_deps=(index,),
+                )
+            )
+            offset += length
+        central_length = offset - central_offset
+        end_record = self._zip_end_record(central_offset, central_length)
+        segments.append(_Segment(len(end_record), data=end_record))
+        return segments
+
+    @staticmethod
+    def _is_zip64(entry: ArchiveEntry, offset: int) -> bool:
+        return entry.size >= ZIP64_LIMIT or offset >= ZIP64_LIMIT
+
+    @staticmethod
+    def _dos_datetime(mtime: float) -> Tuple[int, int]:
+        date_time = time.localtime(mtime)
+        year = min(max(date_time.tm_year, 1980), 2107)
+        dos_time = (
+            date_time.tm_hour << 11 | date_time.tm_min << 5 | date_time.tm_sec // 2
+        )
+        dos_date = (year - 1980) << 9 | date_time.tm_mon << 5 | date_time.tm_mday
+        return dos_time, dos_date
+
+    def _zip_local_header(self, entry: ArchiveEntry, offset: int) -> bytes:
+        name = entry.arcname.encode("utf-8")
+        dos_time, dos_date = self._dos_datetime(entry.mtime)
+        if entry.isDir:
+            flags, version, size, extra = 0x800, 20, 0, b""
+        elif self._is_zip64(entry, offset):
+            flags, version, size = 0x808, 45, ZIP64_LIMIT
+            extra = struct.pack("<HHQQ", 0x0001, 16, 0, 0)
+        else:
+            flags, version, size, extra = 0x808, 20, 0, b""
+        return (
+            struct.pack(
+                "<IHHHHHIIIHH",
+                0x04034B50,
+                version,
+                flags,
+                0,
+                dos_time,
+                dos_date,
+                0,
+                size,
+                size,
+                len(name),
+                len(extra),
+            )
+            + name
+            + extra
+        )
+
+    def _zip_descriptor_render(self, index: int, zip64: bool) -> Callable[[], bytes]:
+        def render() -> bytes:
+            entry, crc = self._entries[index], self._crcs[index] or 0
+            if zip64:
+                return struct.pack("<IIQQ", 0x08074B50, crc, entry.size, entry.size)
+            return struct.pack("<IIII", 0x08074B50, crc, entry.size, entry.size)
+
+        return render
+
+    @staticmethod
+    def _zip64_central_fields(entry: ArchiveEntry, offset: int) -> List[int]:
+        zip64_fields = []
+        if entry.size >= ZIP64_LIMIT:
+            zip64_fields += [entry.size, entry.size]
+        if offset >= ZIP64_LIMIT:
+            zip64_fields.append(offset)
+        return zip64_fields
+
+    def _zip_central_header_length(self, entry: ArchiveEntry, offset: int) -> int:
+        zip64_count = len(self._zip64_central_fields(entry, offset))
+        extra_length = 4 + zip64_count * 8 if zip64_count else 0
+        return (
+            ZIP_CENTRAL_HEADER_SIZE + len(entry.arcname.encode("utf-8")) + extra_length
+        )
+
+    def _zip_central_render(self, index: int, offset: int) -> Callable[[], bytes]:
+        def render() -> bytes:
+            entry, crc = self._entries[index], self._crcs[index] or 0
+            return self._zip_central_header(entry, offset, crc)
+
+        return render
+
+    def _zip_central_header(self, entry: ArchiveEntry, offset: int, crc: int) -> bytes:
+        name = entry.arcname.encode("utf-8")
+        dos_time, dos_date = self._dos_datetime(entry.mtime)
+        zip64_fields = self._zip64_central_fields(entry, offset)
+        size = ZIP64_LIMIT if entry.size >= ZIP64_LIMIT else entry.size
+        header_offset = ZIP64_LIMIT if offset >= ZIP64_LIMIT else offset
+        extra = b""
+        if zip64_fields:
+            extra = struct.pack(
+                f"<HH{len(zip64_fields)}Q",
+                0x0001,
+                len(zip64_fields) * 8,
+                *zip64_fields,
+            )
+        version = 45 if zip64_fields or self._is_zip64(entry, offset) else 20
+        flags = 0x800 if entry.isDir else 0x808
+        external_attr = (0o40755 << 16 | 0x10) if entry.isDir else (0o100644 << 16)
+        return (
+            struct.pack(
+                "<IHHHHHHIIIHHHHHII",
+                0x02014B50,
+                3 << 8 | version,
+                version,
+                flags,
+                0,
+                dos_time,
+                dos_date,
+                crc,
+                size,
+                size,
+                len(name),
+                len(extra),
+                0,
+                0,
+                0,
+                external_attr,
+                header_offset,
+            )
+            + name
+            + extra
+        )
+
+    def _zip_end_record(self, central_offset: int, central_length: int) -> bytes:
+        count = len(self._entries)
+        result = b""
+        if (
+            count >= ZIP_FILECOUNT_LIMIT
+            or central_offset >= ZIP64_LIMIT
+            or central_length >= ZIP64_LIMIT
+        ):
+            zip64_end_offset = central_offset + central_length
+            result += struct.pack(
+                "<IQHHIIQQQQ",
+                0x06064B50,
+                44,
+                3 << 8 | 45,
+                45,
+                0,
+                0,
+                count,
+                count,
+                central_length,
+                central_offset,
+            )
+            result += struct.pack("<IIQI", 0x07064B50, 0, zip64_end_offset, 1)
+        result += struct.pack(
+            "<IHHHHIIH",
+            0x06054B50,
+            0,
+            0,
+            min(count, ZIP_FILECOUNT_LIMIT),
+            min(count, ZIP_FILECOUNT_LIMIT),
+            min(central_length, ZIP64_LIMIT),
+            min(central_offset, ZIP64_LIMIT),
+            0,
+        )
+        return result
@@ -1,6 +1,7 @@
 __all__ = ["BaseService"]
 
-from typing import Union, Dict
+import time
+from typing import Union, Any
 from threading import Thread
 from multiprocessing import Queue
 
@@ -12,6 +13,11 @@ from utils.logger import sysLogger, sharerLogger
 
 
 class BaseService:
+    # 等待服务可访问时的轮询间隔(s)
+    READY_POLL_INTERVAL = 0.05
+    # 等待服务可访问的超时时间(s)
+    READY_TIMEOUT = 30
+
     def __init__(self, input_q: Queue, output_q: Queue):
         """
         共享服务类初始化函数
@@ -20,7 +26,7 @@ class BaseService:
             input_q: 输入的进程队列
             output_q: 输出的进程队列
         """
-        self._sharing_dict: Dict[str, Union[FileModel, DirModel]] = SharingModel()
+        self._sharing_dict: SharingModel = SharingModel()
         self._input_q = input_q
         self._output_q = output_q
         self._watch_thread = None
@@ -42,18 +48,69 @@ class BaseService:
     def _watch(self) -> None:
         while True:
             command_type, command_msg = self._input_q.get()
-            if command_type == "add":
-                self._sysLogger_debug(f"接到添加分享任务, 分享路径: {command_msg.targetPath}")
-                self._add_share(command_msg)
-            elif command_type == "remove":
-                self._sysLogger_debug(f"接到移除分享任务, 分享的uuid: {command_msg}")
-                self._remove_share(command_msg)
-            elif command_type == "settings":
-                self._sysLogger_debug(f"接到同步配置任务, 配置参数: {command_msg}")
-                self._modify_settings(*command_msg)
-            elif command_type == "free-secret":
-                self._sysLogger_debug(f"接到修改免密状态任务, 配置参数: {command_msg}")
-                self._change_free_secret(*command_msg)
+            if command_type == "batch":
+                ack_id, commands = command_msg
+                self._sysLogger_debug(f"接到批量任务, 任务编号: {ack_id}, 任务个数: {len(commands)}")
+                for batch_command_type, batch_command_msg in commands:
+                    self._dispatch(batch_command_type, batch_command_msg)
+                self._acknowledge(ack_id)
+            else:
+                self._dispatch(command_type, command_msg)
+
+    def _dispatch(self, command_type: str, command_msg: Any) -> None:
+        """
+        执行单个任务
+
+        Args:
+            command_type: 任务类型
+            command_msg: 任务参数
+
+        Returns:
+            None
+        """
+        if command_type == "add":
+            self._sysLogger_debug(f"接到添加分享任务, 分享路径: {command_msg.path}")
+            self._add_share(command_msg.to_model())
+        elif command_type == "remove":
+            self._sysLogger_debug(f"接到移除分享任务, 分享的uuid: {command_msg}")
+            self._remove_share(command_msg)
+        elif command_type == "settings":
+            self._sysLogger_debug(f"接到同步配置任务, 配置参数: {command_msg}")
+            self._modify_settings(*command_msg)
+        elif command_type == "free-secret":
+            self._sysLogger_debug(f"接到修改免密状态任务, 配置参数: {command_msg}")
+            self._change_free_secret(*command_msg)
+        else:
+            sysLogger.error(f"[{self._service_name}] 未知的任务类型: {command_type}")
+
+    def _acknowledge(self, ack_id: int) -> None:
+        """
+        批量任务执行完成且服务已可访问(或等待超时)后, 通过输出队列回复任务完成
+
+        Args:
+            ack_id: 任务编号
+
+        Returns:
+            None
+        """
+        deadline = time.monotonic() + self.READY_TIMEOUT
+        ready = self._is_ready()
+        while not ready and time.monotonic() < deadline:
+            time.sleep(self.READY_POLL_INTERVAL)
+            ready = self._is_ready()
+        if not ready:
+            sysLogger.error(f"[{self._service_name}] 等待服务可访问超时, 任务编号: {ack_id}")
+        self._output_q.put(("ack", (self._service_name, ack_id, ready)))
+        self._sysLogger_debug(f"批量任务完成, 任务编号: {ack_id}")
+
+    def _is_ready(self) -> bool:
+        """
+        服务是否已可访问, 默认执行完任务即可访问, 需启动后才可访问的服务在子类中重写
+
+        Returns:
+            bool: 服务是否已可访问
+        """
+        return True
 
     def _add_share(self, fileObj: Union[FileModel, DirModel]) -> None:
         """
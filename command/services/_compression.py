@@ -0,0 +1,292 @@
+__all__ = [
+    "AVAILABLE_ENCODINGS",
+    "negotiate_encoding",
+    "compress",
+    "compress_listing",
+    "PrecompressedStaticFiles",
+]
+
+import os
+import re
+import gzip
+import mimetypes
+from typing import Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles, PathLike
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from ._file_response import generate_etag, etag_matches
+from settings import settings
+from utils.logger import sysLogger
+
+# 可用的压缩编码, 按优先级排列, 客户端接受程度(q值)相同时优先压缩率更高的编码
+AVAILABLE_ENCODINGS: Tuple[str, ...] = tuple(
+    encoding
+    for encoding, module in (("br", brotli), ("zstd", zstandard), ("gzip", gzip))
+    if module is not None
+)
+# 各编码的压缩等级: 预压缩静态文件用best, 文件列表按大小用default或fast
+_LEVELS: Dict[str, Dict[str, int]] = {
+    "br": {"best": 11, "default": 5, "fast": 1},
+    "zstd": {"best": 19, "default": 3, "fast": 1},
+    "gzip": {"best": 9, "default": 6, "fast": 1},
+}
+_SUFFIXES: Dict[str, str] = {"br": ".br", "zstd": ".zst", "gzip": ".gz"}
+# 前端构建产物文件名中的内容哈希, 如app.8141d0457827a08d24d6.js
+_hashed_name_re = re.compile(r"\.[0-9a-f]{7,}\.")
+# 值得压缩的静态文件类型, 图片/woff等本身已压缩的文件不再压缩
+_COMPRESSIBLE_EXTENSIONS = (
+    ".html",
+    ".css",
+    ".js",
+    ".json",
+    ".svg",
+    ".txt",
+    ".ttf",
+    ".eot",
+    ".ico",
+)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    按Accept-Encoding请求头(RFC 9110)选择压缩编码
+
+    Args:
+        accept_encoding: Accept-Encoding请求头的值
+
+    Returns:
+        Optional[str]: 选择的编码, 不压缩时为None
+    """
+    if not accept_encoding:
+        return None
+
+    qvalues: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        qvalue = 1.0
+        param_name, _, param_value = params.partition("=")
+        if param_name.strip().lower() == "q":
+            try:
+                qvalue = float(param_value)
+            except ValueError:
+                qvalue = 0.0
+        qvalues[coding] = qvalue
+
+    best_encoding, best_qvalue = None, 0.0
+    for encoding in AVAILABLE_ENCODINGS:
+        qvalue = qvalues.get(encoding, qvalues.get("*", 0.0))
+        if qvalue > best_qvalue:
+            best_encoding, best_qvalue = encoding, qvalue
+    return best_encoding
+
+
+def compress(data: bytes, encoding: str, level: str = "default") -> bytes:
+    """
+    压缩数据
+
+    Args:
+        data: 待压缩的数据
+        encoding: 压缩编码, br/zstd/gzip
+        level: 压缩等级, best/default/fast
+
+    Returns:
+        bytes: 压缩后的数据
+    """
+    compresslevel = _LEVELS[encoding][level]
+    if encoding == "br":
+        return brotli.compress(data, quality=compresslevel)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=compresslevel).compress(data)
+    return gzip.compress(data, compresslevel=compresslevel, mtime=0)
+
+
+async def compress_listing(
+    body: bytes, accept_encoding: str
+) -> Tuple[bytes, Dict[str, str]]:
+    """
+    按大小自适应压缩文件列表: 过小时不压缩, 较小时在事件循环中直接压缩,
+    其余在线程池中压缩以免阻塞其他请求, 很大时改用最快的压缩等级
+
+    Args:
+        body: 文件列表JSON
+        accept_encoding: Accept-Encoding请求头的值
+
+    Returns:
+        Tuple[bytes, Dict[str, str]]: (响应体, 响应头)
+    """
+    headers = {"Vary": "Accept-Encoding"}
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding is None or len(body) < settings.COMPRESS_MIN_BYTES:
+        return body, headers
+
+    if len(body) < settings.LISTING_COMPRESS_INLINE_BYTES:
+        body = compress(body, encoding)
+    else:
+        level = (
+            "fast" if len(body) >= settings.LISTING_COMPRESS_FAST_BYTES else "default"
+        )
+        body = await run_in_threadpool(compress, body, encoding, level)
+    headers["Content-Encoding"] = encoding
+    return body, headers
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    def __init__(self, *, directory: PathLike, cache_dir: Optional[str] = None):
+        """
+        预压缩静态文件类初始化函数, 初始化时将可压缩的静态文件按各编码以最高压缩等级
+        压缩到缓存文件夹, 源文件未修改时复用上次的压缩结果, 请求时按Accept-Encoding
+        直接返回对应的压缩文件; 文件名含内容哈希的文件长期缓存, 其余文件按ETag校验
+
+        Args:
+            directory: 静态文件所在文件夹
+            cache_dir: 压缩文件缓存文件夹, 默认为settings.STATIC_COMPRESS_CACHE_DIR
+        """
+        super(PrecompressedStaticFiles, self).__init__(directory=directory)
+        self._cache_dir = cache_dir or settings.STATIC_COMPRESS_CACHE_DIR
+        # 源文件路径: ((修改时间, 大小), {编码: 压缩文件路径})
+        self._variants: Dict[str, Tuple[Tuple[int, int], Dict[str, str]]] = {}
+        self.precompress()
+
+    def precompress(self) -> None:
+        """
+        预压缩静态文件, 缓存文件夹不可写时不压缩, 静态文件原样返回
+
+        Returns:
+            None
+        """
+        count = 0
+        # 与lookup_path返回的路径一致, 以真实路径作为键
+        for root, _, files in os.walk(os.path.realpath(self.directory)):
+            for file_name in files:
+                if not file_name.endswith(_COMPRESSIBLE_EXTENSIONS):
+                    continue
+                full_path = os.path.join(root, file_name)
+                try:
+                    variants = self._precompress_file(full_path)
+                except OSError as e:
+                    sysLogger.warning(f"预压缩静态文件失败, 文件路径: {full_path}, {e}")
+                    continue
+                if variants is not None:
+                    self._variants[full_path] = variants
+                    count += 1
+        sysLogger.debug(f"静态文件预压缩完成, 文件个数: {count}")
+
+    def _precompress_file(
+        self, full_path: str
+    ) -> Optional[Tuple[Tuple[int, int], Dict[str, str]]]:
+        stat_result = os.stat(full_path)
+        if stat_result.st_size < settings.COMPRESS_MIN_BYTES:
+            return None
+
+        version = (stat_result.st_mtime_ns, stat_result.st_size)
+        rel_path = os.path.relpath(full_path, os.path.realpath(self.directory))
+        encodings: Dict[str, str] = {}
+        data = None
+        for encoding in AVAILABLE_ENCODINGS:
+            cache_path = os.path.join(self._cache_dir, rel_path + _SUFFIXES[encoding])
+            try:
+                # 压缩文件的修改时间与源文件一致时为最新的压缩结果
+                cached = os.stat(cache_path).st_mtime_ns == stat_result.st_mtime_ns
+            except FileNotFoundError:
+                cached = False
+            if not cached:
+                if data is None:
+                    with open(full_path, "rb") as f:
+                        data = f.read()
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                temp_path = f"{cache_path}.{os.getpid()}.tmp"
+                with open(temp_path, "wb") as f:
+                    f.write(compress(data, encoding, "best"))
+                os.utime(
+                    temp_path, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns)
+                )
+                os.replace(temp_path, cache_path)
+            if os.path.getsize(cache_path) < stat_result.st_size:
+                encodings[encoding] = cache_path
+
+        return (version, encodings) if encodings else None
+
+    def file_response(
+        self,
+        full_path: PathLike,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        if status_code != 200:
+            return super(PrecompressedStaticFiles, self).file_response(
+                full_path, stat_result, scope, status_code
+            )
+
+        request_headers = Headers(scope=scope)
+        headers = {"Cache-Control": self.cache_control(str(full_path))}
+        media_type = mimetypes.guess_type(str(full_path))[0]
+        variants = self._variants.get(str(full_path))
+        if variants is not None:
+            version, encodings = variants
+            encoding = negotiate_encoding(request_headers.get("accept-encoding", ""))
+            headers["Vary"] = "Accept-Encoding"
+            if encoding in encodings and version == (
+                stat_result.st_mtime_ns,
+                stat_result.st_size,
+            ):
+                headers["Content-Encoding"] = encoding
+                full_path = encodings[encoding]
+                stat_result = os.stat(full_path)
+        # 压缩文件与源文件修改时间相同而大小不同, 各编码的ETag互不相同
+        headers["ETag"] = generate_etag(stat_result.st_mtime_ns, stat_result.st_size)
+        response = FileResponse(
+            full_path,
+            status_code=status_code,
+            headers=headers,
+            media_type=media_type,
+            stat_result=stat_result,
+            method=scope["method"],
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    def is_not_modified(
+        self, response_headers: Headers, request_headers: Headers
+    ) -> bool:
+        # 存在If-None-Match时忽略If-Modified-Since(RFC 9110)
+        if "if-none-match" in request_headers:
+            return etag_matches(
+                request_headers["if-none-match"], response_headers["etag"]
+            )
+        return super(PrecompressedStaticFiles, self).is_not_modified(
+            response_headers, request_headers
+        )
+
+    @staticmethod
+    def cache_control(full_path: str) -> str:
+        """
+        生成静态文件的Cache-Control, 文件名含内容哈希的文件内容不会变化, 长期缓存且无需校验;
+        其余文件每次使用前向服务校验
+
+        Args:
+            full_path: 静态文件路径
+
+        Returns:
+            str: Cache-Control
+        """
+        if _hashed_name_re.search(os.path.basename(full_path)):
+            return f"public, max-age={settings.STATIC_IMMUTABLE_MAX_AGE}, immutable"
+        return "no-cache"
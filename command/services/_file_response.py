@@ -0,0 +1,278 @@
+__all__ = [
+    "FileRangeResponse",
+    "parse_ranges",
+    "if_range_matches",
+    "etag_matches",
+    "generate_etag",
+]
+
+import os
+import re
+import secrets
+from typing import Optional, Mapping, BinaryIO, List, Tuple
+
+import anyio
+from starlette.background import BackgroundTask
+from starlette.responses import Response
+from starlette.types import Scope, Receive, Send
+
+ZEROCOPY_SEND = "http.response.zerocopysend"
+# 单次请求允许的最大区间个数, 超过则忽略Range返回整个文件
+MAX_RANGES = 16
+
+_range_spec_re = re.compile(r"^\s*(\d*)\s*-\s*(\d*)\s*$")
+
+
+def parse_ranges(range_str: str, file_size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    解析Range请求头(RFC 9110), 支持`bytes=N-M`, `bytes=N-`, `bytes=-N`及多区间,
+    重叠或相邻的区间会被合并
+
+    Args:
+        range_str: Range请求头的值
+        file_size: 文件总大小
+
+    Returns:
+        Optional[List[Tuple[int, int]]]: 闭区间列表; 格式不合法时返回None(应忽略Range);
+            所有区间均无法满足时返回空列表(应返回416)
+    """
+    unit, _, range_set = range_str.partition("=")
+    if unit.strip().lower() != "bytes" or not range_set:
+        return None
+
+    ranges = []
+    specs = [spec for spec in range_set.split(",") if spec.strip()]
+    if not specs or len(specs) > MAX_RANGES:
+        return None
+    for spec in specs:
+        match = _range_spec_re.match(spec)
+        if match is None:
+            return None
+        first, last = match.groups()
+        if not first and not last:
+            return None
+        if not first:
+            # 后缀区间: 最后N个字节
+            suffix_length = int(last)
+            if suffix_length == 0 or file_size == 0:
+                continue
+            ranges.append((max(file_size - suffix_length, 0), file_size - 1))
+            continue
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        if start >= file_size:
+            continue
+        end = min(int(last), file_size - 1) if last else file_size - 1
+        ranges.append((start, end))
+
+    ranges.sort()
+    merged: List[Tuple[int, int]] = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+
+    return merged
+
+
+def generate_etag(mtime_ns: int, file_size: int) -> str:
+    """
+    根据文件的修改时间和大小生成强校验ETag
+
+    Args:
+        mtime_ns: 文件的修改时间(ns)
+        file_size: 文件大小
+
+    Returns:
+        str: ETag
+    """
+    return f'"{mtime_ns:x}-{file_size:x}"'
+
+
+def if_range_matches(if_range: str, etag: str, last_modified: str) -> bool:
+    """
+    If-Range条件校验, 不满足时应忽略Range返回整个文件
+
+    Args:
+        if_range: If-Range请求头的值
+        etag: 当前文件的ETag
+        last_modified: 当前文件的Last-Modified
+
+    Returns:
+        bool: 是否满足条件
+    """
+    if not if_range:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"'):
+        return if_range == etag
+
+    return if_range == last_modified
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    If-None-Match条件校验(弱比较), 匹配时应返回304
+
+    Args:
+        if_none_match: If-None-Match请求头的值
+        etag: 当前资源的ETag
+
+    Returns:
+        bool: 是否匹配
+    """
+    if if_none_match.strip() == "*":
+        return True
+    etag = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == etag:
+            return True
+
+    return False
+
+
+class FileRangeResponse(Response):
+    chunk_size = 1048576
+
+    def __init__(
+        self,
+        path: str,
+        file_size: int,
+        ranges: Optional[List[Tuple[int, int]]] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: str = "application/octet-stream",
+        background: Optional[BackgroundTask] = None,
+        file: Optional[BinaryIO] = None,
+    ):
+        """
+        文件片段响应类初始化函数, 服务器声明支持http.response.zerocopysend扩展时将已打开的文件
+        和字节范围交给服务器发送, 否则在线程中按偏移读取后发送(当前使用的uvicorn不支持该扩展,
+        均为后者); 多区间时以multipart/byteranges返回
+
+        Args:
+            path: 文件路径
+            file_size: 文件总大小
+            ranges: 待发送的闭区间列表, 为None时发送整个文件
+            headers: 响应头
+            media_type: 响应类型
+            background: 响应结束后的后台任务
+            file: 已打开的文件, file_size应取自该文件的fstat, 发送的内容与长度一致;
+                为None时发送时按路径打开. 响应结束后关闭
+        """
+        self.path = path
+        self.file_size = file_size
+        self.file = file
+        self.background = background
+        self.init_headers(headers)
+        self._parts: List[Tuple[bytes, int, int]] = []
+        self._epilogue = b""
+
+        if ranges is None:
+            self.status_code = 200
+            self.media_type = media_type
+            self._parts.append((b"", 0, file_size))
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            self.status_code = 206
+            self.media_type = media_type
+            self.headers["content-range"] = f"bytes {start}-{end}/{file_size}"
+            self._parts.append((b"", start, end - start + 1))
+        else:
+            self.status_code = 206
+            boundary = secrets.token_hex(16)
+            self.media_type = f"multipart/byteranges; boundary={boundary}"
+            for index, (start, end) in enumerate(ranges):
+                part_header = (
+                    f"--{boundary}\r\n"
+                    f"content-type: {media_type}\r\n"
+                    f"content-range: bytes {start}-{end}/{file_size}\r\n\r\n"
+                ).encode("latin-1")
+                if index > 0:
+                    part_header = b"\r\n" + part_header
+                self._parts.append((part_header, start, end - start + 1))
+            self._epilogue = f"\r\n--{boundary}--\r\n".encode("latin-1")
+
+        content_length = len(self._epilogue) + sum(
+            len(part_header) + count for part_header, _, count in self._parts
+        )
+        self.headers["content-type"] = self.media_type
+        self.headers["content-length"] = str(content_length)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        try:
+            if scope.get("method") == "HEAD":
+                await send(
+                    {"type": "http.response.body", "body": b"", "more_body": False}
+                )
+            else:
+                extensions = scope.get("extensions") or {}
+                await self._send_parts(send, ZEROCOPY_SEND in extensions)
+        finally:
+            if self.file is not None:
+                await anyio.to_thread.run_sync(self.file.close)
+
+        if self.background is not None:
+            await self.background()
+
+    async def _send_parts(self, send: Send, zerocopy: bool) -> None:
+        # 由__call__在响应结束后关闭
+        if self.file is None:
+            self.file = await anyio.to_thread.run_sync(open, self.path, "rb", 0)
+        for part_header, offset, count in self._parts:
+            if part_header:
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": part_header,
+                        "more_body": True,
+                    }
+                )
+            if count <= 0:
+                continue
+            if zerocopy:
+                await send(
+                    {
+                        "type": ZEROCOPY_SEND,
+                        "file": self.file,
+                        "offset": offset,
+                        "count": count,
+                        "more_body": True,
+                    }
+                )
+            else:
+                await self._fallback_send(send, self.file, offset, count)
+
+        await send(
+            {"type": "http.response.body", "body": self._epilogue, "more_body": False}
+        )
+
+    async def _fallback_send(
+        self, send: Send, file: BinaryIO, offset: int, count: int
+    ) -> None:
+        position, remaining = offset, count
+        while remaining > 0:
+            size = min(self.chunk_size, remaining)
+            chunk = await anyio.to_thread.run_sync(self._read_at, file, position, size)
+            if not chunk:
+                # 文件在发送过程中被截断, 由客户端按长度判断失败
+                break
+            position += len(chunk)
+            remaining -= len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+    @staticmethod
+    def _read_at(file: BinaryIO, position: int, size: int) -> bytes:
+        if hasattr(os, "pread"):
+            return os.pread(file.fileno(), size, position)
+        file.seek(position)
+        return file.read(size)
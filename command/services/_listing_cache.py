@@ -0,0 +1,214 @@
+__all__ = ["ListingCache", "encode_json"]
+
+import json
+from threading import Lock
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from model.file import FileModel, DirModel, ListingOption
+from settings import settings
+from utils.logger import sysLogger
+
+
+def encode_json(content: Any) -> bytes:
+    """
+    序列化为JSON字节串, 安装了orjson时使用orjson, 否则使用标准库json
+
+    Args:
+        content: 待序列化的数据
+
+    Returns:
+        bytes: JSON字节串
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode(
+        "utf-8"
+    )
+
+
+class _CacheItem(NamedTuple):
+    fileObj: Union[FileModel, DirModel]
+    body: bytes
+    validators: Tuple[Tuple[DirModel, int], ...]
+
+
+class ListingCache:
+    def __init__(self, max_bytes: Optional[int] = None):
+        """
+        文件列表序列化结果缓存类初始化函数, 按字节数限制容量的LRU缓存,
+        缓存项在所含文件夹的修改时间变化或上传合并后失效
+
+        Args:
+            max_bytes: 缓存的最大字节数, 默认为settings.LISTING_CACHE_BYTES
+        """
+        self._max_bytes = max_bytes or settings.LISTING_CACHE_BYTES
+        self._items: "OrderedDict[Tuple, _CacheItem]" = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # 服务对象需随进程启动被序列化, 缓存内容及锁不随之传递
+        return {"_max_bytes": self._max_bytes}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state["_max_bytes"])
+
+    @staticmethod
+    def cacheable(
+        fileObj: Union[FileModel, DirModel], option: Optional[ListingOption]
+    ) -> bool:
+        """
+        文件列表是否可缓存, 按大小/修改时间排序的列表依赖文件内容变化, 不缓存
+
+        Args:
+            fileObj: 文件/文件夹对象
+            option: 文件列表的查询选项
+
+        Returns:
+            bool: 是否可缓存
+        """
+        if not fileObj.isDir:
+            return False
+        return option is None or option.sort not in ("size", "mtime")
+
+    @staticmethod
+    def _key(
+        fileObj: Union[FileModel, DirModel],
+        variant: str,
+        option: Optional[ListingOption],
+    ) -> Tuple:
+        # 列表中的链接包含本机IP和端口, 两者变化时缓存自然不再命中
+        return (
+            fileObj.uuid,
+            variant,
+            option,
+            settings.LOCAL_HOST,
+            settings.WSGI_PORT,
+        )
+
+    @staticmethod
+    def sync_validators(
+        dirObj: DirModel, option: Optional[ListingOption]
+    ) -> Tuple[Tuple[DirModel, int], ...]:
+        """
+        同步文件列表所展开的文件夹的子级, 并返回各文件夹及其修改时间作为缓存校验项
+
+        Args:
+            dirObj: 文件夹对象
+            option: 文件列表的查询选项
+
+        Returns:
+            Tuple[Tuple[DirModel, int], ...]: (文件夹对象, 修改时间)列表
+        """
+        validators: List[Tuple[DirModel, int]] = []
+        depth = None if option is None else option.depth
+        stack: List[Tuple[DirModel, Optional[int]]] = [(dirObj, depth)]
+        while stack:
+            currObj, currDepth = stack.pop()
+            if currDepth is not None and currDepth <= 0:
+                continue
+            validators.append((currObj, currObj.sync_children()))
+            childDepth = None if currDepth is None else currDepth - 1
+            stack.extend(
+                (child, childDepth) for child in currObj.children if child.isDir
+            )
+
+        return tuple(validators)
+
+    def get(
+        self,
+        fileObj: Union[FileModel, DirModel],
+        variant: str,
+        option: Optional[ListingOption],
+    ) -> Optional[bytes]:
+        """
+        获取缓存的文件列表, 缓存项对应的对象已被替换或文件夹修改时间变化时视为未命中
+
+        Args:
+            fileObj: 文件/文件夹对象
+            variant: 格式化数据的类型, client或mobile
+            option: 文件列表的查询选项
+
+        Returns:
+            Optional[bytes]: 缓存的文件列表JSON, 未命中时为None
+        """
+        key = self._key(fileObj, variant, option)
+        with self._lock:
+            item = self._items.get(key)
+        if item is None:
+            return None
+        if item.fileObj is not fileObj or any(
+            dirObj.sync_children() != mtime_ns for dirObj, mtime_ns in item.validators
+        ):
+            self._pop(key)
+            return None
+
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+        return item.body
+
+    def put(
+        self,
+        fileObj: Union[FileModel, DirModel],
+        variant: str,
+        option: Optional[ListingOption],
+        body: bytes,
+        validators: Tuple[Tuple[DirModel, int], ...],
+    ) -> None:
+        """
+        缓存文件列表, 超出容量时淘汰最久未访问的缓存项
+
+        Args:
+            fileObj: 文件/文件夹对象
+            variant: 格式化数据的类型, client或mobile
+            option: 文件列表的查询选项
+            body: 文件列表JSON
+            validators: 缓存校验项
+
+        Returns:
+            None
+        """
+        if len(body) > self._max_bytes:
+            return
+        key = self._key(fileObj, variant, option)
+        self._pop(key)
+        with self._lock:
+            self._items[key] = _CacheItem(fileObj, body, validators)
+            self._size += len(body)
+            while self._size > self._max_bytes:
+                _, evictItem = self._items.popitem(last=False)
+                self._size -= len(evictItem.body)
+
+    def invalidate(self, uuid: str) -> None:
+        """
+        使文件/文件夹及其下级的缓存项失效
+
+        Args:
+            uuid: 文件/文件夹对象的uuid
+
+        Returns:
+            None
+        """
+        prefix = uuid + ">"
+        with self._lock:
+            keys = [
+                key
+                for key in self._items
+                if key[0] == uuid or key[0].startswith(prefix)
+            ]
+        for key in keys:
+            self._pop(key)
+        sysLogger.debug(f"文件列表缓存失效, uuid: {uuid}, 失效个数: {len(keys)}")
+
+    def _pop(self, key: Tuple) -> None:
+        with self._lock:
+            item = self._items.pop(key, None)
+            if item is not None:
+                self._size -= len(item.body)
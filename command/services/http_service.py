@@ -3,71 +3,167 @@ __all__ = ["HttpService"]
 import os
 import re
 import time
-from typing import Union, Any, AsyncGenerator, Dict, Optional
+import asyncio
+import base64
+import hashlib
+import shutil
+import socket
+import importlib
+from typing import Union, Any, Dict, Optional, AsyncIterator, Awaitable, Callable, Tuple
+from collections import Counter, OrderedDict
 from multiprocessing import Queue
 from urllib.parse import quote
 from email.utils import formatdate
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-import aiofiles
 from fastapi import FastAPI, Request, Depends, UploadFile, File, Form
 from fastapi.responses import (
     JSONResponse,
     StreamingResponse,
     Response,
     HTMLResponse,
-    FileResponse,
 )
-from fastapi.staticfiles import StaticFiles
-from starlette.types import Scope
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import QueryParams
+from starlette.types import Scope, Receive, Send, ASGIApp
 
 from ._base_service import BaseService
+from ._archive import ArchiveResponse, ARCHIVE_FORMATS, collect_entries
+from ._file_response import FileRangeResponse, parse_ranges
+from ._file_response import if_range_matches, etag_matches, generate_etag
+from ._listing_cache import ListingCache, encode_json
+from ._compression import PrecompressedStaticFiles, compress_listing
 from model import public_types as ptype
-from model.file import FileModel, DirModel
+from model.file import FileModel, DirModel, ListingOption
+from model.upload import UploadSession
 from settings import settings
 from utils.logger import sharerLogger, sysLogger
-from utils.credentials import Credentials
+from utils.credentials import CredentialsPool, SessionToken
 from utils.response_code import RET
 from utils.public_func import json_response
 
 
-class MyRequest:
-    def __init__(self, scope: Scope):
-        self._setup(scope)
+def _importable(module: str) -> bool:
+    try:
+        importlib.import_module(module)
+    except ImportError:
+        return False
+    return True
 
-    def _setup(self, scope: Scope) -> None:
-        for key in ["client", "path"]:
-            self.__dict__[key] = scope.get(key, "")
-        for header_name, header_value in scope.get("headers"):
-            if header_name == b"x-client":
-                self.__dict__["is_client"] = "True"
-                break
-            # elif header_name == b"sec-ch-ua-platform":
-            #     self.__dict__["client_platform"] = header_value.decode()
 
-    def __getitem__(self, item: str) -> Union[str, tuple]:
-        return self.__dict__.get(item, "")
+class ShareGateMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        gatekeeper: Callable[[Scope], Awaitable[Optional[Response]]],
+    ):
+        """
+        分享校验中间件类初始化函数, 直接实现ASGI接口, 不包装请求和响应,
+        请求体和响应体原样传递, 流式响应不经过额外的任务和内存流
+
+        Args:
+            app: 后续的ASGI应用
+            gatekeeper: 校验函数, 返回响应时直接返回该响应, 返回None时交给后续应用处理
+        """
+        self._app = app
+        self._gatekeeper = gatekeeper
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            response = await self._gatekeeper(scope)
+            if response is not None:
+                await response(scope, receive, send)
+                return
+
+        await self._app(scope, receive, send)
 
 
 class AuthParam(BaseModel):
-    secret_key: str
-    ciphertext: str
+    secret_key: str = ""
+    ciphertext: str = ""
+    token: str = ""
+
+
+class ListingParam(BaseModel):
+    depth: Optional[int] = None
+    offset: int = 0
+    limit: Optional[int] = None
+    sort: str = ""
+    order: str = "asc"
+    keyword: str = Field("", alias="filter")
+    format: str = "json"
+
+    def to_option(self) -> Optional[ListingOption]:
+        """
+        转换为文件列表的查询选项, 未指定任何选项时返回None以保持完整子级树的响应
+
+        Returns:
+            Optional[ListingOption]: 文件列表的查询选项
+        """
+        option = ListingOption(
+            None if self.depth is None else max(self.depth, 0),
+            max(self.offset, 0),
+            None if self.limit is None else max(self.limit, 0),
+            self.sort,
+            self.order == "desc",
+            self.keyword,
+        )
+        if option == ListingOption() and self.format != "ndjson":
+            return None
+        return option
 
 
 class HttpService(BaseService):
     STATIC_PATH = os.path.join(settings.BASE_DIR, "static", "mobile_frontend")
-
-    def __init__(self, input_q: Queue, output_q: Queue):
+    BUSY_RETRY_AFTER = 1
+
+    def __init__(
+        self,
+        input_q: Queue,
+        output_q: Queue,
+        worker_id: int = 0,
+        port: Optional[int] = None,
+        session_key: Optional[bytes] = None,
+    ):
         """
         HTTP共享服务类初始化函数
 
         Args:
             input_q: 输入的进程队列
             output_q: 输出的进程队列
+            worker_id: 工作进程编号, 多个工作进程时用于区分各进程的任务回复
+            port: 监听的端口, 多个工作进程时由管理器统一指定并以端口复用方式监听,
+                为None时自动获取可用端口
+            session_key: 会话令牌的签名密钥, 多个工作进程需一致, 为None时随机生成
         """
         super(HttpService, self).__init__(input_q, output_q)
-        self._service_name = "HTTP"
+        self._service_name = self.worker_name(worker_id)
+        self._port = port
         self._app = None
+        self._server = None
+        self._session_token = SessionToken(session_key)
+        self._credentials_pool = CredentialsPool()
+        self._listing_cache = ListingCache()
+        self._upload_sessions: Dict[str, UploadSession] = {}
+        self._browse_counts: Counter = Counter()
+        self._static_files: Optional[PrecompressedStaticFiles] = None
+        self._start_template: Optional[str] = None
+        self._start_pages: "OrderedDict[Tuple[str, str], Tuple[bytes, str]]" = (
+            OrderedDict()
+        )
+
+    @staticmethod
+    def worker_name(worker_id: int) -> str:
+        """
+        工作进程的服务名称, 用于日志及任务回复
+
+        Args:
+            worker_id: 工作进程编号
+
+        Returns:
+            str: 服务名称
+        """
+        return "HTTP" if worker_id == 0 else f"HTTP-{worker_id}"
 
     def _add_share(self, fileObj: Union[FileModel, DirModel]) -> None:
         """
@@ -81,6 +177,10 @@ class HttpService(BaseService):
         """
         self._sysLogger_debug(f"开始添加分享, 分享路径: {fileObj.targetPath}")
         self._sharing_dict.update({fileObj.uuid: fileObj})
+        if fileObj.isDir:
+            # 开启服务时清理分享文件夹中已放弃的上传任务, 下级文件夹在新建上传任务时清理
+            for target_path in UploadSession.remove_stale(fileObj.targetPath):
+                self._upload_sessions.pop(target_path, None)
         self._sysLogger_debug(f"添加分享完成, 分享路径: {fileObj.targetPath}")
 
     def _remove_share(self, uuid: str) -> None:
@@ -96,6 +196,7 @@ class HttpService(BaseService):
         self._sysLogger_debug(f"开始移除分享, 分享的uuid: {uuid}")
         if uuid in self._sharing_dict:
             del self._sharing_dict[uuid]
+        self._listing_cache.invalidate(uuid)
         self._sysLogger_debug(f"移除分享完成, 分享的uuid: {uuid}")
 
     def _change_free_secret(self, uuid: str, value: bool) -> None:
@@ -114,7 +215,10 @@ class HttpService(BaseService):
             sysLogger.error(f"系统错误, 接收到修改免密状态任务, 但该文件/文件夹并未分享, 文件uuid: {uuid}")
             return
 
-        self._sharing_dict[uuid].free_secret = value
+        fileObj = self._sharing_dict[uuid]
+        fileObj.free_secret = value
+        # 与管理进程同步递增令牌代数, 吊销该分享已签发的令牌, 各工作进程结果一致
+        fileObj.token_generation += 1
         self._sysLogger_debug(f"修改免密状态完成, 分享的uuid: {uuid}")
 
     def run(self) -> None:
@@ -132,12 +236,75 @@ class HttpService(BaseService):
         self._sysLogger_debug("初始化FastAPI")
         self._app = FastAPI()
         self._setup()
-        self._sysLogger_debug("开启服务")
-        uvicorn.run(
-            app=self._app, host=settings.LOCAL_HOST, port=settings.init_wsgi_port()
+        options = self.serving_options()
+        self._sysLogger_debug(
+            f"开启服务, 运行方案: {settings.HTTP_SERVING_PROFILE.value}, "
+            f"事件循环: {options['loop']}, 解析器: {options['http']}"
         )
+        if self._port is None:
+            self._server = uvicorn.Server(
+                uvicorn.Config(
+                    app=self._app,
+                    host=settings.LOCAL_HOST,
+                    port=settings.init_wsgi_port(),
+                    **options,
+                )
+            )
+            self._server.run()
+        else:
+            settings.WSGI_PORT = self._port
+            self._server = uvicorn.Server(
+                uvicorn.Config(
+                    app=self._app, host=settings.LOCAL_HOST, port=self._port, **options
+                )
+            )
+            self._server.run(sockets=[self._reuse_port_socket()])
         self._sysLogger_debug("开启HTTP服务失败")
 
+    @staticmethod
+    def serving_options(
+        profile: Optional[ptype.ServingProfile] = None,
+    ) -> Dict[str, Any]:
+        """
+        生成运行方案对应的uvicorn参数, 事件循环和解析器为auto时选择已安装的最快实现
+
+        Args:
+            profile: 运行方案, 默认为配置中的运行方案
+
+        Returns:
+            Dict[str, Any]: uvicorn.Config的关键字参数
+        """
+        profile = profile or settings.HTTP_SERVING_PROFILE
+        options = dict(settings.HTTP_SERVING_PROFILES[profile])
+        if options.get("loop", "auto") == "auto":
+            options["loop"] = "uvloop" if _importable("uvloop") else "asyncio"
+        if options.get("http", "auto") == "auto":
+            options["http"] = "httptools" if _importable("httptools") else "h11"
+        return options
+
+    def _reuse_port_socket(self) -> socket.socket:
+        """
+        创建开启端口复用的监听套接字, 多个工作进程绑定同一端口, 由系统内核分配连接
+
+        Returns:
+            socket.socket: 已绑定端口的套接字
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind((settings.LOCAL_HOST, self._port))
+        sock.set_inheritable(True)
+        return sock
+
+    def _is_ready(self) -> bool:
+        """
+        HTTP服务是否已开始监听端口
+
+        Returns:
+            bool: 服务是否已可访问
+        """
+        return self._server is not None and self._server.started
+
     def _setup(self) -> None:
         """
         初始化HTTP服务配置, 意在初始化中间件和路由
@@ -148,128 +315,122 @@ class HttpService(BaseService):
         self._sysLogger_debug("初始化路由")
         self._setup_middleware()
         self._setup_router()
+        self._app.add_event_handler("startup", self._start_browse_reporter)
 
-    def _setup_middleware(self) -> None:
+    async def _start_browse_reporter(self) -> None:
+        asyncio.get_running_loop().create_task(self._report_browse_counts())
+
+    async def _report_browse_counts(self) -> None:
         """
-        初始化中间件
+        定时将间隔内各分享的浏览次数合并上报, 避免每次浏览都向主进程发送一条消息
 
         Returns:
             None
         """
+        while True:
+            await asyncio.sleep(settings.BROWSE_FLUSH_INTERVAL)
+            if not self._browse_counts:
+                continue
+            browse_counts, self._browse_counts = dict(self._browse_counts), Counter()
+            self._output_q.put(("browse", browse_counts))
 
-        async def generate_fileObj_recursive(
-            uuid: str, parentObj: Union[None, DirModel] = None
-        ) -> Union[FileModel, DirModel, None]:
-            if parentObj is None:
-                try:
-                    parent_uuid, other_uuid = uuid.split(">", 1)
-                except ValueError:
-                    return self._sharing_dict.get(uuid)
+    def _setup_middleware(self) -> None:
+        """
+        初始化中间件
 
-                parentObj = self._sharing_dict.get(parent_uuid)
-                if parentObj is None or not parentObj.isDir:
-                    return None
-                return await generate_fileObj_recursive(other_uuid, parentObj)
+        Returns:
+            None
+        """
+        self._app.add_middleware(ShareGateMiddleware, gatekeeper=self._gatekeep)
 
-            try:
-                parent_uuid, other_uuid = uuid.split(">", 1)
-            except ValueError:
-                return parentObj.get(uuid)
-            parentObj = parentObj.get(parent_uuid)
-            if parentObj is None or not parentObj.isDir:
-                return None
-            return await generate_fileObj_recursive(other_uuid, parentObj)
+    async def _gatekeep(self, scope: Scope) -> Optional[Response]:
+        """
+        该中间件目前完成以下功能:
+        1. 无效/非法路由返回错误链接提示
+        2. 访问/下载的文件/文件夹是否有效校验
+        3. 访问/下载日志写入
+        4. 是否下载文件夹
+        5. 是否用非客户端下载FTP服务文件/文件夹
+        6. 文件/文件夹对象往后传递给视图
 
-        async def is_download_ftp_without_client(
-            shareType: ptype.ShareType, request: MyRequest
-        ) -> bool:
-            is_client = request["is_client"]
-            if shareType is ptype.ShareType.ftp and not is_client:
-                return True
+        Args:
+            scope: 请求的scope
 
-            return False
+        Returns:
+            Optional[Response]: 需直接返回的response对象, 为None时交给视图处理
+        """
+        path = scope["path"]
+        uri, param = path.rsplit("/", 1)
+        if param == "favicon.ico":
+            favicon = os.path.join(self.STATIC_PATH, "favicon.ico")
+            return self._static_files.file_response(favicon, os.stat(favicon), scope)
+        if uri.startswith(ptype.STATIC_PREFIX) or ptype.SPEED_TEST in uri:
+            return None
+
+        client = scope.get("client")
+        client_ip = client[0] if client else "未知IP"
+        # 查找可能需要读取大文件夹的子级, 放到线程池中执行, 避免阻塞事件循环
+        fileObj = await run_in_threadpool(self._lookup_existing, param)
+        # 文件是否存在判断
+        if fileObj is None:
+            sharerLogger.warning(f"访问错误路径或文件/文件夹已不存在, 访问链接: {path}, 用户IP: {client_ip}")
+            return JSONResponse(self.json_response(RET.FILENOTFOUND))
+        # 浏览/下载记录写入日志
+        if ptype.FILE_LIST_URI in uri:
+            sharerLogger.info(
+                f"用户IP: {client_ip}, 用户访问了文件列表, 文件链接: {fileObj.targetPath}"
+            )
+            # 仅统计分享本身的浏览次数, 间隔内合并后上报
+            if param in self._sharing_dict:
+                self._browse_counts[param] += 1
+        elif ptype.DOWNLOAD_URI in uri:
+            hit_log = QueryParams(scope["query_string"]).get(ptype.HIT_LOG, "false")
+            if fileObj.shareType is ptype.ShareType.http:
+                # 下载的若为HTTP分享的文件夹, 不含hit_log标志时打包下载, 否则为客户端下载
+                if fileObj.isDir and hit_log != "true":
+                    sharerLogger.info(
+                        f"用户IP: {client_ip}, 用户打包下载了文件夹, 文件夹路径: {fileObj.targetPath}"
+                    )
+                elif fileObj.isDir and hit_log == "true":
+                    sharerLogger.info(
+                        f"用户IP: {client_ip}, 用户下载了文件夹, 文件夹路径: {fileObj.targetPath}"
+                    )
+                    return JSONResponse(self.json_response(RET.OK))
+                elif hit_log == "true":
+                    sharerLogger.info(
+                        f"用户IP: {client_ip}, 用户下载了文件, 文件路径: {fileObj.targetPath}"
+                    )
+            else:
+                file_type = "文件夹" if fileObj.isDir else "文件"
+                # 下载的若为FTP分享文件, 需进行是否为客户端判断, 仅此时才查找请求头
+                is_client = any(name == b"x-client" for name, _ in scope["headers"])
+                if not is_client:
+                    sharerLogger.warning(f"用户使用非客户端无法下载FTP分享的文件/文件夹, 用户IP: {client_ip}")
+                    return JSONResponse(
+                        self.json_response(RET.FTPDOWNLOADWITHOUTCLIENT)
+                    )
+                if hit_log == "true":
+                    sharerLogger.info(
+                        f"用户IP: {client_ip}, 用户下载了{file_type}, {file_type}路径: {fileObj.targetPath}"
+                    )
 
-        @self._app.middleware("http")
-        async def complete_middleware(request: Request, cell_next) -> Response:
-            """
-            该中间件目前完成以下功能:
-            1. 无效/非法路由返回错误链接提示
-            2. 访问/下载的文件/文件夹是否有效校验
-            3. 访问/下载日志写入
-            4. 是否下载文件夹
-            5. 是否用非客户端下载FTP服务文件/文件夹
-            6. 文件/文件夹对象往后传递给视图
+        scope["fileObj"] = fileObj
+        return None
 
-            Args:
-                request: request对象
-                cell_next: 后续中间件/视图回调函数
+    def _lookup_existing(self, uuid: str) -> Union[None, FileModel, DirModel]:
+        """
+        根据完整uuid查找仍存在的文件/文件夹对象
 
-            Returns:
-                Response: response对象
-            """
-            _request = MyRequest(request.scope)
-            client_ip = _request["client"][0] if _request["client"] else "未知IP"
-            uri, param = _request["path"].rsplit("/", 1)
-            if param == "favicon.ico":
-                return FileResponse(os.path.join(self.STATIC_PATH, "favicon.ico"))
-            if uri.startswith(ptype.STATIC_PREFIX) or ptype.SPEED_TEST in uri:
-                return await cell_next(request)
-
-            # client_platform = _request["client_platform"]
-            fileObj = await generate_fileObj_recursive(param)
-            # 文件是否存在判断
-            if fileObj is None or not fileObj.isExists:
-                sharerLogger.warning(
-                    f"访问错误路径或文件/文件夹已不存在, 访问链接: {_request['path']}, 用户IP: {client_ip}"
-                )
-                return JSONResponse(self.json_response(RET.FILENOTFOUND))
-            # 浏览/下载记录写入日志
-            if ptype.FILE_LIST_URI in uri:
-                sharerLogger.info(
-                    f"用户IP: {client_ip}, 用户访问了文件列表, 文件链接: {fileObj.targetPath}"
-                )
-                self._output_q.put(param)
-            elif ptype.DOWNLOAD_URI in uri:
-                params = request.query_params
-                hit_log = params.get(ptype.HIT_LOG, "false")
-                if fileObj.shareType is ptype.ShareType.http:
-                    # 下载的若为HTTP分享的文件夹, 需进行是否含hit_log标志校验
-                    if fileObj.isDir and hit_log != "true":
-                        sharerLogger.warning(f"用户使用非客户端无法直接下载分享的文件夹, 用户IP: {client_ip}")
-                        return JSONResponse(
-                            self.json_response(RET.CANNOTDOWNLOADFOLDER)
-                        )
-                    elif fileObj.isDir and hit_log == "true":
-                        sharerLogger.info(
-                            f"用户IP: {client_ip}, 用户下载了文件夹, 文件夹路径: {fileObj.targetPath}"
-                        )
-                        return JSONResponse(self.json_response(RET.OK))
-                    elif hit_log == "true":
-                        sharerLogger.info(
-                            f"用户IP: {client_ip}, 用户下载了文件, 文件路径: {fileObj.targetPath}"
-                        )
-                else:
-                    file_type = "文件夹" if fileObj.isDir else "文件"
-                    # 下载的若为FTP分享文件, 需进行是否为客户端判断
-                    if await is_download_ftp_without_client(
-                        fileObj.shareType, _request
-                    ):
-                        sharerLogger.warning(
-                            f"用户使用非客户端无法下载FTP分享的文件/文件夹, 用户IP: {client_ip}"
-                        )
-                        return JSONResponse(
-                            self.json_response(RET.FTPDOWNLOADWITHOUTCLIENT)
-                        )
-                    if hit_log == "true":
-                        sharerLogger.info(
-                            f"用户IP: {client_ip}, 用户下载了{file_type}, {file_type}路径: {fileObj.targetPath}"
-                        )
-            # else:
-            #     return JSONResponse({"errno": 404, "errmsg": "访问的链接不存在！"})
+        Args:
+            uuid: 文件/文件夹对象的完整uuid
 
-            request.scope["fileObj"] = fileObj
-            response = await cell_next(request)
-            return response
+        Returns:
+            Union[None, FileModel, DirModel]: 目标文件/文件夹对象, 不存在则为None
+        """
+        fileObj = self._sharing_dict.lookup(uuid)
+        if fileObj is None or not fileObj.isExists:
+            return None
+        return fileObj
 
     def _setup_router(self) -> None:
         """
@@ -280,8 +441,10 @@ class HttpService(BaseService):
         """
 
         ### root app
-        @self._app.get("%s/{uuid}" % ptype.FILE_LIST_URI)
-        async def file_list(uuid: str, request: Request) -> Dict[str, Any]:
+        @self._app.get("%s/{uuid}" % ptype.FILE_LIST_URI, response_model=None)
+        async def file_list(
+            uuid: str, request: Request, listing: ListingParam = Depends()
+        ) -> Union[Dict[str, Any], Response]:
             fileObj = request.scope.get("fileObj")
             fileObj: Union[None, FileModel, DirModel]
             if not fileObj:
@@ -292,13 +455,27 @@ class HttpService(BaseService):
                 )
                 return self.json_response(RET.FILETRANSFERERR)
 
-            data = await fileObj.to_dict_client()
-            return self.json_response(RET.OK, None, data=data)
+            option = listing.to_option()
+            if listing.format == "ndjson":
+                return self.generate_ndjson_response(
+                    fileObj, "client", option, self.json_response(RET.OK)
+                )
+            return await self.generate_listing_response(
+                fileObj,
+                "client",
+                option,
+                self.json_response(RET.OK),
+                request.headers.get("accept-encoding", ""),
+            )
 
-        @self._app.get("%s/{uuid}" % ptype.DOWNLOAD_URI, response_model=None)
+        @self._app.api_route(
+            "%s/{uuid}" % ptype.DOWNLOAD_URI,
+            methods=["GET", "HEAD"],
+            response_model=None,
+        )
         async def download(
             uuid: str, request: Request
-        ) -> Union[Dict[str, Any], StreamingResponse]:
+        ) -> Union[Dict[str, Any], Response]:
             fileObj = request.scope.get("fileObj")
             fileObj: Union[None, FileModel, DirModel]
             if not fileObj:
@@ -309,7 +486,9 @@ class HttpService(BaseService):
                 )
                 return self.json_response(RET.FILETRANSFERERR)
 
-            if fileObj.shareType is ptype.ShareType.http:
+            if fileObj.shareType is ptype.ShareType.http and fileObj.isDir:
+                return await self.generate_archive_response(request, fileObj)
+            elif fileObj.shareType is ptype.ShareType.http:
                 return await self.generate_file_stream_response(request, fileObj)
             elif fileObj.shareType is ptype.ShareType.ftp:
                 ftp_data = await fileObj.to_ftp_data()
@@ -321,6 +500,9 @@ class HttpService(BaseService):
         ### mobile app
         mobile = FastAPI()
         FOR_BIDDEN_RESPONSE = self.json_response(RET.FORBIDDEN)
+        SERVER_BUSY_RESPONSE = self.json_response(
+            RET.SERVERBUSY, retryAfter=self.BUSY_RETRY_AFTER
+        )
 
         def REQUIRE_PWD_RESPONSE(secret_key):
             return self.json_response(RET.REQUIREPWD, secret_key=secret_key)
@@ -341,21 +523,38 @@ class HttpService(BaseService):
 
         async def verify_credentials(
             fileObj: Union[FileModel, DirModel], pwd: str
-        ) -> bool:
+        ) -> Optional[bool]:
             """
-            凭据校验
+            凭据校验, 在凭据校验线程池中执行, 不阻塞事件循环
 
             Args:
                 fileObj: 待校验的文件/文件夹对象
                 pwd: 待校验的密码
 
+            Returns:
+                Optional[bool]: 校验的结果, 线程池饱和时为None
+            """
+            return await self._credentials_pool.verification(fileObj, pwd)
+
+        async def verify_token(
+            fileObj: Union[FileModel, DirModel], request: Request, token: str = ""
+        ) -> bool:
+            """
+            会话令牌校验, 令牌可通过请求头或请求参数传递
+
+            Args:
+                fileObj: 待校验的文件/文件夹对象
+                request: request对象
+                token: 请求参数中的令牌
+
             Returns:
                 bool: 校验的结果
             """
-            return Credentials.verification(fileObj, pwd)
+            token = token or request.headers.get(ptype.SESSION_TOKEN_HEADER, "")
+            return self._session_token.verify(token, fileObj)
 
-        async def with_credentials(
-            uuid: str, request: Request, auth_param: AuthParam
+        async def check_credentials(
+            uuid: str, request: Request, secret_key: str, ciphertext: str, token: str
         ) -> Dict[str, Union[int, str, FileModel, DirModel]]:
             fileObj = request.scope.get("fileObj")
             fileObj: Union[None, FileModel, DirModel]
@@ -370,51 +569,100 @@ class HttpService(BaseService):
                 return FOR_BIDDEN_RESPONSE
             if await no_need_credentials(fileObj):
                 return self.json_response(RET.OK, fileObj=fileObj)
-            if auth_param.secret_key != fileObj.secret_key:
-                return FOR_BIDDEN_RESPONSE
-            if await verify_credentials(fileObj, auth_param.ciphertext):
+            if await verify_token(fileObj, request, token):
                 return self.json_response(RET.OK, fileObj=fileObj)
+            if not secret_key and not ciphertext:
+                return REQUIRE_PWD_RESPONSE(fileObj.secret_key)
+            if secret_key != fileObj.secret_key:
+                return FOR_BIDDEN_RESPONSE
+            verify_result = await verify_credentials(fileObj, ciphertext)
+            if verify_result is None:
+                return SERVER_BUSY_RESPONSE
+            if verify_result:
+                token = self._session_token.issue(fileObj)
+                return self.json_response(RET.OK, fileObj=fileObj, token=token)
 
             return REQUIRE_PWD_RESPONSE(fileObj.secret_key)
 
+        async def with_credentials(
+            uuid: str, request: Request, auth_param: AuthParam
+        ) -> Dict[str, Union[int, str, FileModel, DirModel]]:
+            return await check_credentials(
+                uuid,
+                request,
+                auth_param.secret_key,
+                auth_param.ciphertext,
+                auth_param.token,
+            )
+
         async def with_credentials_form(
             uuid: str,
             request: Request,
-            secret_key: str = Form(...),
-            ciphertext: str = Form(...),
+            secret_key: str = Form(""),
+            ciphertext: str = Form(""),
+            token: str = Form(""),
         ) -> Dict[str, Union[int, str, FileModel, DirModel]]:
-            fileObj = request.scope.get("fileObj")
-            fileObj: Union[None, FileModel, DirModel]
-            if not fileObj:
-                print("not fileObj", uuid)
-                sysLogger.error(
-                    "发生了错误, 获取不到用户访问的文件/文件夹对象, "
-                    "请用uuid对比`file_sharing_backups.json`文件, "
-                    f"查看分享的文件/文件夹状态, uuid: {uuid}"
-                )
-                return self.json_response(RET.FILETRANSFERERR)
-            if fileObj.shareType is ptype.ShareType.ftp:
+            return await check_credentials(uuid, request, secret_key, ciphertext, token)
+
+        async def with_credentials_header(
+            uuid: str, request: Request
+        ) -> Dict[str, Union[int, str, FileModel, DirModel]]:
+            # 仅校验请求头中的令牌, 凭据不出现在URL中, 避免被记录到访问日志
+            return await check_credentials(uuid, request, "", "", "")
+
+        def check_upload_path(
+            fileObj: Union[FileModel, DirModel], curr_path: str, file_name: str
+        ) -> Optional[Dict[str, Any]]:
+            """
+            上传路径校验, 文件名不能包含路径, 上传的文件夹需在分享的文件夹内
+
+            Args:
+                fileObj: 分享的文件夹对象
+                curr_path: 上传的目标文件夹路径
+                file_name: 上传的文件名
+
+            Returns:
+                Optional[Dict[str, Any]]: 校验不通过时的响应数据, 通过时为None
+            """
+            if file_name in ("", ".", "..") or os.path.basename(file_name) != file_name:
                 return FOR_BIDDEN_RESPONSE
-            if await no_need_credentials(fileObj):
-                return self.json_response(RET.OK, fileObj=fileObj)
-            if secret_key != fileObj.secret_key:
+            if not os.path.isdir(curr_path):
+                return self.json_response(RET.UPLOADTONONFOLDER)
+            share_path = os.path.realpath(fileObj.targetPath)
+            if (
+                os.path.commonpath([share_path, os.path.realpath(curr_path)])
+                != share_path
+            ):
                 return FOR_BIDDEN_RESPONSE
-            if await verify_credentials(fileObj, ciphertext):
-                return self.json_response(RET.OK, fileObj=fileObj)
 
-            return REQUIRE_PWD_RESPONSE(fileObj.secret_key)
+            return None
+
+        def with_token(
+            verify_result: Dict[str, Any], **datas
+        ) -> Dict[str, Union[int, str]]:
+            """
+            凭据校验时新签发了令牌, 则随响应一并返回
+
+            Args:
+                verify_result: 凭据校验的结果
+                **datas: 其他返回数据
+
+            Returns:
+                Dict[str, Union[int, str]]: 生成的响应数据
+            """
+            token = verify_result.get("token")
+            if token:
+                datas["token"] = token
+            return self.json_response(RET.OK, **datas)
 
         @mobile.get("%s/{uuid}" % ptype.QRCODE_URL)
-        async def get_mobile_start(uuid: str) -> HTMLResponse:
-            index_html = os.path.join(self.STATIC_PATH, "index.html")
-            with open(index_html) as f:
-                contend = f.read()
-            replace_content = contend.replace(
-                "{{ BASE_URL }}",
-                f"http://{settings.LOCAL_HOST}:{settings.WSGI_PORT}{ptype.MOBILE_PREFIX}",
-            )
-            replace_content = replace_content.replace("{{ UUID }}", uuid)
-            return HTMLResponse(replace_content)
+        async def get_mobile_start(uuid: str, request: Request) -> Response:
+            body, etag = self.render_start_page(uuid)
+            # 入口页引用的静态文件名含内容哈希, 入口页本身每次校验, 未变化时仅返回304
+            headers = {"ETag": etag, "Cache-Control": "no-cache"}
+            if etag_matches(request.headers.get("if-none-match", ""), etag):
+                return Response(status_code=304, headers=headers)
+            return HTMLResponse(body, headers=headers)
 
         @mobile.get("%s/download" % ptype.SPEED_TEST)
         async def get_download_speed() -> StreamingResponse:
@@ -461,8 +709,10 @@ class HttpService(BaseService):
                 data={"received_size": received_size, "duration": round(duration, 3)},
             )
 
-        @mobile.get("%s/{uuid}" % ptype.FILE_LIST_URI)
-        async def get_list_mobile(uuid: str, request: Request) -> Dict[str, Any]:
+        @mobile.get("%s/{uuid}" % ptype.FILE_LIST_URI, response_model=None)
+        async def get_list_mobile(
+            uuid: str, request: Request, listing: ListingParam = Depends()
+        ) -> Union[Dict[str, Any], Response]:
             fileObj = request.scope.get("fileObj")
             fileObj: Union[None, FileModel, DirModel]
             if not fileObj:
@@ -474,22 +724,46 @@ class HttpService(BaseService):
                 return self.json_response(RET.FILETRANSFERERR)
             if fileObj.shareType is ptype.ShareType.ftp:
                 return FOR_BIDDEN_RESPONSE
-            if await no_need_credentials(fileObj):
-                data = await fileObj.to_dict_mobile()
-                return self.json_response(RET.OK, data=data)
+            if await no_need_credentials(fileObj) or await verify_token(
+                fileObj, request
+            ):
+                option = listing.to_option()
+                if listing.format == "ndjson":
+                    return self.generate_ndjson_response(
+                        fileObj, "mobile", option, self.json_response(RET.OK)
+                    )
+                return await self.generate_listing_response(
+                    fileObj,
+                    "mobile",
+                    option,
+                    self.json_response(RET.OK),
+                    request.headers.get("accept-encoding", ""),
+                )
 
             return REQUIRE_PWD_RESPONSE(fileObj.secret_key)
 
-        @mobile.post("%s/{uuid}" % ptype.FILE_LIST_URI)
+        @mobile.post("%s/{uuid}" % ptype.FILE_LIST_URI, response_model=None)
         async def post_list_mobile(
+            request: Request,
+            listing: ListingParam = Depends(),
             verify_result: Dict[str, Any] = Depends(with_credentials),
-        ) -> Dict[str, Any]:
+        ) -> Union[Dict[str, Any], Response]:
             if verify_result.get("errno", 400) != 200:
                 return verify_result
 
             fileObj = verify_result.get("fileObj")
-            data = await fileObj.to_dict_mobile()
-            return self.json_response(RET.OK, data=data)
+            option = listing.to_option()
+            if listing.format == "ndjson":
+                return self.generate_ndjson_response(
+                    fileObj, "mobile", option, with_token(verify_result)
+                )
+            return await self.generate_listing_response(
+                fileObj,
+                "mobile",
+                option,
+                with_token(verify_result),
+                request.headers.get("accept-encoding", ""),
+            )
 
         @mobile.get("%s/{uuid}" % ptype.FILE_SIZE_URI)
         async def get_file_size(uuid: str, request: Request) -> Dict[str, Any]:
@@ -515,12 +789,18 @@ class HttpService(BaseService):
         @mobile.post("%s/{uuid}" % ptype.DOWNLOAD_URI, response_model=None)
         async def download_mobile(
             request: Request, verify_result: Dict[str, Any] = Depends(with_credentials)
-        ) -> Union[Dict[str, Any], StreamingResponse]:
+        ) -> Union[Dict[str, Any], Response]:
             if verify_result.get("errno", 400) != 200:
                 return verify_result
             fileObj = verify_result.get("fileObj")
 
-            return await self.generate_file_stream_response(request, fileObj)
+            if fileObj.isDir:
+                response = await self.generate_archive_response(request, fileObj)
+            else:
+                response = await self.generate_file_stream_response(request, fileObj)
+            if verify_result.get("token"):
+                response.headers[ptype.SESSION_TOKEN_HEADER] = verify_result["token"]
+            return response
 
         @mobile.post("%s/{uuid}" % ptype.UPLOAD_URI)
         async def upload_mobile(
@@ -556,8 +836,8 @@ class HttpService(BaseService):
                     f"用户IP： {client_ip}, 用户正在上传文件: {file_name}, 上传路径: {curr_path}"
                 )
 
-            return self.json_response(
-                RET.OK, data={"fileName": file_name, "chunkId": chunk_id}
+            return with_token(
+                verify_result, data={"fileName": file_name, "chunkId": chunk_id}
             )
 
         @mobile.post("%s/{uuid}" % ptype.UPLOAD_MERGE_URI)
@@ -579,32 +859,249 @@ class HttpService(BaseService):
                 if not os.path.exists(chunk_file_name):
                     return self.json_response(RET.MERGELOSSCHUNK, f"不存在的分片索引: {i}")
 
+            # 兼容旧版移动端, 新版移动端使用/upload/stream按偏移写入, 无需合并
             merge_file_name = os.path.join(curr_path, file_name)
             with open(merge_file_name, "wb") as merge_f:
                 for i in range(chunk_count):
                     chunk_file_name = os.path.join(curr_path, f"{file_name}_{i}.part")
                     with open(chunk_file_name, "rb") as chunk_f:
-                        merge_f.write(chunk_f.read())
+                        shutil.copyfileobj(
+                            chunk_f, merge_f, UploadSession.WRITE_BUFFER_SIZE
+                        )
                     os.remove(chunk_file_name)
 
             fileObj: Union[FileModel, DirModel] = request.scope.get("fileObj")
-            self._sharing_dict.update(
-                {
-                    fileObj.uuid: DirModel(
-                        fileObj.targetPath,
-                        fileObj.uuid,
-                        None,
-                        fileObj.ftp_pwd,
-                        fileObj.ftp_port,
-                        fileObj.ftp_basePath,
-                        fileObj.secret_key,
-                        fileObj.credentials,
+            self._add_uploaded_file(fileObj, merge_file_name)
+
+            return with_token(
+                verify_result, data={"fileName": file_name, "chunkCount": chunk_count}
+            )
+
+        async def find_upload_session(
+            curr_path: str, file_name: str
+        ) -> Optional[UploadSession]:
+            """
+            获取上传任务, 内存中不存在时尝试从状态文件恢复(服务进程重启后)
+
+            Args:
+                curr_path: 上传的目标文件夹路径
+                file_name: 上传的文件名
+
+            Returns:
+                Optional[UploadSession]: 上传任务, 不存在时为None
+            """
+            target_path = os.path.join(curr_path, file_name)
+            session = self._upload_sessions.get(target_path)
+            if session is not None:
+                return session
+            session = await run_in_threadpool(UploadSession.load, curr_path, file_name)
+            if session is None:
+                return None
+
+            return self._upload_sessions.setdefault(target_path, session)
+
+        async def remove_stale_sessions(curr_path: str) -> None:
+            """
+            删除上传目录中已过期的上传任务, 并移除内存中对应的任务
+
+            Args:
+                curr_path: 上传的目标文件夹路径
+
+            Returns:
+                None
+            """
+            removed = await run_in_threadpool(UploadSession.remove_stale, curr_path)
+            for target_path in removed:
+                self._upload_sessions.pop(target_path, None)
+
+        async def create_upload_session(
+            request: Request,
+            curr_path: str,
+            file_name: str,
+            file_size: int,
+            chunk_size: int,
+        ) -> Optional[Dict[str, Any]]:
+            """
+            创建上传任务, 已存在参数一致的任务时直接复用; 创建前检查磁盘剩余空间,
+            空间不足时在传输任何数据前拒绝
+
+            Args:
+                request: request对象
+                curr_path: 上传的目标文件夹路径
+                file_name: 上传的文件名
+                file_size: 文件总大小
+                chunk_size: 分片大小
+
+            Returns:
+                Optional[Dict[str, Any]]: 创建失败时的响应数据, 成功时为None
+            """
+            if chunk_size <= 0 or file_size < 0:
+                return self.json_response(RET.UPLOADCHUNKINVALID)
+            await remove_stale_sessions(curr_path)
+            session = await find_upload_session(curr_path, file_name)
+            if session is not None:
+                if not session.matches(file_size, chunk_size):
+                    return self.json_response(
+                        RET.UPLOADCHUNKINVALID, "与已有上传任务的文件大小或分片大小不一致"
                     )
-                }
+                return None
+
+            target_path = os.path.join(curr_path, file_name)
+            if os.path.exists(target_path):
+                return self.json_response(RET.UPLOADFILEISEXISTS)
+            session = UploadSession(curr_path, file_name, file_size, chunk_size)
+            if shutil.disk_usage(curr_path).free < session.required_space():
+                return self.json_response(RET.UPLOADNOSPACE)
+            session = self._upload_sessions.setdefault(target_path, session)
+            await run_in_threadpool(session.prepare)
+            await run_in_threadpool(session.save)
+            client_ip = request.get("client", ["未知IP"])[0]
+            sysLogger.info(
+                f"用户IP： {client_ip}, 用户正在上传文件: {file_name}, 上传路径: {curr_path}"
             )
 
-            return self.json_response(
-                RET.OK, data={"fileName": file_name, "chunkCount": chunk_count}
+            return None
+
+        def upload_status(session: UploadSession) -> Dict[str, Any]:
+            return {
+                "fileName": session.file_name,
+                "fileSize": session.file_size,
+                "chunkSize": session.chunk_size,
+                "chunkCount": session.chunk_count,
+                "receivedCount": len(session.received),
+                "bitmap": base64.b64encode(session.bitmap()).decode("ascii"),
+            }
+
+        @mobile.post("%s/{uuid}" % ptype.UPLOAD_CREATE_URI)
+        async def upload_create_mobile(
+            request: Request,
+            file_name: str = Form(...),
+            curr_path: str = Form(...),
+            file_size: int = Form(...),
+            chunk_size: int = Form(...),
+            verify_result: Dict[str, Any] = Depends(with_credentials_form),
+        ) -> Dict[str, Any]:
+            if verify_result.get("errno", 400) != 200:
+                return verify_result
+            fileObj: Union[FileModel, DirModel] = verify_result.get("fileObj")
+            path_error = check_upload_path(fileObj, curr_path, file_name)
+            if path_error is not None:
+                return path_error
+            create_error = await create_upload_session(
+                request, curr_path, file_name, file_size, chunk_size
+            )
+            if create_error is not None:
+                return create_error
+            session = self._upload_sessions[os.path.join(curr_path, file_name)]
+
+            return with_token(verify_result, data=upload_status(session))
+
+        @mobile.get("%s/{uuid}" % ptype.UPLOAD_STATUS_URI)
+        async def upload_status_mobile(
+            file_name: str,
+            curr_path: str,
+            verify_result: Dict[str, Any] = Depends(with_credentials_header),
+        ) -> Dict[str, Any]:
+            if verify_result.get("errno", 400) != 200:
+                return verify_result
+            fileObj: Union[FileModel, DirModel] = verify_result.get("fileObj")
+            path_error = check_upload_path(fileObj, curr_path, file_name)
+            if path_error is not None:
+                return path_error
+            session = await find_upload_session(curr_path, file_name)
+            if session is None:
+                return self.json_response(RET.UPLOADNOTFOUND)
+            await run_in_threadpool(session.refresh)
+
+            return with_token(verify_result, data=upload_status(session))
+
+        @mobile.post("%s/{uuid}" % ptype.UPLOAD_STREAM_URI)
+        async def upload_stream_mobile(
+            request: Request,
+            file_name: str,
+            curr_path: str,
+            chunk_id: int,
+            chunk_size: int,
+            file_size: int,
+            verify_result: Dict[str, Any] = Depends(with_credentials_header),
+        ) -> Dict[str, Any]:
+            if verify_result.get("errno", 400) != 200:
+                return verify_result
+            fileObj: Union[FileModel, DirModel] = verify_result.get("fileObj")
+            path_error = check_upload_path(fileObj, curr_path, file_name)
+            if path_error is not None:
+                return path_error
+            create_error = await create_upload_session(
+                request, curr_path, file_name, file_size, chunk_size
+            )
+            if create_error is not None:
+                return create_error
+            session = self._upload_sessions[os.path.join(curr_path, file_name)]
+
+            chunk_range = session.chunk_range(chunk_id)
+            if chunk_range is None:
+                return self.json_response(
+                    RET.UPLOADCHUNKINVALID, f"不合法的分片索引: {chunk_id}"
+                )
+            if chunk_id in session.received:
+                return self.json_response(RET.UPLOADCHUNKEXISTS)
+            offset, length = chunk_range
+            received = await self.receive_chunk(request, session, offset, length)
+            if received != length:
+                return self.json_response(
+                    RET.UPLOADCHUNKINVALID, f"分片长度不一致, 应为: {length}, 实际: {received}"
+                )
+            session.received.add(chunk_id)
+            await run_in_threadpool(session.save)
+
+            return with_token(
+                verify_result,
+                data={
+                    "fileName": file_name,
+                    "chunkId": chunk_id,
+                    "chunkCount": session.chunk_count,
+                    "receivedCount": len(session.received),
+                },
+            )
+
+        @mobile.post("%s/{uuid}" % ptype.UPLOAD_COMMIT_URI)
+        async def upload_commit_mobile(
+            file_name: str = Form(...),
+            curr_path: str = Form(...),
+            verify_result: Dict[str, Any] = Depends(with_credentials_form),
+        ) -> Dict[str, Any]:
+            if verify_result.get("errno", 400) != 200:
+                return verify_result
+            fileObj: Union[FileModel, DirModel] = verify_result.get("fileObj")
+            path_error = check_upload_path(fileObj, curr_path, file_name)
+            if path_error is not None:
+                return path_error
+
+            target_path = os.path.join(curr_path, file_name)
+            session = await find_upload_session(curr_path, file_name)
+            if session is None:
+                return self.json_response(RET.UPLOADNOTFOUND)
+            # 多个工作进程时分片可能由其他进程接收
+            await run_in_threadpool(session.refresh)
+            if not session.isComplete:
+                missing = sorted(set(range(session.chunk_count)) - session.received)
+                return self.json_response(
+                    RET.MERGELOSSCHUNK, f"缺少的分片索引: {missing[:10]}"
+                )
+            try:
+                await run_in_threadpool(session.commit)
+            except FileExistsError:
+                return self.json_response(RET.UPLOADFILEISEXISTS)
+            except FileNotFoundError:
+                # 已由其他工作进程完成上传
+                self._upload_sessions.pop(target_path, None)
+                return self.json_response(RET.UPLOADNOTFOUND)
+            self._upload_sessions.pop(target_path, None)
+            self._add_uploaded_file(fileObj, target_path)
+
+            return with_token(
+                verify_result,
+                data={"fileName": file_name, "chunkCount": session.chunk_count},
             )
 
         @mobile.post("%s/{uuid}" % ptype.UPLOAD_REMOVE_URI)
@@ -615,9 +1112,16 @@ class HttpService(BaseService):
         ) -> Dict[str, Any]:
             if verify_result.get("errno", 400) != 200:
                 return verify_result
-            if not os.path.isdir(curr_path):
-                return self.json_response(RET.UPLOADTONONFOLDER)
+            fileObj: Union[FileModel, DirModel] = verify_result.get("fileObj")
+            path_error = check_upload_path(fileObj, curr_path, file_name)
+            if path_error is not None:
+                return path_error
             rm_count = 0
+            session = await find_upload_session(curr_path, file_name)
+            if session is not None:
+                self._upload_sessions.pop(session.target_path, None)
+                await run_in_threadpool(session.discard)
+                rm_count += len(session.received)
             for curr_file in os.listdir(curr_path):
                 curr_file_path = os.path.join(curr_path, curr_file)
                 if os.path.isdir(curr_file_path):
@@ -626,62 +1130,293 @@ class HttpService(BaseService):
                     os.remove(os.path.join(curr_path, curr_file))
                     rm_count += 1
 
-            return self.json_response(
-                RET.OK, data={"fileName": file_name, "removeCount": rm_count}
+            return with_token(
+                verify_result, data={"fileName": file_name, "removeCount": rm_count}
             )
 
         # mount app
         self._app.mount(ptype.MOBILE_PREFIX, mobile)
+        self._static_files = PrecompressedStaticFiles(directory=self.STATIC_PATH)
         self._app.mount(
-            ptype.STATIC_PREFIX, StaticFiles(directory=self.STATIC_PATH), name="static"
+            ptype.STATIC_PREFIX,
+            self._static_files,
+            name="static",
         )
 
+    def render_start_page(self, uuid: str) -> Tuple[bytes, str]:
+        """
+        渲染移动端入口页, 渲染结果按(BASE_URL, uuid)缓存在内存中
+
+        Args:
+            uuid: 分享的uuid
+
+        Returns:
+            Tuple[bytes, str]: (入口页HTML, ETag)
+        """
+        base_url = (
+            f"http://{settings.LOCAL_HOST}:{settings.WSGI_PORT}{ptype.MOBILE_PREFIX}"
+        )
+        key = (base_url, uuid)
+        page = self._start_pages.get(key)
+        if page is not None:
+            self._start_pages.move_to_end(key)
+            return page
+
+        if self._start_template is None:
+            index_html = os.path.join(self.STATIC_PATH, "index.html")
+            with open(index_html, encoding="utf-8") as f:
+                self._start_template = f.read()
+        body = (
+            self._start_template.replace("{{ BASE_URL }}", base_url)
+            .replace("{{ UUID }}", uuid)
+            .encode("utf-8")
+        )
+        page = (body, f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"')
+        self._start_pages[key] = page
+        if len(self._start_pages) > settings.START_PAGE_CACHE_SIZE:
+            self._start_pages.popitem(last=False)
+        return page
+
+    def _add_uploaded_file(
+        self, fileObj: Union[FileModel, DirModel], path: str
+    ) -> None:
+        """
+        上传完成后将新文件插入分享的文件夹对象, 已有文件/文件夹的uuid及缓存保持不变,
+        文件列表缓存由文件夹修改时间校验自动失效
+
+        Args:
+            fileObj: 上传所在的分享文件夹对象
+            path: 上传完成的文件路径
+
+        Returns:
+            None
+        """
+        childObj = fileObj.add_child(path)
+        if childObj is not None:
+            self._sysLogger_debug(f"上传的文件已加入分享, 文件路径: {path}")
+
+    @staticmethod
+    async def receive_chunk(
+        request: Request, session: UploadSession, offset: int, length: int
+    ) -> int:
+        """
+        将请求体直接按偏移写入上传任务的临时文件, 不经过multipart解析且不在内存中保留整个分片,
+        超出分片长度的数据不会被写入
+
+        Args:
+            request: request对象
+            session: 上传任务
+            offset: 分片在文件中的偏移
+            length: 分片长度
+
+        Returns:
+            int: 接收到的字节数
+        """
+        received, buffer = 0, bytearray()
+        file = await run_in_threadpool(session.open_chunk)
+        try:
+            async for data in request.stream():
+                if received + len(buffer) + len(data) > length:
+                    return received + len(buffer) + len(data)
+                buffer += data
+                if len(buffer) >= UploadSession.WRITE_BUFFER_SIZE:
+                    await run_in_threadpool(
+                        session.write_at, file, offset + received, bytes(buffer)
+                    )
+                    received += len(buffer)
+                    buffer.clear()
+            if buffer:
+                await run_in_threadpool(
+                    session.write_at, file, offset + received, bytes(buffer)
+                )
+                received += len(buffer)
+        finally:
+            await run_in_threadpool(file.close)
+
+        return received
+
     @staticmethod
     async def generate_file_stream_response(
         request: Request, fileObj: FileModel
-    ) -> StreamingResponse:
-        async def file_generator(
-            file_path: str, offset: int, end: int, chunk_size: int
-        ) -> AsyncGenerator:
-            async with aiofiles.open(file_path, "rb") as f:
-                await f.seek(offset, os.SEEK_SET)
-                remaining_bytes = end - offset
-                while remaining_bytes > 0:
-                    chunk_size_ = min(chunk_size, remaining_bytes)
-                    chunk = await f.read(chunk_size_)
-                    if not chunk:
-                        break
-                    yield chunk
-                    remaining_bytes -= chunk_size_
-
-        stat_result = os.stat(fileObj.targetPath)
+    ) -> Response:
+        """
+        生成文件下载响应, 桌面端和移动端下载共用, 支持单/多区间, 后缀区间,
+        If-Range, HEAD请求及416响应
+
+        Args:
+            request: request对象
+            fileObj: 待下载的文件对象
+
+        Returns:
+            Response: 文件下载响应
+        """
+        # 长度和ETag取自实际发送的文件, 不使用元数据缓存, 避免缓存有效期内文件变化时
+        # 响应被截断或补齐
+        try:
+            file = await run_in_threadpool(open, fileObj.targetPath, "rb", 0)
+        except OSError:
+            return JSONResponse(json_response(RET.FILENOTFOUND))
+        try:
+            stat_result = os.fstat(file.fileno())
+        except OSError:
+            await run_in_threadpool(file.close)
+            return JSONResponse(json_response(RET.FILENOTFOUND))
         st_size = stat_result.st_size
+        etag = generate_etag(stat_result.st_mtime_ns, st_size)
+        last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        file_name = quote(fileObj.file_name)
+        headers = {
+            "content-disposition": f"attachment; filename={file_name}",
+            "accept-ranges": "bytes",
+            "connection": "keep-alive",
+            "last-modified": last_modified,
+            "etag": etag,
+        }
+
+        ranges = None
         range_str = request.headers.get("range", "")
-        range_match = re.match(r"bytes=(\d+)-(\d+)", range_str) or re.match(
-            r"bytes=(\d+)-", range_str
+        if range_str and if_range_matches(
+            request.headers.get("if-range", ""), etag, last_modified
+        ):
+            ranges = parse_ranges(range_str, st_size)
+            if ranges == []:
+                await run_in_threadpool(file.close)
+                headers["content-range"] = f"bytes */{st_size}"
+                return Response(status_code=416, headers=headers)
+
+        return FileRangeResponse(
+            fileObj.targetPath, st_size, ranges, headers=headers, file=file
         )
-        if range_match:
-            start = int(range_match.group(1))
-            end = int(range_match.group(2)) if range_match.lastindex == 2 else st_size
-        else:
-            start = 0
-            end = st_size
-        file_name = quote(fileObj.file_name)
-        content_length = end - start
-        content_type = "application/octet-stream"
-        return StreamingResponse(
-            file_generator(fileObj.targetPath, start, end, 1048576),
-            media_type=content_type,
-            headers={
-                "content-disposition": f"attachment; filename={file_name}",
-                "accept-ranges": "bytes",
-                "connection": "keep-alive",
-                "content-length": str(content_length),
-                "content-range": f"{start}-{end}/{st_size}",
-                "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
-            },
-            status_code=206 if start > 0 else 200,
+
+    @staticmethod
+    async def generate_archive_response(request: Request, dirObj: DirModel) -> Response:
+        """
+        生成文件夹打包下载响应, 边遍历边发送, 不在磁盘暂存; 归档格式由查询参数
+        `archive`指定(zip/tar), 默认为zip
+
+        Args:
+            request: request对象
+            dirObj: 待下载的文件夹对象
+
+        Returns:
+            Response: 文件夹打包下载响应
+        """
+        archive_format = request.query_params.get(ptype.ARCHIVE_FORMAT, "zip")
+        if archive_format not in ARCHIVE_FORMATS:
+            archive_format = "zip"
+        entries = await run_in_threadpool(collect_entries, dirObj)
+        file_name = quote(f"{dirObj.file_name}.{archive_format}")
+        headers = {
+            "content-disposition": f"attachment; filename={file_name}",
+            "connection": "keep-alive",
+        }
+        return ArchiveResponse(
+            entries,
+            archive_format,
+            request.headers.get("range", ""),
+            request.headers.get("if-range", ""),
+            headers,
+        )
+
+    @staticmethod
+    async def format_listing(
+        fileObj: Union[FileModel, DirModel],
+        variant: str,
+        option: Optional[ListingOption],
+    ) -> Dict[str, Any]:
+        """
+        生成文件/文件夹的格式化数据
+
+        Args:
+            fileObj: 文件/文件夹对象
+            variant: 格式化数据的类型, client或mobile
+            option: 文件列表的查询选项
+
+        Returns:
+            Dict[str, Any]: 格式化数据
+        """
+        if variant == "client":
+            return await fileObj.to_dict_client(option)
+        return await fileObj.to_dict_mobile(option)
+
+    async def generate_listing_response(
+        self,
+        fileObj: Union[FileModel, DirModel],
+        variant: str,
+        option: Optional[ListingOption],
+        envelope: Dict[str, Any],
+        accept_encoding: str = "",
+    ) -> Response:
+        """
+        生成文件列表响应, 序列化结果按文件夹缓存, 命中时直接返回缓存的JSON,
+        客户端支持时按大小自适应压缩
+
+        Args:
+            fileObj: 文件/文件夹对象
+            variant: 格式化数据的类型, client或mobile
+            option: 文件列表的查询选项
+            envelope: 响应状态数据
+            accept_encoding: Accept-Encoding请求头的值
+
+        Returns:
+            Response: 文件列表响应
+        """
+        cacheable = self._listing_cache.cacheable(fileObj, option)
+        body = self._listing_cache.get(fileObj, variant, option) if cacheable else None
+        if body is None:
+            if cacheable:
+                validators = self._listing_cache.sync_validators(fileObj, option)
+            body = encode_json(await self.format_listing(fileObj, variant, option))
+            if cacheable:
+                self._listing_cache.put(fileObj, variant, option, body, validators)
+
+        # 响应状态数据可能包含令牌, 压缩结果不缓存
+        body, headers = await compress_listing(
+            encode_json(envelope)[:-1] + b',"data":' + body + b"}", accept_encoding
         )
+        return Response(body, headers=headers, media_type="application/json")
+
+    @staticmethod
+    def generate_ndjson_response(
+        fileObj: Union[FileModel, DirModel],
+        variant: str,
+        option: ListingOption,
+        envelope: Dict[str, Any],
+    ) -> StreamingResponse:
+        """
+        生成NDJSON格式的文件列表流式响应, 首行为响应状态及文件夹自身(含子级总数),
+        之后每行一个子级, 客户端可边接收边渲染
+
+        Args:
+            fileObj: 文件/文件夹对象
+            variant: 格式化数据的类型, client或mobile
+            option: 文件列表的查询选项
+            envelope: 首行的响应状态数据
+
+        Returns:
+            StreamingResponse: NDJSON格式的文件列表流式响应
+        """
+
+        def dumps(content: Dict[str, Any]) -> bytes:
+            return encode_json(content) + b"\n"
+
+        async def generate() -> AsyncIterator[bytes]:
+            to_dict = HttpService.format_listing
+            data = await to_dict(fileObj, variant, option._replace(depth=0))
+            if not fileObj.isDir:
+                yield dumps({**envelope, "data": data})
+                return
+            total, page = fileObj.list_children(option)
+            data["total"] = total
+            yield dumps({**envelope, "data": data})
+            child_option = option.for_children()
+            for child_uuid, child in page:
+                child_data = await to_dict(child, variant, child_option)
+                if variant == "client":
+                    child_data = {child_uuid: child_data}
+                yield dumps(child_data)
+
+        return StreamingResponse(generate(), media_type="application/x-ndjson")
 
     @staticmethod
     def json_response(
@@ -3,7 +3,7 @@ import sys
 import copy
 import traceback
 from multiprocessing import Queue
-from typing import Union, Dict, Any, Tuple, List, Sequence
+from typing import Union, Dict, Any, Tuple, List, Sequence, Set
 
 from PyQt5.QtWidgets import (
     QMainWindow,
@@ -65,6 +65,9 @@ class MainWindow(QMainWindow):
         # Initialize service process manage and watch thread
         self._create_service_manager()
 
+        # Count the files of loaded shares in background
+        self._start_share_indexing()
+
         # setup attr
         self._setup_attr()
 
@@ -130,17 +133,17 @@ class MainWindow(QMainWindow):
         """
         sysLogger.debug("正在打开所有分享")
         open_count = 0
-        for row in range(self.ui.shareListTable.rowCount()):
-            status_item = self.ui.shareListTable.item(
-                row, self._ui_function._share_status_col
-            )
-            if status_item.text() == self._ui_function._isNot_sharing_str:
-                button_widget = self.ui.shareListTable.cellWidget(
-                    row, self._ui_function._share_options_col
-                )
-                open_button = button_widget.findChild(QPushButton, "open_close")
-                open_button.click()
-                open_count += 1
+        # 所有分享合并为一次批量任务下发
+        with self._service_process.batch():
+            for row in range(self.ui.shareListTable.rowCount()):
+                if not self._sharing_list[row].isSharing:
+                    button_widget = self.ui.shareListTable.cellWidget(
+                        row, self._ui_function._share_options_col
+                    )
+                    open_button = button_widget.findChild(QPushButton, "open_close")
+                    open_button.click()
+                    fileObj = self._sharing_list[row]
+                    open_count += int(fileObj.isSharing)
         sysLogger.debug("打开所有分享任务下发成功")
         self._ui_function.show_info_messageBox(f"操作成功, 本次成功打开分享个数: {open_count}")
 
@@ -153,17 +156,15 @@ class MainWindow(QMainWindow):
         """
         sysLogger.debug("正在关闭所有分享")
         close_count = 0
-        for row in range(self.ui.shareListTable.rowCount()):
-            status_item = self.ui.shareListTable.item(
-                row, self._ui_function._share_status_col
-            )
-            if status_item.text() == self._ui_function._is_sharing_str:
-                button_widget = self.ui.shareListTable.cellWidget(
-                    row, self._ui_function._share_options_col
-                )
-                close_button = button_widget.findChild(QPushButton, "open_close")
-                close_button.click()
-                close_count += 1
+        with self._service_process.batch():
+            for row in range(self.ui.shareListTable.rowCount()):
+                if self._sharing_list[row].isSharing:
+                    button_widget = self.ui.shareListTable.cellWidget(
+                        row, self._ui_function._share_options_col
+                    )
+                    close_button = button_widget.findChild(QPushButton, "open_close")
+                    close_button.click()
+                    close_count += 1
         sysLogger.debug("关闭所有分享任务下发成功")
         self._ui_function.show_info_messageBox(f"操作成功, 本次成功关闭分享个数: {close_count}")
 
@@ -242,8 +243,9 @@ class MainWindow(QMainWindow):
                 "该分享未关闭,请先关闭分享后再移除哦~", msg_color="red"
             )
             return
-        self._sharing_list.remove(fileObj.rowIndex)
-        self._UIClass.remove_share_row(self, fileObj.rowIndex)
+        rowIndex = fileObj.rowIndex
+        self._sharing_list.remove(rowIndex)
+        self._UIClass.remove_share_row(self, rowIndex)
         if not self._sharing_list or self._sharing_list.length == 0:
             self._service_process.close_all()
         del fileObj
@@ -281,7 +283,7 @@ class MainWindow(QMainWindow):
         )
         self.qrcode.show()
 
-    def open_share(self, fileObj: Union[FileModel, DirModel]) -> None:
+    def open_share(self, fileObj: Union[FileModel, DirModel]) -> bool:
         """
         打开分享时的回调
 
@@ -289,16 +291,27 @@ class MainWindow(QMainWindow):
             fileObj: 需打开分享的文件/文件夹对象
 
         Returns:
-            None
+            bool: 是否成功下发打开分享任务
         """
         sysLogger.debug("正在打开分享")
         if fileObj.isSharing:
             sysLogger.error(
                 f"操作异常,重复打开分享,分享路径: {fileObj.targetPath}, 分享类型:{fileObj.shareType.value}"
             )
-            return
+            return False
+        # 分享的路径可能在加载历史分享记录后被删除, 打开分享时再次校验是否存在
+        if not os.path.exists(fileObj.targetPath):
+            sysLogger.warning(f"分享的路径已不存在, 打开分享失败, 分享路径: {fileObj.targetPath}")
+            self._ui_function.show_info_messageBox(
+                "分享的路径已不存在！\n请移除该分享后重新新建", msg_color="red"
+            )
+            return False
         self._service_process.add_share(fileObj)
         sysLogger.debug("打开分享任务下发成功")
+        # 分享首次打开时才统计文件个数
+        if fileObj.isDir and fileObj.uuid not in self._indexed_uuids:
+            self._index_shares([fileObj])
+        return True
 
     def close_share(self, fileObj: Union[FileModel, DirModel]) -> None:
         """
@@ -334,6 +347,8 @@ class MainWindow(QMainWindow):
             None
         """
         sysLogger.debug("正在下发打开/关闭临时免密任务")
+        # 服务进程收到任务后同样递增令牌代数, 两侧保持一致
+        fileObj.token_generation += 1
         self._service_process.change_free_secret(fileObj.uuid, fileObj.free_secret)
         sysLogger.debug("打开/关闭临时免密任务下发成功")
 
@@ -352,6 +367,7 @@ class MainWindow(QMainWindow):
         if result != 0:
             sysLogger.debug("确认退出, 正在关闭服务和写入历史分享记录")
             self._service_process.close_all()
+            self._index_share_thread.stop()
             self._sharing_list.dump()
             sysLogger.info("写入历史分享记录成功")
             sysLogger.debug("关闭窗口")
@@ -414,25 +430,125 @@ class MainWindow(QMainWindow):
         sysLogger.debug("初始化被浏览监听任务并开启")
         self._watch_browse_thread = WatchResultThread(self._browse_record_q)
         self._watch_browse_thread.signal.connect(self._update_browse_number)
+        self._watch_browse_thread.ack_signal.connect(self._share_task_done)
         self._watch_browse_thread.start()
         sysLogger.info("被浏览监听任务开启成功")
 
         self._service_process = ServiceProcessManager(self._browse_record_q)
         sysLogger.info("分享服务管理员创建成功")
 
-    def _update_browse_number(self, file_uuid: str) -> None:
-        sysLogger.debug(f"分享被浏览, 对其浏览次数+1, 分享的uuid: {file_uuid}")
-        for fileObj in self._sharing_list:
-            if (
-                fileObj.uuid == file_uuid
-                and fileObj.rowIndex < self.ui.shareListTable.rowCount()
-            ):
-                fileObj.browse_number += 1
-                self.ui.shareListTable.item(fileObj.rowIndex, 3).setText(
-                    str(fileObj.browse_number)
+    def _start_share_indexing(self) -> None:
+        sysLogger.debug("初始化统计分享文件个数任务并开启")
+        # 新建的分享统计完成后需提示文件个数的uuid
+        self._count_warning_uuids: Set[str] = set()
+        # 已统计或正在统计文件个数的分享uuid
+        self._indexed_uuids: Set[str] = set()
+        self._index_share_thread = IndexShareThread()
+        self._index_share_thread.signal.connect(self._share_indexed)
+        self._index_share_thread.progress_signal.connect(self._share_index_progress)
+        self._index_share_thread.start()
+        # 历史分享加载后均为关闭状态, 不在启动时统计, 分享打开时再统计
+        sysLogger.info("统计分享文件个数任务开启成功")
+
+    def _index_shares(self, fileObjs: Sequence[Union[FileModel, DirModel]]) -> None:
+        for fileObj in fileObjs:
+            self._indexed_uuids.add(fileObj.uuid)
+            self._ui_function.update_share_status_tooltip(
+                fileObj, self._ui_function._indexing_str
+            )
+        self._index_share_thread.append(fileObjs)
+
+    def _share_index_progress(self, file_uuid: str, file_count: int) -> None:
+        fileObj = self._sharing_list.get_by_uuid(file_uuid)
+        if fileObj is None:
+            return
+        self._ui_function.update_share_status_tooltip(
+            fileObj, f"{self._ui_function._indexing_str} {file_count}"
+        )
+
+    def _share_indexed(self, file_uuid: str, file_count: int, exists: bool) -> None:
+        fileObj = self._sharing_list.get_by_uuid(file_uuid)
+        if fileObj is None:
+            self._count_warning_uuids.discard(file_uuid)
+            self._indexed_uuids.discard(file_uuid)
+            return
+        if not exists:
+            # 路径恢复后再次打开分享时重新统计
+            self._indexed_uuids.discard(file_uuid)
+            self._ui_function.update_share_status_tooltip(
+                fileObj, self._ui_function._path_missing_str
+            )
+            return
+        self._ui_function.update_share_status_tooltip(fileObj)
+        if file_uuid not in self._count_warning_uuids:
+            return
+        self._count_warning_uuids.discard(file_uuid)
+        if file_count > settings.SHARE_FILE_COUNT_WARNING:
+            sysLogger.warning(
+                f"分享的文件夹中文件个数超过{settings.SHARE_FILE_COUNT_WARNING}, 建议打包后分享压缩文件, 分享路径: {fileObj.targetPath}"
+            )
+            self._ui_function.show_info_messageBox(
+                f"该文件夹内文件数量大于{settings.SHARE_FILE_COUNT_WARNING}, 直接分享它不是一个好的选择, 建议按需对文件夹进行打包后再分享",
+                "文件数量过大",
+                msg_color="red",
+            )
+        elif file_count > 100:
+            sysLogger.info(f"分享的文件夹中文件个数超过100, 分享路径: {fileObj.targetPath}")
+            self._ui_function.show_info_messageBox(
+                "文件夹内文件数量大于100, 会影响下载速度, 若无浏览文件需求, 建议打包成压缩包后再分享",
+                "文件数量大",
+            )
+
+    def _share_task_done(self, service_name: str, ack_id: int, ready: bool) -> None:
+        file_uuids, ready = self._service_process.acknowledge(
+            service_name, ack_id, ready
+        )
+        not_ready_paths = []
+        for file_uuid in file_uuids:
+            fileObj = self._sharing_list.get_by_uuid(file_uuid)
+            # 回复前分享可能已被关闭或移除
+            if fileObj is None or not fileObj.isSharing:
+                continue
+            if ready:
+                sysLogger.info(f"分享已可访问, 分享的uuid: {file_uuid}")
+                self._ui_function.update_share_status_text(
+                    fileObj, self._ui_function._is_sharing_str
+                )
+            else:
+                sysLogger.warning(f"分享服务未能在超时时间内开始服务, 分享路径: {fileObj.targetPath}")
+                self._ui_function.update_share_status_text(
+                    fileObj, self._ui_function._not_ready_str
+                )
+                not_ready_paths.append(fileObj.targetPath)
+        if not_ready_paths:
+            self._ui_function.show_info_messageBox(
+                "分享服务未能在超时时间内启动, 以下分享暂时无法访问:\n"
+                + "\n".join(not_ready_paths)
+                + "\n请稍后重新打开分享后再试",
+                "分享服务未就绪",
+                msg_color="red",
+            )
+
+    def _update_browse_number(self, browse_counts: Dict[str, int]) -> None:
+        sysLogger.debug(f"分享被浏览, 更新浏览次数, 浏览次数增量: {browse_counts}")
+        table = self.ui.shareListTable
+        table.setUpdatesEnabled(False)
+        try:
+            for file_uuid, count in browse_counts.items():
+                fileObj = self._sharing_list.get_by_uuid(file_uuid)
+                if fileObj is None or fileObj.rowIndex >= table.rowCount():
+                    continue
+                fileObj.browse_number += count
+                # 浏览次数可丢失, 不必立即落盘
+                self._sharing_list.record_update(
+                    fileObj, durable=False, browse_number=fileObj.browse_number
                 )
-                sysLogger.debug(f"浏览次数+1成功, 其分享记录行号为: {fileObj.rowIndex}")
-                break
+                table.item(
+                    fileObj.rowIndex, self._ui_function._browse_number_col
+                ).setText(str(fileObj.browse_number))
+        finally:
+            table.setUpdatesEnabled(True)
+        sysLogger.debug("更新浏览次数成功")
 
     def _setup_attr(self) -> None:
         sysLogger.debug("初始化必要属性")
@@ -600,40 +716,6 @@ class MainWindow(QMainWindow):
                     f"该路径已被分享过, 他在分享记录的第 [{shared_row_number + 1}] 行", msg_color="red"
                 )
                 return
-            try:
-                file_count = self._calc_file_count(target_path)
-            except FileNotFoundError as e:
-                sysLogger.warning(f"分享文件中含无法打开路径, 尝试打开发生的错误信息: {e}")
-                self._ui_function.show_info_messageBox(
-                    f"文件路径解析错误, 原始错误信息: {e}", "分享异常", msg_color="red"
-                )
-                return
-            except Exception as e:
-                sysLogger.warning(f"分享异常, 尝试分享发生的错误信息: {e}")
-                self._ui_function.show_info_messageBox(
-                    f"分享出现错误, 原始错误信息: {e}", "分享异常", msg_color="red"
-                )
-                return
-            if file_count > 10000:
-                sysLogger.warning("分享被取消, 因为分享的文件夹中文件个数超过10000, 建议打包后分享压缩文件")
-                self._ui_function.show_info_messageBox(
-                    f"分享已被取消\n该文件夹内文件数量大于10000, 直接分享它不是一个好的选择, 请按需对文件夹进行打包后再分享",
-                    "分享被取消",
-                    msg_color="red",
-                )
-                return
-            elif file_count > 100:
-                if (
-                    self._ui_function.show_question_messageBox(
-                        "文件夹内文件数量大于100, 会影响下载速度, 若无浏览文件需求, 建议打包成压缩包后再分享",
-                        "文件数量大",
-                        "好的, 打包后再分享",
-                        "无视直接分享",
-                    )
-                    == 0
-                ):
-                    sysLogger.info("成功取消文件个数大于100的文件夹的分享")
-                    return
             uuid = f"{share_type.value[0]}{generate_uuid()}"
             fileModel = DirModel if os.path.isdir(target_path) else FileModel
             if share_type is shareType.ftp:
@@ -660,6 +742,10 @@ class MainWindow(QMainWindow):
             sysLogger.debug("正在添加显示一条分享记录数据")
             self._UIClass.add_share_table_item(self, fileObj)
             self._service_process.add_share(fileObj)
+            if fileObj.isDir:
+                # 文件个数在后台统计, 超过阈值时再提示
+                self._count_warning_uuids.add(fileObj.uuid)
+                self._index_shares([fileObj])
             sysLogger.info(f"创建分享成功, 分享路径: {target_path}, 分享类型: {share_type}")
 
         self.ui.createShareButton.setEnabled(False)
@@ -860,25 +946,6 @@ class MainWindow(QMainWindow):
 
         return status
 
-    def _calc_file_count(self, base_path: str, initial_count: int = 0) -> int:
-        sysLogger.debug("正在计算文件夹下文件个数")
-        if not os.path.isdir(base_path):
-            return 1
-        else:
-            for file_name in os.listdir(base_path):
-                file_path = os.path.join(base_path, file_name)
-                try:
-                    initial_count += self._calc_file_count(file_path)
-                except:
-                    raise
-                else:
-                    if initial_count > 10000:
-                        return initial_count
-
-                QApplication.processEvents()
-
-        return initial_count
-
     def _update_download_status(
         self, status_tuple: Tuple[Dict[str, Any], DownloadStatus, str]
     ) -> None:
@@ -13,7 +13,7 @@ export async function DownloadChunk(uuid, secret_key, pwd, start, end, hit_log=f
       'ciphertext': pwd
     },
     {
-      headers: { Range: `bytes=${start}-${end}` },
+      headers: { Range: `bytes=${start}-${end - 1}` },
       responseType: 'blob',
     }
   );
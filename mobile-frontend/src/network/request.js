@@ -5,13 +5,31 @@ const request = axios.create({
   timeout: 5000
 })
 
+// 会话令牌, 按分享的uuid保存, 凭据校验通过后由后端签发
+const TOKEN_HEADER = 'X-Share-Token'
+const share_tokens = {}
+
+function share_uuid(url) {
+  const uuid = (url || '').split('?')[0].split('/').pop();
+  return uuid.split('>')[0];
+}
+
 request.interceptors.request.use(config => {
+  const token = share_tokens[share_uuid(config.url)];
+  if (token) {
+    config.headers[TOKEN_HEADER] = token;
+  }
   return config
 }, err => {
   return err
 })
 
 request.interceptors.response.use(result => {
+  const token = result.headers[TOKEN_HEADER.toLowerCase()] ||
+    (result.data && result.data.token);
+  if (token) {
+    share_tokens[share_uuid(result.config.url)] = token;
+  }
   return result.data
 }, err => {
   return err
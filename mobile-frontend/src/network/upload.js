@@ -1,41 +1,59 @@
 import request from "./request";
 
-export async function UploadChunk(
-  uuid, secret_key, pwd, chunk, file_name,
-  chunk_id, curr_path, hit_log=false
+// 上传流程: 创建上传任务(校验凭据并签发令牌) -> 按偏移逐个发送分片 -> 提交;
+// 分片由服务端直接写入预分配的临时文件, 提交时重命名, 无需合并;
+// 发送分片及查询进度时令牌经请求头发送, 凭据不出现在URL中
+export async function UploadCreate(
+  uuid, secret_key, pwd, file_name, curr_path, file_size, chunk_size
 ) {
-  const url = !hit_log ? '/upload/' + uuid : '/upload/' + uuid + "?hit_log=true"
   const formData = new FormData();
   formData.append("secret_key", secret_key);
   formData.append("ciphertext", pwd);
-  formData.append("file", chunk);
   formData.append("file_name", file_name);
-  formData.append("chunk_id", chunk_id);
   formData.append("curr_path", curr_path);
+  formData.append("file_size", file_size);
+  formData.append("chunk_size", chunk_size);
   const response = await request.post(
-    url,
+    '/upload/create/' + uuid,
     formData,
     {
       headers: { 'Content-Type': 'multipart/form-data' }
     }
   );
-  if ( response.errno != 200 && response.errno != 4006 ) {
+  if ( response.errno != 200 ) {
     return {succed: false, data: response.errmsg}
   }
+  return {succed: true, data: response.data}
+}
+
+export async function UploadStream(
+  uuid, chunk, file_name, chunk_id, curr_path, chunk_size, file_size
+) {
+  const response = await request.post(
+    '/upload/stream/' + uuid,
+    chunk,
+    {
+      params: { file_name, curr_path, chunk_id, chunk_size, file_size },
+      headers: { 'Content-Type': 'application/octet-stream' }
+    }
+  );
+  if ( response.errno != 200 && response.errno != 4006 ) {
+    // 4003: 令牌已过期, 需重新创建上传任务以校验凭据
+    return {succed: false, expired: response.errno == 4003, data: response.errmsg}
+  }
   return {succed: true, data: response.errmsg}
 }
 
-export async function UploadMerge(
-  uuid, secret_key, pwd, file_name, chunk_count, curr_path
+export async function UploadCommit(
+  uuid, secret_key, pwd, file_name, curr_path
 ) {
   const formData = new FormData();
   formData.append("secret_key", secret_key);
   formData.append("ciphertext", pwd);
   formData.append("file_name", file_name);
-  formData.append("chunk_count", chunk_count);
   formData.append("curr_path", curr_path);
   const response = await request.post(
-    '/upload/merge/' + uuid,
+    '/upload/commit/' + uuid,
     formData,
     {
       headers: { 'Content-Type': 'multipart/form-data' }
@@ -4,8 +4,8 @@ import Vuex from 'vuex'
 import serviceStorage from "./serviceStorage"
 import { GetDownloadSpeed, PostUploadSpeed } from '@/network/browse'
 import { DownloadChunk } from "@/network/download"
-import { UploadChunk, UploadMerge, UploadRemove } from "@/network/upload"
-import { copyHistoryRMChunks, mergeChunks, copyHistoryRMFile, calcChunkSize } from "@/utils/public_func"
+import { UploadCreate, UploadStream, UploadCommit, UploadRemove } from "@/network/upload"
+import { copyHistoryRMChunks, mergeChunks, copyHistoryRMFile, calcChunkSize, receivedChunks } from "@/utils/public_func"
 
 Vue.use(Vuex)
 
@@ -282,66 +282,65 @@ export default new Vuex.Store({
       if ( upload_history == null || upload_history[file_id] == undefined ) {
         return;
       }
-      var upload_item = upload_history[file_id];
-      if ( upload_item.file == null ) {
-        context.commit("UPDATE_UPLOAD_ITEM", {file_id: file_id, data: {failed: true, err_msg: "选择的文件数据丢失"}});
-        return;
-      }
       context.commit("UPDATE_UPLOAD_ITEM", {file_id: file_id, data: {succed_chunks: [], failed: false}});
-      for (let i = 0; i < upload_item.chunk_count; i++) {
-        if ( context.state.upload_history[file_id].is_pause ) {
-          return;
-        }
-        const start = i * upload_item.chunk_size;
-        const end = Math.min(start + upload_item.chunk_size, upload_item.file_size);
-        const chunk = upload_item.file.slice(start, end);
-        const res = await UploadChunk(
-          upload_item.uuid, upload_item.secret_key, upload_item.pwd, chunk,
-          upload_item.file_name, i, upload_item.curr_path, i == 0
-        );
-        if ( !res.succed ) {
-          context.commit("UPDATE_UPLOAD_ITEM", {file_id: file_id, data: {failed: true, err_msg: res.data}});
-          return;
-        }
-        context.commit("UPDATE_UPLOAD_ITEM", {
-          file_id: file_id,
-          data: {
-            succed_chunks: [...context.state.upload_history[file_id].succed_chunks, i]
-          }
-        });
-      };
-      const res = await UploadMerge(
-        upload_item.uuid, upload_item.secret_key, upload_item.pwd,
-        upload_item.file_name, upload_item.chunk_count, upload_item.curr_path
-      )
-      if ( !res.succed ){
-        context.commit("UPDATE_UPLOAD_ITEM", {file_id: file_id, data: {failed: true, err_msg: res.data}});
-        return;
-      }
-      context.commit("UPDATE_UPLOAD_ITEM", {file_id: file_id, data: {merged: true, file: null}});
+      await context.dispatch("UPLOAD_FILE", file_id);
     },
     async REUPLOAD_FILE(context, file_id) {
       var upload_history = context.state.upload_history;
       if ( upload_history == null || upload_history[file_id] == undefined ) {
         return;
       }
-      var upload_item = upload_history[file_id];
+      context.commit("UPDATE_UPLOAD_ITEM", {file_id: file_id, data: {failed: false, err_msg: "", is_pause: false}});
+      await context.dispatch("UPLOAD_FILE", file_id);
+    },
+    async UPLOAD_FILE(context, file_id) {
+      var upload_item = context.state.upload_history[file_id];
       if ( upload_item.file == null ) {
         context.commit("UPDATE_UPLOAD_ITEM", {file_id: file_id, data: {failed: true, err_msg: "选择的文件数据丢失"}});
         return;
       }
-      context.commit("UPDATE_UPLOAD_ITEM", {file_id: file_id, data: {failed: false, err_msg: "", is_pause: false}});
-      for (let i = upload_item.succed_chunks.length; i < upload_item.chunk_count; i++) {
+      const create = async () => {
+        const res = await UploadCreate(
+          upload_item.uuid, upload_item.secret_key, upload_item.pwd, upload_item.file_name,
+          upload_item.curr_path, upload_item.file_size, upload_item.chunk_size
+        );
+        if ( !res.succed ) {
+          context.commit("UPDATE_UPLOAD_ITEM", {file_id: file_id, data: {failed: true, err_msg: res.data}});
+        }
+        return res;
+      };
+      // 创建上传任务, 已存在时返回服务端已接收的分片, 只发送缺少的分片
+      var res = await create();
+      if ( !res.succed ) {
+        return;
+      }
+      const chunk_count = res.data.chunkCount;
+      context.commit("UPDATE_UPLOAD_ITEM", {
+        file_id: file_id,
+        data: {chunk_count: chunk_count, succed_chunks: receivedChunks(res.data.bitmap, chunk_count)}
+      });
+      for (let i = 0; i < chunk_count; i++) {
         if ( context.state.upload_history[file_id].is_pause ) {
           return;
         }
+        if ( context.state.upload_history[file_id].succed_chunks.indexOf(i) != -1 ) {
+          continue;
+        }
         const start = i * upload_item.chunk_size;
         const end = Math.min(start + upload_item.chunk_size, upload_item.file_size);
         const chunk = upload_item.file.slice(start, end);
-        const res = await UploadChunk(
-          upload_item.uuid, upload_item.secret_key, upload_item.pwd, chunk,
-          upload_item.file_name, i, upload_item.curr_path, i == 0
+        const upload_chunk = () => UploadStream(
+          upload_item.uuid, chunk, upload_item.file_name, i,
+          upload_item.curr_path, upload_item.chunk_size, upload_item.file_size
         );
+        res = await upload_chunk();
+        if ( !res.succed && res.expired ) {
+          // 令牌过期后重新校验凭据再发送该分片
+          if ( !(await create()).succed ) {
+            return;
+          }
+          res = await upload_chunk();
+        }
         if ( !res.succed ) {
           context.commit("UPDATE_UPLOAD_ITEM", {file_id: file_id, data: {failed: true, err_msg: res.data}});
           return;
@@ -353,9 +352,9 @@ export default new Vuex.Store({
           }
         });
       };
-      const res = await UploadMerge(
+      res = await UploadCommit(
         upload_item.uuid, upload_item.secret_key, upload_item.pwd,
-        upload_item.file_name, upload_item.chunk_count, upload_item.curr_path
+        upload_item.file_name, upload_item.curr_path
       )
       if ( !res.succed ){
         context.commit("UPDATE_UPLOAD_ITEM", {file_id: file_id, data: {failed: true, err_msg: res.data}});
@@ -369,7 +368,8 @@ export default new Vuex.Store({
         return;
       }
       var upload_item = upload_history[file_id];
-      if ( !upload_item.merged && upload_item.succed_chunks.length != 0 ) {
+      // 创建上传任务时服务端即预分配了临时文件, 未完成的上传均需删除
+      if ( !upload_item.merged ) {
         await UploadRemove(
           upload_item.uuid, upload_item.secret_key, upload_item.pwd,
           upload_item.file_name, upload_item.curr_path
@@ -83,3 +83,15 @@ export function calcChunkSize(duration) {
     return 10 * 1024 * 1024;
   }
 }
+
+export function receivedChunks(bitmap, chunk_count) {
+  // 服务端返回的已接收分片位图(base64), 第i个分片对应第i>>3个字节的第i&7位
+  const bytes = atob(bitmap);
+  let chunks = [];
+  for (let i = 0; i < chunk_count; i++) {
+    if ( (bytes.charCodeAt(i >> 3) >> (i & 7)) & 1 ) {
+      chunks.push(i);
+    }
+  }
+  return chunks;
+}
@@ -1,15 +1,114 @@
-__all__ = ["FileModel", "DirModel"]
+__all__ = ["FileModel", "DirModel", "ListingOption", "ShareDescriptor"]
 
 import os
+import sys
 import random
-from typing import Any, Union, Dict, Optional
+import weakref
+from threading import RLock
+from collections import OrderedDict
+from typing import Any, Callable, Union, Dict, List, Optional, Tuple, NamedTuple
 
 from model import public_types as ptype
 from settings import settings
 from utils import public_func
+from utils.stat_cache import stat_cache
+
+
+class ListingOption(NamedTuple):
+    """
+    文件列表的查询选项
+
+    depth: 展开的层级数, 0表示只返回自身, None表示展开全部层级
+    offset: 当前层级子级的起始位置, 仅作用于请求的文件夹
+    limit: 当前层级子级的最大个数, 仅作用于请求的文件夹, None表示不限制
+    sort: 排序字段, name/type/size/mtime, 为空则保持读取顺序
+    reverse: 是否倒序
+    keyword: 文件名过滤关键字, 不区分大小写, 仅作用于请求的文件夹
+    """
+
+    depth: Optional[int] = None
+    offset: int = 0
+    limit: Optional[int] = None
+    sort: str = ""
+    reverse: bool = False
+    keyword: str = ""
+
+    def for_children(self) -> "ListingOption":
+        """
+        下一层级使用的查询选项, 层级数减一且不再分页及过滤
+
+        Returns:
+            ListingOption: 下一层级使用的查询选项
+        """
+        depth = None if self.depth is None else self.depth - 1
+        return self._replace(depth=depth, offset=0, limit=None, keyword="")
+
+
+class ShareState:
+    __slots__ = (
+        "share_type",
+        "ftp_pwd",
+        "ftp_port",
+        "ftp_base_path",
+        "secret_key",
+        "credentials",
+        "free_secret",
+        "token_generation",
+        "is_sharing",
+        "registry",
+        "row_seq",
+        "browse_number",
+    )
+
+    def __init__(
+        self,
+        share_type: ptype.ShareType,
+        ftp_pwd: Optional[str] = None,
+        ftp_port: Optional[int] = None,
+        ftp_base_path: Optional[str] = None,
+        secret_key: Optional[str] = None,
+        credentials: Optional[str] = None,
+    ):
+        """
+        分享级别的属性和状态, 只在分享的文件/文件夹对象上保存一份, 其下所有文件/文件夹对象共用
+
+        Args:
+            share_type: 分享的类型
+            ftp_pwd: FTP服务的密码
+            ftp_port: FTP服务的端口
+            ftp_base_path: FTP服务的根路径
+            secret_key: 文件分享的盐值
+            credentials: 文件分享的凭据
+        """
+        self.share_type = share_type
+        self.ftp_pwd = ftp_pwd
+        self.ftp_port = ftp_port
+        self.ftp_base_path = ftp_base_path
+        self.secret_key = secret_key
+        self.credentials = credentials
+        self.free_secret = False
+        # 会话令牌代数, 由管理进程递增并随分享描述下发, 使各服务进程吊销的令牌保持一致
+        self.token_generation = 0
+        self.is_sharing = False
+        # 分享所在的分享列表及其行序号, 行号由分享列表根据行序号得到
+        self.registry = None
+        self.row_seq: Optional[int] = None
+        self.browse_number = 0
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = {name: getattr(self, name) for name in self.__slots__}
+        state["registry"], state["row_seq"] = None, None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        for name, value in state.items():
+            setattr(self, name, value)
 
 
 class FileModel:
+    # 节点只保存自身的uuid, 名称, 父级及分享级别属性的引用, 以降低大量文件时的内存占用
+    __slots__ = ("_id", "_name", "_parent", "_share_state", "__weakref__")
+
     def __init__(
         self,
         path: str,
@@ -34,34 +133,62 @@ class FileModel:
             ftp_base_path: FTP服务的根路径, 若不是FTP共享则为None, 默认为None
             secret_key: 文件分享的盐值, 用于密码校验, 默认无校验
             credentials: 文件分享的凭据, 用于密码校验, 默认无校验
-            **kwargs: 其他关键字参数
-        """
-        self._uuid = f"{parent_uuid}>{uuid}" if parent_uuid else uuid
-        self._target_path = path.rstrip(os.sep) if path.endswith(os.sep) else path
-        self._browse_number = 0
-        self._is_sharing = False
-        self._row_index = None
-        self._ftp_pwd = pwd
-        self._ftp_port = port
-        self._secret_key = secret_key
-        self._credentials = credentials
-        self._free_secret = False
-
-        if self._uuid[0] == "h":
-            self._share_type = ptype.ShareType.http
-        else:
-            self._share_type = ptype.ShareType.ftp
+            **kwargs: 其他关键字参数, browse_number为历史分享记录中的浏览次数
+        """
+        self._id = f"{parent_uuid}>{uuid}" if parent_uuid else uuid
+        self._name = path.rstrip(os.sep) if path.endswith(os.sep) else path
+        self._parent: Optional[DirModel] = None
+        share_type = ptype.ShareType.http if uuid[0] == "h" else ptype.ShareType.ftp
+        self._share_state = ShareState(
+            share_type, pwd, port, ftp_base_path, secret_key, credentials
+        )
+        self._share_state.browse_number = kwargs.get("browse_number") or 0
 
-        if self._share_type is ptype.ShareType.ftp:
-            self._ftp_base_path = (
-                ftp_base_path if ftp_base_path else os.path.dirname(self._target_path)
+        if share_type is ptype.ShareType.ftp:
+            self._share_state.ftp_base_path = (
+                ftp_base_path if ftp_base_path else os.path.dirname(self._name)
             )
-            if self._ftp_port is None:
-                self._ftp_port = self._generate_ftp_port()
-            if self._ftp_pwd is None:
-                self._ftp_pwd = public_func.generate_ftp_passwd()
+            if port is None:
+                self._share_state.ftp_port = self._generate_ftp_port()
+            if pwd is None:
+                self._share_state.ftp_pwd = public_func.generate_ftp_passwd()
         else:
-            self._ftp_base_path = None
+            self._share_state.ftp_base_path = None
+
+    @classmethod
+    def _new_child(
+        cls, parent: "DirModel", name: str, child_uuid: str
+    ) -> Union["FileModel", "DirModel"]:
+        """
+        创建下级文件/文件夹对象, 只保存名称和父级, 路径, 完整uuid及分享级别的属性均由父级得到
+
+        Args:
+            parent: 父级文件夹对象
+            name: 文件/文件夹名称
+            child_uuid: 文件/文件夹uuid(不含上级部分)
+
+        Returns:
+            Union["FileModel", "DirModel"]: 下级文件/文件夹对象
+        """
+        child = cls.__new__(cls)
+        child._id = child_uuid
+        # 驻留名称, 同名文件及重叠分享的相同目录共用同一字符串
+        child._name = sys.intern(name)
+        child._parent = parent
+        child._share_state = parent._share_state
+        return child
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {
+            name: getattr(self, name)
+            for cls in type(self).__mro__
+            for name in getattr(cls, "__slots__", ())
+            if name != "__weakref__"
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        for name, value in state.items():
+            setattr(self, name, value)
 
     def _generate_ftp_port(self) -> int:
         """
@@ -84,7 +211,9 @@ class FileModel:
         Returns:
             str: 文件对象的uuid
         """
-        return self._uuid
+        if self._parent is None:
+            return self._id
+        return f"{self._parent.uuid}>{self._id}"
 
     @property
     def isSharing(self) -> bool:
@@ -94,7 +223,7 @@ class FileModel:
         Returns:
             bool: 文件对象是否在分享中
         """
-        return self._is_sharing
+        return self._share_state.is_sharing
 
     @isSharing.setter
     def isSharing(self, newValue: bool) -> None:
@@ -107,7 +236,7 @@ class FileModel:
         Returns:
             None
         """
-        self._is_sharing = newValue
+        self._share_state.is_sharing = newValue
 
     @property
     def rowIndex(self) -> Union[None, int]:
@@ -117,20 +246,24 @@ class FileModel:
         Returns:
             Union[None, int]: 在分享列表控件的行号
         """
-        return self._row_index
+        registry = self._share_state.registry
+        if registry is None:
+            return None
+        return registry.row_of(self._share_state.row_seq)
 
-    @rowIndex.setter
-    def rowIndex(self, newValue: int) -> None:
+    def bind_row(self, registry: Any, row_seq: Optional[int]) -> None:
         """
-        修改文件对象在分享列表控件的行号
+        绑定文件对象所在的分享列表及行序号, 移除时均传入None
 
         Args:
-            newValue: 将要修改的行号
+            registry: 分享列表(FuseSharingModel)
+            row_seq: 行序号
 
         Returns:
             None
         """
-        self._row_index = newValue
+        self._share_state.registry = registry
+        self._share_state.row_seq = row_seq
 
     @property
     def isDir(self) -> bool:
@@ -150,7 +283,7 @@ class FileModel:
         Returns:
             bool: 文件对象的路径是否存在
         """
-        return os.path.exists(self._target_path)
+        return stat_cache.stat(self.targetPath).exists
 
     @property
     def browse_number(self) -> int:
@@ -160,7 +293,7 @@ class FileModel:
         Returns:
             int: 文件对象被浏览次数
         """
-        return self._browse_number
+        return self._share_state.browse_number
 
     @browse_number.setter
     def browse_number(self, newValue: int) -> None:
@@ -173,7 +306,7 @@ class FileModel:
         Returns:
             None
         """
-        self._browse_number = newValue
+        self._share_state.browse_number = newValue
 
     @property
     def shareType(self) -> ptype.ShareType:
@@ -183,7 +316,7 @@ class FileModel:
         Returns:
             ptype.ShareType: 文件对象分享的类型
         """
-        return self._share_type
+        return self._share_state.share_type
 
     @property
     def targetPath(self) -> str:
@@ -193,7 +326,9 @@ class FileModel:
         Returns:
             str: 文件对象的路径
         """
-        return self._target_path
+        if self._parent is None:
+            return self._name
+        return os.path.join(self._parent.targetPath, self._name)
 
     @property
     def ftp_pwd(self) -> Union[None, str]:
@@ -203,7 +338,7 @@ class FileModel:
         Returns:
             Union[None, str]: FTP服务的密码
         """
-        return self._ftp_pwd
+        return self._share_state.ftp_pwd
 
     @property
     def ftp_port(self) -> Union[None, int]:
@@ -213,7 +348,7 @@ class FileModel:
         Returns:
             Union[None, int]: FTP服务的端口
         """
-        return self._ftp_port
+        return self._share_state.ftp_port
 
     @property
     def ftp_basePath(self) -> Union[None, str]:
@@ -223,7 +358,7 @@ class FileModel:
         Returns:
             Union[None, str]: FTP服务的根路径
         """
-        return self._ftp_base_path
+        return self._share_state.ftp_base_path
 
     @property
     def ftp_cwd(self) -> str:
@@ -233,7 +368,9 @@ class FileModel:
         Returns:
             str: 文件对象对于FTP服务根目录的相对路径
         """
-        result = os.path.dirname(self._target_path.replace(self._ftp_base_path, "", 1))
+        result = os.path.dirname(
+            self.targetPath.replace(self._share_state.ftp_base_path, "", 1)
+        )
         if settings.IS_WINDOWS:
             result = result.replace("\\", "/")
         return result
@@ -246,7 +383,7 @@ class FileModel:
         Returns:
             str: 文件对象浏览的url
         """
-        return f"http://{settings.LOCAL_HOST}:{settings.WSGI_PORT}{ptype.FILE_LIST_URI}/{self._uuid}"
+        return f"http://{settings.LOCAL_HOST}:{settings.WSGI_PORT}{ptype.FILE_LIST_URI}/{self.uuid}"
 
     @property
     def mobile_browse_url(self) -> str:
@@ -256,7 +393,7 @@ class FileModel:
         Returns:
             str: 手机浏览时文件对象的浏览url
         """
-        return f"http://{settings.LOCAL_HOST}:{settings.WSGI_PORT}{ptype.MOBILE_PREFIX}{ptype.QRCODE_URL}/{self._uuid}"
+        return f"http://{settings.LOCAL_HOST}:{settings.WSGI_PORT}{ptype.MOBILE_PREFIX}{ptype.QRCODE_URL}/{self.uuid}"
 
     @property
     def download_url(self) -> str:
@@ -266,7 +403,7 @@ class FileModel:
         Returns:
             str: 文件对象下载的url
         """
-        return f"http://{settings.LOCAL_HOST}:{settings.WSGI_PORT}{ptype.DOWNLOAD_URI}/{self._uuid}"
+        return f"http://{settings.LOCAL_HOST}:{settings.WSGI_PORT}{ptype.DOWNLOAD_URI}/{self.uuid}"
 
     @property
     def browse_download_url(self) -> str:
@@ -276,7 +413,7 @@ class FileModel:
         Returns:
             str: 手机浏览时文件对象的下载url
         """
-        return f"http://{settings.LOCAL_HOST}:{settings.WSGI_PORT}{ptype.MOBILE_PREFIX}{ptype.DOWNLOAD_URI}/{self._uuid}"
+        return f"http://{settings.LOCAL_HOST}:{settings.WSGI_PORT}{ptype.MOBILE_PREFIX}{ptype.DOWNLOAD_URI}/{self.uuid}"
 
     @property
     def file_name(self) -> str:
@@ -286,7 +423,9 @@ class FileModel:
         Returns:
             str: 文件对象的文件名
         """
-        return os.path.basename(self._target_path)
+        if self._parent is None:
+            return os.path.basename(self._name)
+        return self._name
 
     @property
     def file_size(self) -> int:
@@ -296,7 +435,7 @@ class FileModel:
         Returns:
             int: 文件对象的文件大小
         """
-        return os.path.getsize(self._target_path)
+        return stat_cache.stat(self.targetPath).size
 
     @property
     def secret_key(self) -> str:
@@ -306,7 +445,7 @@ class FileModel:
         Returns:
             str: 盐值
         """
-        return self._secret_key or ""
+        return self._share_state.secret_key or ""
 
     @property
     def credentials(self) -> str:
@@ -316,7 +455,7 @@ class FileModel:
         Returns:
             str: 凭据
         """
-        return self._credentials or ""
+        return self._share_state.credentials or ""
 
     @property
     def free_secret(self) -> bool:
@@ -326,12 +465,12 @@ class FileModel:
         Returns:
             bool: 是否临时免密
         """
-        return self._free_secret
+        return self._share_state.free_secret
 
     @free_secret.setter
     def free_secret(self, newValue: bool) -> None:
         """
-        修改临时免密属性
+        修改临时免密属性, 同一分享下的所有文件/文件夹对象同时生效
 
         Args:
             newValue: 需修改临时免密属性的新值
@@ -339,32 +478,65 @@ class FileModel:
         Returns:
             None
         """
-        self._free_secret = bool(newValue)
+        self._share_state.free_secret = bool(newValue)
+
+    @property
+    def token_generation(self) -> int:
+        """
+        会话令牌代数, 代数变化后此前签发的令牌全部失效
+
+        Returns:
+            int: 会话令牌代数
+        """
+        return self._share_state.token_generation
+
+    @token_generation.setter
+    def token_generation(self, newValue: int) -> None:
+        """
+        修改会话令牌代数, 同一分享下的所有文件/文件夹对象同时生效
+
+        Args:
+            newValue: 新的会话令牌代数
+
+        Returns:
+            None
+        """
+        self._share_state.token_generation = int(newValue)
 
-    async def to_dict_client(self) -> Dict[str, Union[str, bool]]:
+    async def to_dict_client(
+        self, option: Optional[ListingOption] = None
+    ) -> Dict[str, Union[str, bool]]:
         """
         给客户端的格式化数据
 
+        Args:
+            option: 文件列表的查询选项, 文件对象忽略该参数
+
         Returns:
             Dict[str, Union[str, bool]]: 给客户端的格式化数据
         """
         return {
-            "uuid": self._uuid,
+            "uuid": self.uuid,
             "downloadUrl": self.download_url,
             "fileName": self.file_name,
-            "stareType": self._share_type.value,
+            "stareType": self.shareType.value,
             "isDir": self.isDir,
         }
 
-    async def to_dict_mobile(self) -> Dict[str, Union[str, bool]]:
+    async def to_dict_mobile(
+        self, option: Optional[ListingOption] = None
+    ) -> Dict[str, Union[str, bool]]:
         """
         移动设备(浏览器)浏览的格式化数据
 
+        Args:
+            option: 文件列表的查询选项, 文件对象忽略该参数
+
         Returns:
             Dict[str, Union[str, bool]]: 给移动设备(浏览器)浏览的格式化数据
         """
         return {
-            "uuid": self._uuid,
+            "uuid": self.uuid,
             "downloadUrl": self.browse_download_url,
             "fileName": self.file_name,
             "isDir": self.isDir,
@@ -379,11 +551,11 @@ class FileModel:
             Dict[str, Union[str, int]]: FTP的各项数据
         """
         return {
-            "uuid": self._uuid,
+            "uuid": self.uuid,
             "host": settings.LOCAL_HOST,
-            "port": self._ftp_port,
+            "port": self.ftp_port,
             "user": "a",
-            "passwd": self._ftp_pwd,
+            "passwd": self.ftp_pwd,
             "cwd": self.ftp_cwd,
             "filename": self.file_name,
         }
@@ -396,19 +568,39 @@ class FileModel:
             Dict[str, Union[str, int, bool]]: 给服务端的格式化数据
         """
         return {
-            "uuid": self._uuid,
+            "uuid": self.uuid,
             "downloadUrl": self.download_url,
             "fileName": self.file_name,
-            "stareType": self._share_type.value,
+            "stareType": self.shareType.value,
             "isDir": self.isDir,
             "browseUrl": self.browse_url,
-            "targetPath": self._target_path,
-            "ftpPwd": self._ftp_pwd,
-            "ftpPort": self._ftp_port,
-            "ftpBasePath": self._ftp_base_path,
-            "browseNumber": self._browse_number,
+            "targetPath": self.targetPath,
+            "ftpPwd": self.ftp_pwd,
+            "ftpPort": self.ftp_port,
+            "ftpBasePath": self.ftp_basePath,
+            "browseNumber": self.browse_number,
         }
 
+    def to_descriptor(self) -> "ShareDescriptor":
+        """
+        分享描述, 用于向分享服务进程下发分享, 不含任何子级
+
+        Returns:
+            ShareDescriptor: 分享描述
+        """
+        return ShareDescriptor(
+            self.targetPath,
+            self.uuid,
+            self.isDir,
+            self.ftp_pwd,
+            self.ftp_port,
+            self.ftp_basePath,
+            self._share_state.secret_key,
+            self._share_state.credentials,
+            self.free_secret,
+            self.token_generation,
+        )
+
     def to_dump_backup(self) -> Dict[str, Union[str, bool, int, None]]:
         """
         转存的格式化数据
@@ -417,34 +609,98 @@ class FileModel:
             Dict[str, Union[str, bool, int, None]]: 转存的格式化数据
         """
         normal = {
-            "path": self._target_path,
-            "uuid": self._uuid,
+            "path": self.targetPath,
+            "uuid": self.uuid,
             "parent_uuid": None,
-            "share_type": self._share_type.value,
+            "share_type": self.shareType.value,
             "isDir": self.isDir,
             "secret_key": self.secret_key,
             "credentials": self.credentials,
+            "browse_number": self.browse_number,
         }
-        if self._share_type is ptype.ShareType.ftp:
+        if self.shareType is ptype.ShareType.ftp:
             normal.update(
                 {
-                    "pwd": self._ftp_pwd,
-                    "port": self._ftp_port,
-                    "ftp_base_path": self._ftp_base_path,
+                    "pwd": self.ftp_pwd,
+                    "port": self.ftp_port,
+                    "ftp_base_path": self.ftp_basePath,
                 }
             )
 
         return normal
 
     def __eq__(self, other: str) -> bool:
-        return other.rstrip(os.sep) == self._target_path
+        return other.rstrip(os.sep) == self.targetPath
 
 
 class DirChildrenModel(dict):
     pass
 
 
+class DirChildrenCache:
+    def __init__(self):
+        """
+        已读取子级的文件夹对象LRU缓存, 超过容量时释放最久未访问文件夹的子级;
+        只持有文件夹对象的弱引用, 移除的分享及脱离文件夹树的对象不因缓存而常驻内存
+        """
+        self._dirs: "OrderedDict[int, weakref.ref]" = OrderedDict()
+        # 弱引用回调可能在持有锁的线程中因垃圾回收触发, 需可重入
+        self._lock = RLock()
+
+    def touch(self, dirObj: "DirModel") -> None:
+        """
+        标记文件夹对象最近被访问
+
+        Args:
+            dirObj: 被访问的文件夹对象
+
+        Returns:
+            None
+        """
+        key = id(dirObj)
+        with self._lock:
+            ref = self._dirs.get(key)
+            if ref is None or ref() is not dirObj:
+                self._dirs[key] = weakref.ref(dirObj, self._remover(key))
+            self._dirs.move_to_end(key)
+            while len(self._dirs) > settings.DIR_CHILDREN_CACHE_SIZE:
+                _, evictRef = self._dirs.popitem(last=False)
+                evictObj = evictRef()
+                if evictObj is not None:
+                    evictObj._children = None
+
+    def discard(self, dirObj: "DirModel") -> None:
+        """
+        将文件夹对象移出缓存
+
+        Args:
+            dirObj: 待移出的文件夹对象
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._dirs.pop(id(dirObj), None)
+
+    def __len__(self) -> int:
+        return len(self._dirs)
+
+    def _remover(self, key: int) -> Callable[[weakref.ref], None]:
+        def remove(ref: weakref.ref) -> None:
+            # 对象被回收后其id可能已被新对象复用, 仅移除仍指向该弱引用的缓存项
+            with self._lock:
+                if self._dirs.get(key) is ref:
+                    del self._dirs[key]
+
+        return remove
+
+
+dir_children_cache = DirChildrenCache()
+
+
 class DirModel(FileModel):
+    __slots__ = ("_children", "_scanned_mtime_ns")
+
     def __init__(
         self,
         path: str,
@@ -483,35 +739,159 @@ class DirModel(FileModel):
             **kwargs,
         )
 
-        if self._share_type is ptype.ShareType.ftp:
-            self._ftp_base_path = ftp_base_path if ftp_base_path else self._target_path
-        else:
-            self._ftp_base_path = None
+        if self.shareType is ptype.ShareType.ftp:
+            self._share_state.ftp_base_path = (
+                ftp_base_path if ftp_base_path else self._name
+            )
 
-        self._children: Dict[str, Union[FileModel, DirModel]] = DirChildrenModel()
-        self._setup_child()
+        # 子级在首次访问时才读取, 为None表示尚未读取或已被缓存释放
+        self._children: Optional[Dict[str, Union[FileModel, DirModel]]] = None
+        # 读取子级时文件夹的修改时间(ns), 用于判断子级是否需要重新读取
+        self._scanned_mtime_ns = 0
 
-    def _setup_child(self) -> None:
+    @classmethod
+    def _new_child(cls, parent: "DirModel", name: str, child_uuid: str) -> "DirModel":
+        child = super(DirModel, cls)._new_child(parent, name, child_uuid)
+        child._children = None
+        child._scanned_mtime_ns = 0
+        return child
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = super(DirModel, self).__getstate__()
+        state["_children"] = None
+        return state
+
+    def child_uuid(self, name: str) -> str:
         """
-        初始化下级文件/文件夹
+        子级的uuid, 由分享的uuid及子级相对路径确定, 与读取次数和顺序无关
+
+        Args:
+            name: 子级文件/文件夹名称
 
         Returns:
-            None
+            str: 子级uuid(不含上级部分)
         """
-        for file_name in os.listdir(self._target_path):
-            file_path = os.path.join(self._target_path, file_name)
-            child_uuid = public_func.generate_uuid()
-            fileModel = DirModel if os.path.isdir(file_path) else FileModel
-            child = fileModel(
-                file_path,
-                child_uuid,
-                self._uuid,
-                self._ftp_pwd,
-                self._ftp_port,
-                self._ftp_base_path,
-            )
+        rootObj = self
+        while rootObj._parent is not None:
+            rootObj = rootObj._parent
+        return public_func.generate_child_uuid(
+            rootObj._id.partition(">")[0], self._id.rsplit(">", 1)[-1], name
+        )
+
+    def _setup_child(self) -> Dict[str, Union[FileModel, "DirModel"]]:
+        """
+        读取下级文件/文件夹
+
+        Returns:
+            Dict[str, Union[FileModel, "DirModel"]]: 下级文件/文件夹对象
+        """
+        children = DirChildrenModel()
+        old_children = self._children or {}
+        target_path = self.targetPath
+        try:
+            self._scanned_mtime_ns = stat_cache.stat(target_path).mtime_ns
+            with os.scandir(target_path) as entries:
+                for entry in entries:
+                    # 存放流式上传临时文件的文件夹不对外展示
+                    if entry.name == ptype.UPLOAD_TEMP_DIR and entry.is_dir():
+                        continue
+                    child_uuid = self.child_uuid(entry.name)
+                    fileModel = DirModel if entry.is_dir() else FileModel
+                    # 重新读取时保留仍存在的子级对象, 避免丢失其已读取的下级
+                    child = old_children.get(child_uuid)
+                    if child is not None and type(child) is fileModel:
+                        children[child_uuid] = child
+                        continue
+                    children[child_uuid] = fileModel._new_child(
+                        self, entry.name, child_uuid
+                    )
+        except OSError:
+            pass
+
+        self._children = children
+        return children
+
+    def sync_children(self) -> int:
+        """
+        子级已读取且文件夹修改时间发生变化时, 重新读取子级
+
+        Returns:
+            int: 文件夹当前的修改时间(ns), 文件夹不存在时为0
+        """
+        mtime_ns = stat_cache.stat(self.targetPath).mtime_ns
+        if self._children is not None and mtime_ns != self._scanned_mtime_ns:
+            self._setup_child()
+
+        return mtime_ns
+
+    def add_child(self, path: str) -> Union[None, FileModel, "DirModel"]:
+        """
+        将新增的文件/文件夹插入到其所在的下级文件夹中, 不重新读取整个文件夹树,
+        已有的文件/文件夹对象及其uuid均保持不变; 途经的文件夹尚未读取子级时无需插入,
+        之后读取时自然包含
+
+        Args:
+            path: 新增的文件/文件夹路径
+
+        Returns:
+            Union[None, FileModel, "DirModel"]: 插入的文件/文件夹对象, 无需插入时为None
+        """
+        relpath = os.path.relpath(path, self.targetPath)
+        if relpath == os.curdir or relpath.split(os.sep, 1)[0] == os.pardir:
+            return None
+        *dir_names, name = relpath.split(os.sep)
+        dirObj = self
+        for dir_name in dir_names:
+            if dirObj._children is None:
+                return None
+            dirObj = dirObj._children.get(dirObj.child_uuid(dir_name))
+            if dirObj is None or not dirObj.isDir:
+                return None
+
+        return dirObj._insert_child(name)
 
+    def _insert_child(self, name: str) -> Union[None, FileModel, "DirModel"]:
+        """
+        将新增的文件/文件夹插入到子级中, 子级尚未读取时无需插入
+
+        Args:
+            name: 新增的文件/文件夹名称
+
+        Returns:
+            Union[None, FileModel, "DirModel"]: 插入的文件/文件夹对象, 无需插入时为None
+        """
+        target_path = self.targetPath
+        path = os.path.join(target_path, name)
+        stat_cache.invalidate(target_path)
+        stat_cache.invalidate(path)
+        record = stat_cache.stat(path)
+        if self._children is None or not record.exists:
+            return None
+
+        child_uuid = self.child_uuid(name)
+        fileModel = DirModel if record.isDir else FileModel
+        child = self._children.get(child_uuid)
+        if child is None or type(child) is not fileModel:
+            child = fileModel._new_child(self, name, child_uuid)
             self._children[child_uuid] = child
+        # 不更新读取时的修改时间, 插入前文件夹可能已有其他变化, 下次同步时仍会重新读取本文件夹,
+        # 重新读取保留已有对象, 仅涉及本文件夹
+        return child
+
+    @property
+    def _loaded_children(self) -> Dict[str, Union[FileModel, "DirModel"]]:
+        """
+        下级文件/文件夹对象, 尚未读取时即时读取
+
+        Returns:
+            Dict[str, Union[FileModel, "DirModel"]]: 下级文件/文件夹对象
+        """
+        children = self._children
+        if children is None:
+            children = self._setup_child()
+        dir_children_cache.touch(self)
+
+        return children
 
     def get(self, item: str) -> Union[FileModel, "DirModel"]:
         """
@@ -523,83 +903,135 @@ class DirModel(FileModel):
         Returns:
             Union[FileModel, "DirModel"]: 目标文件/文件夹对象
         """
-        return self._children.get(item)
+        return self._loaded_children.get(item)
 
     @property
-    def isDir(self) -> bool:
+    def children(self) -> List[Union[FileModel, "DirModel"]]:
         """
-        文件对象是否为文件夹
+        下级文件/文件夹对象列表
 
         Returns:
-            bool: 文件对象是否为文件夹
+            List[Union[FileModel, "DirModel"]]: 下级文件/文件夹对象列表
         """
-        return True
+        return list(self._loaded_children.values())
 
     @property
-    def free_secret(self) -> bool:
+    def isDir(self) -> bool:
         """
-        临时免密属性
+        文件对象是否为文件夹
 
         Returns:
-            bool: 是否临时免密
+            bool: 文件对象是否为文件夹
         """
-        return self._free_secret
+        return True
 
-    @free_secret.setter
-    def free_secret(self, newValue: bool) -> None:
+    def list_children(
+        self, option: ListingOption
+    ) -> Tuple[int, List[Tuple[str, Union[FileModel, "DirModel"]]]]:
         """
-        修改临时免密属性
+        按查询选项过滤, 排序及分页下级文件/文件夹
 
         Args:
-            newValue: 需修改临时免密属性的新值
+            option: 文件列表的查询选项
 
         Returns:
-            None
-        """
-        self._free_secret = bool(newValue)
-        for child in self._children.values():
-            child.free_secret = newValue
+            Tuple[int, List[Tuple[str, Union[FileModel, "DirModel"]]]]:
+                过滤后的子级总数及当前页的(uuid, 文件/文件夹对象)列表
+        """
+        children = list(self._loaded_children.items())
+        if option.keyword:
+            keyword = option.keyword.lower()
+            children = [
+                item for item in children if keyword in item[1].file_name.lower()
+            ]
+        if option.sort == "name":
+            children.sort(key=lambda item: item[1].file_name, reverse=option.reverse)
+        elif option.sort == "type":
+            children.sort(
+                key=lambda item: (not item[1].isDir, item[1].file_name),
+                reverse=option.reverse,
+            )
+        elif option.sort in ("size", "mtime"):
+            stat_field = option.sort
+
+            def stat_key(item: Tuple[str, Union[FileModel, "DirModel"]]) -> float:
+                return getattr(stat_cache.stat(item[1].targetPath), stat_field)
+
+            children.sort(key=stat_key, reverse=option.reverse)
+
+        total = len(children)
+        end = None if option.limit is None else option.offset + option.limit
+        return total, children[option.offset : end]
 
-    async def to_dict_client(self) -> Dict[str, Any]:
+    async def to_dict_client(
+        self, option: Optional[ListingOption] = None
+    ) -> Dict[str, Any]:
         """
         给客户端的格式化数据
 
+        Args:
+            option: 文件列表的查询选项, 为None时返回完整的子级树
+
         Returns:
             Dict[str, Any]: 给客户端的格式化数据
         """
-        children = []
-        for child_uuid, child in self._children.items():
-            child_dict = {child_uuid: await child.to_dict_client()}
-            children.append(child_dict)
-
-        return {
-            "uuid": self._uuid,
+        result = {
+            "uuid": self.uuid,
             "downloadUrl": self.download_url,
             "fileName": self.file_name,
-            "stareType": self._share_type.value,
+            "stareType": self.shareType.value,
             "isDir": self.isDir,
-            "children": children,
         }
+        if option is None:
+            children = []
+            for child_uuid, child in self._loaded_children.items():
+                child_dict = {child_uuid: await child.to_dict_client()}
+                children.append(child_dict)
+            result["children"] = children
+        elif option.depth is None or option.depth > 0:
+            total, page = self.list_children(option)
+            child_option = option.for_children()
+            result["total"] = total
+            result["children"] = [
+                {child_uuid: await child.to_dict_client(child_option)}
+                for child_uuid, child in page
+            ]
 
-    async def to_dict_mobile(self) -> Dict[str, Any]:
+        return result
+
+    async def to_dict_mobile(
+        self, option: Optional[ListingOption] = None
+    ) -> Dict[str, Any]:
         """
         移动设备(浏览器)浏览的格式化数据
 
+        Args:
+            option: 文件列表的查询选项, 为None时返回完整的子级树
+
         Returns:
             Dict[str, Any]: 给移动设备(浏览器)浏览的格式化数据
         """
-        children = []
-        for child_uuid, child in self._children.items():
-            children.append(await child.to_dict_mobile())
-
-        return {
-            "uuid": self._uuid,
+        result = {
+            "uuid": self.uuid,
             "downloadUrl": self.browse_download_url,
             "fileName": self.file_name,
             "isDir": self.isDir,
             "targetPath": self.targetPath,
-            "children": children,
         }
+        if option is None:
+            children = []
+            for child_uuid, child in self._loaded_children.items():
+                children.append(await child.to_dict_mobile())
+            result["children"] = children
+        elif option.depth is None or option.depth > 0:
+            total, page = self.list_children(option)
+            child_option = option.for_children()
+            result["total"] = total
+            result["children"] = [
+                await child.to_dict_mobile(child_option) for _, child in page
+            ]
+
+        return result
 
     async def to_dict_server(self) -> Dict[str, Any]:
         """
@@ -609,20 +1041,54 @@ class DirModel(FileModel):
             Dict[str, Any]: 给服务端的格式化数据
         """
         children = []
-        for child_uuid, child in self._children.items():
+        for child_uuid, child in self._loaded_children.items():
             child_dict = {child_uuid: await child.to_dict_server()}
             children.append(child_dict)
 
         return {
-            "uuid": self._uuid,
+            "uuid": self.uuid,
             "downloadUrl": self.download_url,
             "fileName": self.file_name,
-            "stareType": self._share_type.value,
+            "stareType": self.shareType.value,
             "isDir": self.isDir,
             "browseUrl": self.browse_url,
-            "targetPath": self._target_path,
-            "ftpPwd": self._ftp_pwd,
-            "ftpPort": self._ftp_port,
-            "ftpBasePath": self._ftp_base_path,
+            "targetPath": self.targetPath,
+            "ftpPwd": self.ftp_pwd,
+            "ftpPort": self.ftp_port,
+            "ftpBasePath": self.ftp_basePath,
             "children": children,
         }
+
+
+class ShareDescriptor(NamedTuple):
+    path: str
+    uuid: str
+    isDir: bool
+    ftp_pwd: Optional[str] = None
+    ftp_port: Optional[int] = None
+    ftp_base_path: Optional[str] = None
+    secret_key: Optional[str] = None
+    credentials: Optional[str] = None
+    free_secret: bool = False
+    token_generation: int = 0
+
+    def to_model(self) -> Union[FileModel, DirModel]:
+        """
+        由分享描述创建文件/文件夹对象, 子级在服务进程中首次访问时才读取
+
+        Returns:
+            Union[FileModel, DirModel]: 文件/文件夹对象
+        """
+        fileModel = DirModel if self.isDir else FileModel
+        fileObj = fileModel(
+            self.path,
+            self.uuid,
+            pwd=self.ftp_pwd,
+            port=self.ftp_port,
+            ftp_base_path=self.ftp_base_path,
+            secret_key=self.secret_key,
+            credentials=self.credentials,
+        )
+        fileObj.free_secret = self.free_secret
+        fileObj.token_generation = self.token_generation
+        return fileObj
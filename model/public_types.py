@@ -3,6 +3,7 @@ __all__ = [
     "DOWNLOAD_URI",
     "ShareType",
     "DownloadStatus",
+    "ServingProfile",
     "ThemeColor",
     "ControlColorStruct",
     "ColorCardStruct",
@@ -18,12 +19,19 @@ DOWNLOAD_URI: str = "/download"
 UPLOAD_URI: str = "/upload"
 UPLOAD_MERGE_URI: str = "/upload/merge"
 UPLOAD_REMOVE_URI: str = "/upload/remove"
+UPLOAD_CREATE_URI: str = "/upload/create"
+UPLOAD_STATUS_URI: str = "/upload/status"
+UPLOAD_STREAM_URI: str = "/upload/stream"
+UPLOAD_COMMIT_URI: str = "/upload/commit"
 FILE_SIZE_URI: str = "/file_size"
 HIT_LOG: str = "hit_log"
+ARCHIVE_FORMAT: str = "archive"
 MOBILE_PREFIX: str = "/mobile"
 QRCODE_URL: str = "/start"
 SPEED_TEST: str = "/speed-test"
 STATIC_PREFIX: str = "/static"
+SESSION_TOKEN_HEADER: str = "x-share-token"
+UPLOAD_TEMP_DIR: str = ".file_sharer_uploads"
 
 
 # share type
@@ -60,6 +68,35 @@ class VerifyStatus(int, Enum):
     DONE = 3
 
 
+# serving profile
+class ServingProfile(str, Enum):
+    """
+    HTTP服务运行方案枚举类
+    """
+
+    compat = "compat"
+    balanced = "balanced"
+    throughput = "throughput"
+
+    @classmethod
+    def dispatch(
+        cls, profile: Union[str, "ServingProfile"]
+    ) -> Optional["ServingProfile"]:
+        """
+        运行方案枚举值分配
+
+        Args:
+            profile: 待分配的运行方案名称
+
+        Returns:
+            Optional["ServingProfile"]: 运行方案枚举值或None(传入不合法参数时)
+        """
+        try:
+            return cls(profile)
+        except ValueError:
+            return None
+
+
 # theme color
 class ThemeColor(str, Enum):
     """
@@ -1,5 +1,6 @@
 __all__ = [
     "WatchResultThread",
+    "IndexShareThread",
     "LoadBrowseUrlThread",
     "DownloadHttpFileThread",
     "DownloadFtpFileThread",
@@ -10,9 +11,11 @@ import json
 import os
 import asyncio
 import ssl
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from multiprocessing import Queue
 from traceback import format_exc
-from typing import Sequence, Dict, Any, List, Union, Tuple
+from typing import Sequence, Dict, Any, List, Union, Tuple, Optional
 
 import requests
 import aiohttp
@@ -25,10 +28,12 @@ from utils.logger import sysLogger
 from utils.public_func import response_ret_code
 from utils.response_code import RET
 from .public_types import DownloadStatus, HIT_LOG
+from .file import FileModel, DirModel
 
 
 class WatchResultThread(QThread):
-    signal = pyqtSignal(str)
+    signal = pyqtSignal(dict)
+    ack_signal = pyqtSignal(str, int, bool)
 
     def __init__(self, output_q: Queue):
         """
@@ -49,10 +54,124 @@ class WatchResultThread(QThread):
             None
         """
         while self.run_flag:
-            file_uuid = self._output_q.get()
-            sysLogger.debug(f"监听到分享被浏览, 正在发射更新浏览次数事件, 分享的uuid: {file_uuid}")
-            self.signal.emit(file_uuid)
-            sysLogger.debug(f"发射更新浏览次数事件完成, 分享的uuid: {file_uuid}")
+            result_type, result_msg = self._output_q.get()
+            if result_type == "ack":
+                service_name, ack_id, ready = result_msg
+                sysLogger.debug(f"监听到[{service_name}]任务完成, 任务编号: {ack_id}")
+                self.ack_signal.emit(service_name, ack_id, ready)
+                continue
+            browse_counts = result_msg
+            sysLogger.debug(f"监听到分享被浏览, 正在发射更新浏览次数事件, 浏览次数增量: {browse_counts}")
+            self.signal.emit(browse_counts)
+            sysLogger.debug("发射更新浏览次数事件完成")
+
+
+class IndexShareThread(QThread):
+    signal = pyqtSignal(str, int, bool)
+    progress_signal = pyqtSignal(str, int)
+    # 每统计到该个数的文件发射一次进度事件
+    PROGRESS_STEP = 500
+
+    def __init__(self):
+        """
+        统计分享文件个数线程类初始化函数, 多个分享在线程池中并行统计,
+        统计期间分享可正常打开, 服务按需读取文件夹
+        """
+        super(IndexShareThread, self).__init__()
+        self.run_flag = True
+        self._task_q: "queue.Queue[Optional[Tuple[str, str]]]" = queue.Queue()
+
+    def run(self) -> None:
+        """
+        线程运行入口函数
+
+        Returns:
+            None
+        """
+        with ThreadPoolExecutor(
+            max_workers=settings.SHARE_INDEX_WORKERS,
+            thread_name_prefix="IndexShare",
+        ) as executor:
+            while self.run_flag:
+                task = self._task_q.get()
+                if task is None:
+                    break
+                executor.submit(self._index, *task)
+
+    def append(self, fileObjs: Sequence[Union[FileModel, DirModel]]) -> None:
+        """
+        追加待统计的分享文件/文件夹对象
+
+        Args:
+            fileObjs: 待统计的分享文件/文件夹对象列表
+
+        Returns:
+            None
+        """
+        sysLogger.debug(f"追加统计分享文件个数任务, 任务个数: {len(fileObjs)}")
+        for fileObj in fileObjs:
+            self._task_q.put((fileObj.uuid, fileObj.targetPath))
+
+    def stop(self) -> None:
+        """
+        停止统计, 正在统计的任务尽快结束
+
+        Returns:
+            None
+        """
+        self.run_flag = False
+        self._task_q.put(None)
+
+    def _index(self, uuid: str, target_path: str) -> None:
+        sysLogger.debug(f"正在统计分享文件个数, 分享路径: {target_path}")
+        try:
+            file_count = self._count_files(uuid, target_path)
+        except FileNotFoundError:
+            sysLogger.warning(f"分享的路径已不存在, 分享路径: {target_path}")
+            self.signal.emit(uuid, 0, False)
+            return
+        except Exception:
+            sysLogger.error(f"统计分享文件个数失败, 分享路径: {target_path}, 错误信息: {format_exc()}")
+            self.signal.emit(uuid, 0, True)
+            return
+
+        sysLogger.debug(f"统计分享文件个数完成, 分享路径: {target_path}, 文件个数: {file_count}")
+        self.signal.emit(uuid, file_count, True)
+
+    def _count_files(self, uuid: str, target_path: str) -> int:
+        if not os.path.isdir(target_path):
+            if not os.path.exists(target_path):
+                raise FileNotFoundError(target_path)
+            return 1
+
+        file_count, next_progress = 0, self.PROGRESS_STEP
+        stack = [target_path]
+        while stack and self.run_flag:
+            dir_path = stack.pop()
+            try:
+                entries = os.scandir(dir_path)
+            except OSError:
+                # 无权限或已被删除的下级文件夹不影响分享, 访问时再提示
+                if dir_path == target_path:
+                    raise
+                continue
+            with entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        stack.append(entry.path)
+                    else:
+                        file_count += 1
+            if file_count > settings.SHARE_FILE_COUNT_WARNING:
+                break
+            if file_count >= next_progress:
+                self.progress_signal.emit(uuid, file_count)
+                next_progress = file_count + self.PROGRESS_STEP
+
+        return file_count
 
 
 class LoadBrowseUrlThread(QThread):
@@ -0,0 +1,202 @@
+__all__ = ["ShareJournal"]
+
+import os
+import json
+from threading import Lock, Thread
+from typing import Dict, List, Any, Optional, TextIO
+
+from settings import settings
+from utils.logger import sysLogger
+
+
+class ShareJournal:
+    FILE_NAME = "file_sharing_journal.jsonl"
+    # 旧版本整体转存的历史分享记录, 日志文件不存在时从中迁移
+    LEGACY_FILE_NAME = "file_sharing_backups.json"
+
+    def __init__(self, base_dir: Optional[str] = None):
+        """
+        历史分享记录日志类初始化函数, 每次新建/移除/修改分享只追加一行记录,
+        记录条数过多时在后台线程中压缩为每个分享一条记录
+
+        Args:
+            base_dir: 日志文件所在文件夹, 默认为项目根目录
+        """
+        base_dir = base_dir or settings.BASE_DIR
+        self._path = os.path.join(base_dir, self.FILE_NAME)
+        self._legacy_path = os.path.join(base_dir, self.LEGACY_FILE_NAME)
+        self._lock = Lock()
+        self._file: Optional[TextIO] = None
+        self._record_count = 0
+        # 压缩过程中追加的记录, 压缩完成后补写到新日志文件末尾
+        self._compact_tail: Optional[List[Dict[str, Any]]] = None
+
+    def load(self) -> List[Dict[str, Any]]:
+        """
+        重放日志得到当前的分享记录, 不访问分享的文件/文件夹;
+        日志文件不存在时从旧版本的历史分享记录迁移
+
+        Returns:
+            List[Dict[str, Any]]: 按分享顺序排列的分享记录
+        """
+        if not os.path.exists(self._path):
+            shares = self._load_legacy()
+            self._write_snapshot(self._path, shares, [])
+            self._record_count = len(shares)
+            return shares
+
+        shares: Dict[str, Dict[str, Any]] = {}
+        with open(self._path, encoding="utf-8") as f:
+            for line in f:
+                self._record_count += 1
+                try:
+                    record = json.loads(line)
+                    self._apply(shares, record)
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    # 进程崩溃时最后一行可能写入不完整, 跳过即可
+                    sysLogger.warning(f"历史分享记录日志存在损坏的记录, 已跳过: {line!r}")
+
+        return list(shares.values())
+
+    def append(self, record: Dict[str, Any], durable: bool = True) -> None:
+        """
+        追加一条记录
+
+        Args:
+            record: 记录, op为add/remove/update
+            durable: 是否立即落盘, 浏览次数等可丢失的更新可不落盘
+
+        Returns:
+            None
+        """
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self._path, "a", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()
+            if durable:
+                os.fsync(self._file.fileno())
+            self._record_count += 1
+            if self._compact_tail is not None:
+                self._compact_tail.append(record)
+
+    def need_compact(self, share_count: int) -> bool:
+        """
+        记录条数是否已远多于分享个数
+
+        Args:
+            share_count: 当前的分享个数
+
+        Returns:
+            bool: 是否需要压缩
+        """
+        if self._compact_tail is not None:
+            return False
+        return self._record_count > max(
+            settings.SHARE_JOURNAL_COMPACT_RECORDS, share_count * 2
+        )
+
+    def compact(
+        self, shares: List[Dict[str, Any]], background: bool = True
+    ) -> Optional[Thread]:
+        """
+        将日志压缩为每个分享一条记录, 写入临时文件后替换
+
+        Args:
+            shares: 当前的分享记录(快照)
+            background: 是否在后台线程中压缩
+
+        Returns:
+            Optional[Thread]: 后台压缩线程, 同步压缩时为None
+        """
+        with self._lock:
+            if self._compact_tail is not None:
+                return None
+            self._compact_tail = []
+        if not background:
+            self._compact(shares)
+            return None
+
+        thread = Thread(target=self._compact, args=(shares,), daemon=True)
+        thread.start()
+        return thread
+
+    def close(self) -> None:
+        """
+        关闭日志文件
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _compact(self, shares: List[Dict[str, Any]]) -> None:
+        temp_path = f"{self._path}.tmp"
+        try:
+            self._write_snapshot(temp_path, shares, [])
+            with self._lock:
+                tail, self._compact_tail = self._compact_tail, None
+                self._write_snapshot(temp_path, [], tail, mode="a")
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                os.replace(temp_path, self._path)
+                self._record_count = len(shares) + len(tail)
+            sysLogger.debug(f"历史分享记录日志压缩完成, 分享个数: {len(shares)}")
+        except OSError as e:
+            with self._lock:
+                self._compact_tail = None
+            sysLogger.error(f"历史分享记录日志压缩失败: {e}")
+
+    @staticmethod
+    def _write_snapshot(
+        path: str,
+        shares: List[Dict[str, Any]],
+        records: List[Dict[str, Any]],
+        mode: str = "w",
+    ) -> None:
+        with open(path, mode, encoding="utf-8") as f:
+            for share in shares:
+                f.write(
+                    json.dumps(
+                        {"op": "add", "share": share},
+                        ensure_ascii=False,
+                        separators=(",", ":"),
+                    )
+                    + "\n"
+                )
+            for record in records:
+                f.write(
+                    json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+                )
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _load_legacy(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self._legacy_path):
+            return []
+        with open(self._legacy_path, encoding="utf-8") as f:
+            try:
+                shares = json.loads(f.read())
+            except json.JSONDecodeError:
+                sysLogger.error("迁移历史分享记录失败, file_sharing_backups.json文件已损坏")
+                return []
+        sysLogger.info("已从file_sharing_backups.json迁移历史分享记录")
+        return [share for share in shares if isinstance(share, dict)]
+
+    @staticmethod
+    def _apply(shares: Dict[str, Dict[str, Any]], record: Dict[str, Any]) -> None:
+        op = record["op"]
+        if op == "add":
+            share = record["share"]
+            shares[share["uuid"]] = share
+        elif op == "remove":
+            shares.pop(record["uuid"], None)
+        elif op == "update":
+            share = shares.get(record["uuid"])
+            if share is not None:
+                share.update(record["fields"])
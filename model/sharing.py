@@ -1,22 +1,39 @@
 __all__ = ["SharingModel", "FuseSharingModel"]
 
 import os
-import json
-from typing import Union, Optional
+from bisect import bisect_left
+from typing import Union, Optional, Dict, List, Tuple, Any
+from weakref import WeakValueDictionary
 
 from .file import FileModel, DirModel
 from .public_types import ShareType as shareType
+from .share_journal import ShareJournal
 from settings import settings
 from utils.logger import sysLogger
 
 
 class SharingModel(dict):
+    def __init__(self, *args, **kwargs):
+        super(SharingModel, self).__init__()
+        # 扁平索引: 完整uuid(parent>child>...) -> 文件/文件夹对象, 查找时逐步建立;
+        # 弱引用保存, 文件夹子级被释放后对应的索引项自动失效
+        self._index: "WeakValueDictionary[str, Union[FileModel, DirModel]]" = (
+            WeakValueDictionary()
+        )
+        self.update(*args, **kwargs)
+
     def __setitem__(self, key: str, value: Union[FileModel, DirModel]) -> None:
+        self._drop_index(key)
         super(SharingModel, self).__setitem__(key, value)
 
     def __delitem__(self, key: str) -> None:
+        self._drop_index(key)
         super(SharingModel, self).__delitem__(key)
 
+    def update(self, *args, **kwargs) -> None:
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
     @property
     def length(self) -> int:
         """
@@ -37,8 +54,96 @@ class SharingModel(dict):
         """
         return not self
 
+    def lookup(self, uuid: str) -> Union[FileModel, DirModel, None]:
+        """
+        根据完整uuid查找分享的文件/文件夹对象, 命中索引时与层级深度无关, 仅需一次字典查找
+
+        Args:
+            uuid: 文件/文件夹对象的完整uuid
+
+        Returns:
+            Union[FileModel, DirModel, None]: 目标文件/文件夹对象, 不存在则为None
+        """
+        fileObj = self._index.get(uuid)
+        if fileObj is not None:
+            return fileObj
+        try:
+            parent_uuid, child_uuid = uuid.rsplit(">", 1)
+        except ValueError:
+            return self.get(uuid)
+
+        parentObj = self.lookup(parent_uuid)
+        if parentObj is None or not parentObj.isDir:
+            return None
+        fileObj = parentObj.get(child_uuid)
+        if fileObj is not None:
+            self._index[uuid] = fileObj
+        return fileObj
+
+    def _drop_index(self, share_uuid: str) -> None:
+        """
+        移除分享的扁平索引
+
+        Args:
+            share_uuid: 分享的uuid
+
+        Returns:
+            None
+        """
+        prefix = share_uuid + ">"
+        for key in [key for key in self._index.keys() if key.startswith(prefix)]:
+            self._index.pop(key, None)
+
 
 class FuseSharingModel(list):
+    def __init__(self, *args, **kwargs):
+        super(FuseSharingModel, self).__init__()
+        # 行序号: 按追加顺序递增, 列表中始终有序, 行号由二分查找得到, 无需逐个保存和更新
+        self._row_seqs: List[int] = []
+        self._next_seq = 0
+        # uuid -> 文件/文件夹对象
+        self._uuid_index: Dict[str, Union[FileModel, DirModel]] = {}
+        # (规范化路径, 分享类型) -> 文件/文件夹对象
+        self._path_index: Dict[Tuple[str, shareType], Union[FileModel, DirModel]] = {}
+        # FTP服务根路径 -> {uuid: 文件/文件夹对象}
+        self._ftp_base_index: Dict[str, Dict[str, Union[FileModel, DirModel]]] = {}
+        # 历史分享记录日志, 加载完成后才记录变更
+        self._journal: Optional[ShareJournal] = None
+        for fileObj in list(*args, **kwargs):
+            self.append(fileObj)
+
+    @staticmethod
+    def _normalize_path(target_path: str) -> str:
+        return os.path.normcase(os.path.normpath(target_path))
+
+    def get_by_uuid(self, uuid: str) -> Union[FileModel, DirModel, None]:
+        """
+        根据uuid获取分享文件/文件夹对象
+
+        Args:
+            uuid: 文件/文件夹对象的uuid
+
+        Returns:
+            Union[FileModel, DirModel, None]: 文件/文件夹对象, 不存在则为None
+        """
+        return self._uuid_index.get(uuid)
+
+    def row_of(self, row_seq: int) -> Optional[int]:
+        """
+        根据行序号得到分享在列表中的行号
+
+        Args:
+            row_seq: 追加时分配的行序号
+
+        Returns:
+            Optional[int]: 行号, 已被移除时为None
+        """
+        row = bisect_left(self._row_seqs, row_seq)
+        if row < len(self._row_seqs) and self._row_seqs[row] == row_seq:
+            return row
+
+        return None
+
     @property
     def length(self) -> int:
         """
@@ -61,7 +166,17 @@ class FuseSharingModel(list):
         """
         sysLogger.debug("追加分享文件对象")
         super(FuseSharingModel, self).append(fileObj)
-        fileObj.rowIndex = self.length - 1
+        self._row_seqs.append(self._next_seq)
+        fileObj.bind_row(self, self._next_seq)
+        self._next_seq += 1
+        self._uuid_index[fileObj.uuid] = fileObj
+        path_key = (self._normalize_path(fileObj.targetPath), fileObj.shareType)
+        self._path_index[path_key] = fileObj
+        if fileObj.shareType is shareType.ftp:
+            self._ftp_base_index.setdefault(fileObj.ftp_basePath, {})[
+                fileObj.uuid
+            ] = fileObj
+        self._record({"op": "add", "share": fileObj.to_dump_backup()})
         sysLogger.debug("追加分享文件对象完成")
 
     def remove(self, rowIndex: int) -> None:
@@ -75,11 +190,47 @@ class FuseSharingModel(list):
             None
         """
         sysLogger.debug("移除分享文件对象")
-        super(FuseSharingModel, self).pop(rowIndex)
-        for index in range(rowIndex, self.length):
-            self[index].rowIndex -= 1
+        fileObj = super(FuseSharingModel, self).pop(rowIndex)
+        del self._row_seqs[rowIndex]
+        fileObj.bind_row(None, None)
+        self._uuid_index.pop(fileObj.uuid, None)
+        path_key = (self._normalize_path(fileObj.targetPath), fileObj.shareType)
+        if self._path_index.get(path_key) is fileObj:
+            del self._path_index[path_key]
+        if fileObj.shareType is shareType.ftp:
+            base_shares = self._ftp_base_index.get(fileObj.ftp_basePath, {})
+            base_shares.pop(fileObj.uuid, None)
+            if not base_shares:
+                self._ftp_base_index.pop(fileObj.ftp_basePath, None)
+        self._record({"op": "remove", "uuid": fileObj.uuid})
         sysLogger.debug("移除分享文件对象完成")
 
+    def record_update(
+        self, fileObj: Union[FileModel, DirModel], durable: bool = True, **fields
+    ) -> None:
+        """
+        记录分享文件/文件夹对象的属性变更
+
+        Args:
+            fileObj: 属性变更的文件/文件夹对象
+            durable: 是否立即落盘, 浏览次数等可丢失的变更可不落盘
+            **fields: 变更的属性, 与转存的格式化数据的键一致
+
+        Returns:
+            None
+        """
+        self._record(
+            {"op": "update", "uuid": fileObj.uuid, "fields": fields}, durable=durable
+        )
+
+    def _record(self, record: Dict[str, Any], durable: bool = True) -> None:
+        if self._journal is None:
+            return
+        self._journal.append(record, durable=durable)
+        if self._journal.need_compact(len(self)):
+            sysLogger.debug("历史分享记录日志条数过多, 开始后台压缩")
+            self._journal.compact([fileObj.to_dump_backup() for fileObj in self])
+
     def contains(self, target_path: str, share_type: shareType) -> Optional[int]:
         """
         目标分享文件/文件夹对象的行号
@@ -92,15 +243,15 @@ class FuseSharingModel(list):
             Optional[int]: 目标分享文件/文件夹对象的行号
         """
         sysLogger.debug("检验分享文件对象是否存在")
-        for fileObj in self:
-            if fileObj == target_path and fileObj.shareType is share_type:
-                return fileObj.rowIndex
+        fileObj = self._path_index.get((self._normalize_path(target_path), share_type))
+        if fileObj is None:
+            return None
 
-        return None
+        return fileObj.rowIndex
 
     def get_ftp_shared(self, target_path: str) -> Union[FileModel, DirModel, None]:
         """
-        获取可复用FTP的文件/文件夹对象
+        获取可复用FTP的文件/文件夹对象, 按上级路径逐级查找FTP服务根路径索引
 
         Args:
             target_path: 待分析文件/文件夹对象的路径
@@ -109,66 +260,52 @@ class FuseSharingModel(list):
             Union[FileModel, DirModel, None]: 可复用FTP的文件/文件夹对象
         """
         sysLogger.debug("获取可复用的FTP")
-        basePath_file_params: dict = {}
-        for fileObj in self:
-            if fileObj.shareType is shareType.ftp:
-                basePath_file_params[fileObj.ftp_basePath] = fileObj
-
         while os.path.dirname(target_path) != target_path:
             target_path = os.path.dirname(target_path)
-            if target_path in basePath_file_params:
-                return basePath_file_params[target_path]
+            base_shares = self._ftp_base_index.get(target_path)
+            if base_shares:
+                return next(reversed(base_shares.values()))
 
         return None
 
     def dump(self) -> None:
         """
-        转存
+        转存, 每次变更均已追加至历史分享记录日志, 此处仅将日志压缩后关闭
 
         Returns:
             None
         """
-        sysLogger.debug("开始写入历史分享记录")
-        backup_result: list = [fileObj.to_dump_backup() for fileObj in self]
-
-        backup_file_path: str = os.path.join(
-            settings.BASE_DIR, "file_sharing_backups.json"
+        if self._journal is None:
+            return
+        sysLogger.debug("开始压缩历史分享记录日志")
+        self._journal.compact(
+            [fileObj.to_dump_backup() for fileObj in self], background=False
         )
-        with open(backup_file_path, "w", encoding="utf-8") as f:
-            json.dump(
-                backup_result, f, indent=4, separators=(",", ": "), ensure_ascii=False
-            )
-
-        sysLogger.debug("写入历史分享记录成功")
+        self._journal.close()
+        sysLogger.debug("压缩历史分享记录日志成功")
 
     @classmethod
     def load(cls) -> "FuseSharingModel":
         """
-        加载
+        加载, 重放历史分享记录日志, 只检查分享的路径是否存在, 不读取文件夹;
+        路径已不存在的分享记录不再加载, 并压缩日志将其移除
 
         Returns:
             FuseSharingModel: 加载成融合分享对象
         """
         sysLogger.debug("开始读取历史分享记录")
         model = cls()
-        backup_file_path: str = os.path.join(
-            settings.BASE_DIR, "file_sharing_backups.json"
-        )
-        if not os.path.exists(backup_file_path):
-            sysLogger.info("file_sharing_backups.json文件不存在, 跳过历史分享记录加载")
+        journal = ShareJournal()
+        try:
+            backup_result = journal.load()
+        except OSError as e:
+            sysLogger.error(f"加载历史分享记录失败: {e}")
             return model
 
-        with open(backup_file_path, encoding="utf-8") as f:
-            try:
-                backup_result = json.loads(f.read())
-            except json.JSONDecodeError:
-                sysLogger.error("加载历史分享记录失败, file_sharing_backups.json文件已损坏")
-                return model
-
-        path_share_params: list = []
+        pruned = 0
         for file_dict in backup_result:
             targetPath = file_dict.get("path")
-            if not targetPath or not os.path.exists(targetPath):
+            if not targetPath:
                 continue
             # 路径整好看一点
             if settings.IS_WINDOWS:
@@ -176,21 +313,30 @@ class FuseSharingModel(list):
             else:
                 targetPath = targetPath.replace("\\", "/")
             file_dict.update({"path": targetPath})
-            path_share_param = (file_dict.get("path"), file_dict.get("share_type"))
-            if path_share_param in path_share_params:
+            if not os.path.exists(targetPath):
+                pruned += 1
+                sysLogger.warning(f"分享的路径已不存在, 已移除该历史分享记录, 分享路径: {targetPath}")
+                continue
+            try:
+                share_type = shareType(file_dict.get("share_type"))
+            except ValueError:
+                share_type = None
+            if model.contains(targetPath, share_type) is not None:
                 continue
-            path_share_params.append(path_share_param)
             isDir = file_dict.get("isDir")
             fileModel = FileModel if not isDir else DirModel
             try:
                 fileObj = fileModel(**file_dict)
-            except TypeError:
-                sysLogger.error("加载历史分享记录失败, file_sharing_backups.json文件已损坏")
-                return model
-            except FileNotFoundError:
+            except (TypeError, KeyError, IndexError):
+                sysLogger.error(f"历史分享记录已损坏, 已跳过: {file_dict}")
                 continue
 
             model.append(fileObj)
 
+        model._journal = journal
+        if pruned:
+            journal.compact(
+                [fileObj.to_dump_backup() for fileObj in model], background=False
+            )
         sysLogger.debug("读取历史分享记录完成")
         return model
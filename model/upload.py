@@ -0,0 +1,427 @@
+__all__ = ["UploadSession"]
+
+import os
+import json
+import time
+import base64
+from threading import Lock
+from contextlib import contextmanager
+from typing import Set, Tuple, Optional, BinaryIO, Dict, Any, Iterator, List
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from model import public_types as ptype
+from settings import settings
+from utils.logger import sysLogger
+
+
+class UploadSession:
+    # 接收分片时累积到该大小再写入磁盘
+    WRITE_BUFFER_SIZE = 1048576
+
+    def __init__(self, curr_path: str, file_name: str, file_size: int, chunk_size: int):
+        """
+        上传任务类初始化函数, 分片直接按偏移写入预分配的临时文件,
+        全部分片到达后将临时文件重命名为目标文件, 无需合并;
+        临时文件及状态文件存放在上传目录下的专用隐藏文件夹中, 不与用户文件混淆
+
+        Args:
+            curr_path: 上传的目标文件夹路径
+            file_name: 上传的文件名
+            file_size: 文件总大小
+            chunk_size: 分片大小, 除最后一个分片外均为该大小
+        """
+        self.curr_path = curr_path
+        self.file_name = file_name
+        self.file_size = file_size
+        self.chunk_size = chunk_size
+        # 空文件也需要一个(长度为0的)分片
+        self.chunk_count = max(-(-file_size // chunk_size), 1)
+        self.received: Set[int] = set()
+        self._save_lock = Lock()
+
+    @classmethod
+    def load(cls, curr_path: str, file_name: str) -> Optional["UploadSession"]:
+        """
+        从上传目录中的状态文件恢复上传任务, 服务进程重启后可继续上传, 存在阻塞IO, 需在线程中调用
+
+        Args:
+            curr_path: 上传的目标文件夹路径
+            file_name: 上传的文件名
+
+        Returns:
+            Optional[UploadSession]: 上传任务, 不存在或状态文件已损坏时为None
+        """
+        session = cls(curr_path, file_name, 0, 1)
+        if not os.path.isfile(session.temp_path):
+            return None
+        try:
+            with open(session.state_path, "r", encoding="utf-8") as f:
+                state: Dict[str, Any] = json.load(f)
+            session = cls(curr_path, file_name, state["fileSize"], state["chunkSize"])
+            session.received = session.from_bitmap(base64.b64decode(state["bitmap"]))
+        except (OSError, ValueError, KeyError, TypeError, ZeroDivisionError):
+            return None
+
+        return session
+
+    @classmethod
+    def remove_stale(cls, curr_path: str) -> List[str]:
+        """
+        删除上传目录中已过期的上传任务的临时文件及状态文件, 超过UPLOAD_SESSION_TTL
+        没有接收分片的任务视为已放弃, 避免预分配的临时文件一直占用磁盘空间;
+        存在阻塞IO, 需在线程中调用
+
+        Args:
+            curr_path: 上传的目标文件夹路径
+
+        Returns:
+            List[str]: 删除的上传任务的目标文件路径
+        """
+        temp_dir = os.path.join(curr_path, ptype.UPLOAD_TEMP_DIR)
+        try:
+            names = os.listdir(temp_dir)
+        except OSError:
+            return []
+
+        expire_time = time.time() - settings.UPLOAD_SESSION_TTL
+        file_names = {
+            os.path.splitext(name)[0]
+            for name in names
+            if name.endswith((".part", ".state"))
+        }
+        removed: List[str] = []
+        for file_name in file_names:
+            session = cls(curr_path, file_name, 0, 1)
+            if session.last_active() >= expire_time:
+                continue
+            try:
+                session.discard()
+            except OSError as e:
+                sysLogger.warning(f"删除过期的上传任务失败, 文件路径: {session.target_path}, {e}")
+                continue
+            sysLogger.info(f"删除过期的上传任务, 文件路径: {session.target_path}")
+            removed.append(session.target_path)
+        try:
+            os.rmdir(temp_dir)
+        except OSError:
+            # 仍有未过期的上传任务
+            pass
+
+        return removed
+
+    def last_active(self) -> float:
+        """
+        上传任务最后一次接收分片的时间, 状态文件中没有记录时取临时文件的修改时间
+
+        Returns:
+            float: 时间戳, 临时文件及状态文件均不存在时为0
+        """
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return float(json.load(f)["updatedAt"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        try:
+            return os.path.getmtime(self.temp_path)
+        except OSError:
+            return 0
+
+    @property
+    def target_path(self) -> str:
+        """
+        上传完成后的文件路径
+
+        Returns:
+            str: 上传完成后的文件路径
+        """
+        return os.path.join(self.curr_path, self.file_name)
+
+    @property
+    def temp_dir(self) -> str:
+        """
+        存放临时文件及状态文件的隐藏文件夹路径
+
+        Returns:
+            str: 隐藏文件夹路径
+        """
+        return os.path.join(self.curr_path, ptype.UPLOAD_TEMP_DIR)
+
+    @property
+    def temp_path(self) -> str:
+        """
+        上传过程中的临时文件路径
+
+        Returns:
+            str: 上传过程中的临时文件路径
+        """
+        # 各类文件的后缀末尾互不相同, 任意两个文件名加后缀后不会重名
+        return os.path.join(self.temp_dir, f"{self.file_name}.part")
+
+    @property
+    def state_path(self) -> str:
+        """
+        上传任务的状态文件路径, 记录文件大小, 分片大小及已接收分片的位图
+
+        Returns:
+            str: 状态文件路径
+        """
+        return os.path.join(self.temp_dir, f"{self.file_name}.state")
+
+    @property
+    def isComplete(self) -> bool:
+        """
+        是否所有分片均已到达
+
+        Returns:
+            bool: 是否所有分片均已到达
+        """
+        return len(self.received) == self.chunk_count
+
+    def matches(self, file_size: int, chunk_size: int) -> bool:
+        """
+        上传参数是否与当前任务一致
+
+        Args:
+            file_size: 文件总大小
+            chunk_size: 分片大小
+
+        Returns:
+            bool: 是否一致
+        """
+        return self.file_size == file_size and self.chunk_size == chunk_size
+
+    def bitmap(self) -> bytes:
+        """
+        已接收分片的位图, 第i个分片对应第i//8个字节的第i%8位(低位在前)
+
+        Returns:
+            bytes: 位图
+        """
+        bitmap = bytearray((self.chunk_count + 7) // 8)
+        for chunk_id in self.received:
+            bitmap[chunk_id >> 3] |= 1 << (chunk_id & 7)
+
+        return bytes(bitmap)
+
+    def from_bitmap(self, bitmap: bytes) -> Set[int]:
+        """
+        由位图得到已接收的分片索引
+
+        Args:
+            bitmap: 位图
+
+        Returns:
+            Set[int]: 已接收的分片索引
+        """
+        return {
+            chunk_id
+            for chunk_id in range(min(self.chunk_count, len(bitmap) * 8))
+            if bitmap[chunk_id >> 3] & (1 << (chunk_id & 7))
+        }
+
+    def required_space(self) -> int:
+        """
+        完成上传还需占用的磁盘空间, 临时文件已预分配的部分不再计算
+
+        Returns:
+            int: 所需的磁盘空间
+        """
+        try:
+            allocated = os.path.getsize(self.temp_path)
+        except OSError:
+            allocated = 0
+
+        return max(self.file_size - allocated, 0)
+
+    def chunk_range(self, chunk_id: int) -> Optional[Tuple[int, int]]:
+        """
+        分片在文件中的偏移和长度
+
+        Args:
+            chunk_id: 分片索引
+
+        Returns:
+            Optional[Tuple[int, int]]: (偏移, 长度), 分片索引不合法时为None
+        """
+        if chunk_id < 0 or chunk_id >= self.chunk_count:
+            return None
+        offset = chunk_id * self.chunk_size
+        return offset, min(self.chunk_size, self.file_size - offset)
+
+    def prepare(self) -> None:
+        """
+        创建临时文件并按文件总大小预分配空间, 存在阻塞IO, 需在线程中调用
+
+        Returns:
+            None
+        """
+        os.makedirs(self.temp_dir, exist_ok=True)
+        fd = os.open(
+            self.temp_path, os.O_WRONLY | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        )
+        try:
+            if hasattr(os, "posix_fallocate") and self.file_size > 0:
+                try:
+                    os.posix_fallocate(fd, 0, self.file_size)
+                    return
+                except OSError:
+                    pass
+            os.ftruncate(fd, self.file_size)
+        finally:
+            os.close(fd)
+
+    def refresh(self) -> None:
+        """
+        合并状态文件中其他工作进程已接收的分片, 存在阻塞IO, 需在线程中调用
+
+        Returns:
+            None
+        """
+        with self._save_lock, self._state_lock():
+            self.received = self.received | self._saved_received()
+
+    def save(self) -> None:
+        """
+        写入状态文件, 先写临时名称再替换, 避免进程中断时留下不完整的状态;
+        写入前合并状态文件中其他工作进程已接收的分片, 并记录最后活动时间, 存在阻塞IO,
+        需在线程中调用
+
+        Returns:
+            None
+        """
+        with self._save_lock, self._state_lock():
+            self.received = self.received | self._saved_received()
+            state = {
+                "fileSize": self.file_size,
+                "chunkSize": self.chunk_size,
+                "bitmap": base64.b64encode(self.bitmap()).decode("ascii"),
+                "updatedAt": time.time(),
+            }
+            save_path = f"{self.state_path}.tmp"
+            with open(save_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(save_path, self.state_path)
+
+    def _saved_received(self) -> Set[int]:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state: Dict[str, Any] = json.load(f)
+            if not self.matches(state["fileSize"], state["chunkSize"]):
+                return set()
+            return self.from_bitmap(base64.b64decode(state["bitmap"]))
+        except (OSError, ValueError, KeyError, TypeError):
+            return set()
+
+    @contextmanager
+    def _state_lock(self) -> Iterator[None]:
+        """
+        以临时文件加锁, 多个工作进程读写同一状态文件时互斥, 不支持文件锁的系统上只有单个工作进程
+
+        Returns:
+            Iterator[None]: 加锁的上下文
+        """
+        if fcntl is None:
+            yield
+            return
+        try:
+            fd = os.open(self.temp_path, os.O_RDONLY)
+        except OSError:
+            yield
+            return
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def open_chunk(self) -> BinaryIO:
+        """
+        打开临时文件用于写入分片, 每个请求各自打开, 分片可并行写入;
+        临时文件不存在时创建, 因此与预分配之间无先后要求
+
+        Returns:
+            BinaryIO: 临时文件对象
+        """
+        os.makedirs(self.temp_dir, exist_ok=True)
+        fd = os.open(
+            self.temp_path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        )
+        return os.fdopen(fd, "r+b", buffering=0)
+
+    @staticmethod
+    def write_at(file: BinaryIO, offset: int, data: bytes) -> None:
+        """
+        按偏移写入数据, 存在阻塞IO, 需在线程中调用
+
+        Args:
+            file: 临时文件对象
+            offset: 写入的偏移
+            data: 写入的数据
+
+        Returns:
+            None
+        """
+        if hasattr(os, "pwrite"):
+            view = memoryview(data)
+            while view:
+                written = os.pwrite(file.fileno(), view, offset)
+                view = view[written:]
+                offset += written
+        else:
+            file.seek(offset)
+            file.write(data)
+
+    def commit(self) -> None:
+        """
+        落盘并将临时文件重命名为目标文件, 存在阻塞IO, 需在线程中调用
+
+        Returns:
+            None
+        """
+        with open(self.temp_path, "r+b", buffering=0) as f:
+            os.fsync(f.fileno())
+        self._rename_no_replace(self.temp_path, self.target_path)
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+    @staticmethod
+    def _rename_no_replace(src: str, dst: str) -> None:
+        """
+        重命名文件, 目标文件已存在时抛出FileExistsError, 不覆盖检查之后才创建的同名文件
+
+        Args:
+            src: 源文件路径
+            dst: 目标文件路径
+
+        Returns:
+            None
+        """
+        if os.name == "nt":
+            # Windows下目标已存在时rename本身即失败
+            os.rename(src, dst)
+            return
+        try:
+            os.link(src, dst)
+        except FileExistsError:
+            raise
+        except OSError:
+            # 不支持硬链接的文件系统(如FAT/exFAT): 先独占创建目标占位, 再替换该占位
+            os.close(os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_EXCL))
+            os.replace(src, dst)
+            return
+        os.unlink(src)
+
+    def discard(self) -> None:
+        """
+        删除临时文件及状态文件
+
+        Returns:
+            None
+        """
+        for path in (self.temp_path, self.state_path, f"{self.state_path}.tmp"):
+            if os.path.exists(path):
+                os.remove(path)
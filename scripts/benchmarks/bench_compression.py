@@ -0,0 +1,65 @@
+"""
+响应压缩基准测试: 统计文件列表JSON及移动端静态文件在各压缩编码/等级下的压缩率和压缩耗时
+
+用法: python scripts/benchmarks/bench_compression.py [--files 2000] [--rounds 20]
+"""
+import os
+import sys
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, BASE_DIR)
+
+from command.services._compression import AVAILABLE_ENCODINGS, compress
+from command.services._listing_cache import encode_json
+from command.services.http_service import HttpService
+from model.file import DirModel
+from settings import settings
+
+
+def report(name: str, data: bytes, rounds: int) -> None:
+    print(f"{name}: {len(data)} bytes")
+    for encoding in AVAILABLE_ENCODINGS:
+        for level in ("fast", "default", "best"):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                compressed = compress(data, encoding, level)
+            cost = (time.perf_counter() - start) / rounds * 1000
+            print(
+                f"  {encoding} {level}: {len(compressed)} bytes "
+                f"({len(compressed) / len(data):.1%}), {cost:.2f} ms"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=2000, help="文件列表的文件个数")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    # 与服务进程一致, 文件列表中的链接包含端口
+    settings.WSGI_PORT = 8080
+
+    root = tempfile.mkdtemp()
+    try:
+        for index in range(args.files):
+            open(os.path.join(root, f"file_{index}.txt"), "w").close()
+        dirObj = DirModel(root, "hbench")
+        for variant in ("client", "mobile"):
+            data = asyncio.run(HttpService.format_listing(dirObj, variant, None))
+            report(f"file_list {variant}", encode_json(data), args.rounds)
+    finally:
+        shutil.rmtree(root)
+
+    for dir_path, _, files in os.walk(HttpService.STATIC_PATH):
+        for file_name in files:
+            if file_name.endswith((".js", ".css")):
+                with open(os.path.join(dir_path, file_name), "rb") as f:
+                    report(file_name, f.read(), 1)
+
+
+if __name__ == "__main__":
+    main()
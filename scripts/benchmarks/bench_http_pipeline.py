@@ -0,0 +1,192 @@
+"""
+HTTP请求处理基准测试: 统计文件列表/小文件下载的每秒请求数及大文件下载的吞吐量(MB/s)
+默认在当前进程中运行服务; 指定--workers时通过服务进程管理器开启对应个数的HTTP工作进程,
+可配合--clients用多个客户端进程施压, 对比吞吐量随工作进程数的变化
+
+用法: python scripts/benchmarks/bench_http_pipeline.py [--requests 2000] [--concurrency 32] [--size 256]
+      python scripts/benchmarks/bench_http_pipeline.py --workers 4 --clients 4
+      python scripts/benchmarks/bench_http_pipeline.py --profile throughput
+"""
+import os
+import sys
+import time
+import shutil
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+from typing import Callable, Tuple, Optional
+from multiprocessing import Queue, Pool
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, BASE_DIR)
+
+import aiohttp
+import uvicorn
+from fastapi import FastAPI
+
+from command.manage import ServiceProcessManager
+from command.services.http_service import HttpService
+from model.file import FileModel, DirModel
+from model.public_types import ServingProfile
+from settings import settings
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def bench_shares(root: str, large_path: str) -> list:
+    return [
+        DirModel(root, "hbench"),
+        FileModel(os.path.join(root, "small.bin"), "hsmall"),
+        FileModel(large_path, "hlarge"),
+    ]
+
+
+def start_server(
+    root: str, large_path: str, profile: Optional[ServingProfile] = None
+) -> Tuple[str, Callable[[], None]]:
+    # 与服务进程的run一致, 文件列表中的链接依赖该端口
+    settings.WSGI_PORT = free_port()
+    service = HttpService(Queue(), Queue())
+    service._app = FastAPI()
+    service._setup()
+    for fileObj in bench_shares(root, large_path):
+        service._add_share(fileObj)
+    server = uvicorn.Server(
+        uvicorn.Config(
+            service._app,
+            host="127.0.0.1",
+            port=settings.WSGI_PORT,
+            log_level="error",
+            **HttpService.serving_options(profile),
+        )
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    def stop() -> None:
+        server.should_exit = True
+
+    return f"http://127.0.0.1:{settings.WSGI_PORT}", stop
+
+
+def start_workers(
+    root: str, large_path: str, workers: int
+) -> Tuple[str, Callable[[], None]]:
+    settings.LOCAL_HOST = "127.0.0.1"
+    settings.HTTP_WORKERS = workers
+    # 与主程序启动时的环境校验一致, 预先确定HTTP端口
+    settings.init_wsgi_port()
+    output_q = Queue()
+    manager = ServiceProcessManager(output_q)
+    with manager.batch():
+        for fileObj in bench_shares(root, large_path):
+            manager.add_share(fileObj)
+    while True:
+        result_type, result_msg = output_q.get(timeout=30)
+        if result_type == "ack" and manager.acknowledge(*result_msg)[0]:
+            break
+
+    return f"http://127.0.0.1:{settings.WSGI_PORT}", manager.close_all
+
+
+async def measure_requests(url: str, number: int, concurrency: int) -> float:
+    async with aiohttp.ClientSession() as session:
+
+        async def worker(count: int) -> None:
+            for _ in range(count):
+                async with session.get(url) as response:
+                    await response.read()
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *[worker(number // concurrency) for _ in range(concurrency)]
+        )
+        return number // concurrency * concurrency / (time.perf_counter() - start)
+
+
+def run_client(url: str, number: int, concurrency: int) -> float:
+    return asyncio.run(measure_requests(url, number, concurrency))
+
+
+def measure_clients(url: str, number: int, concurrency: int, clients: int) -> float:
+    if clients <= 1:
+        return run_client(url, number, concurrency)
+    with Pool(clients) as pool:
+        return sum(
+            pool.starmap(run_client, [(url, number // clients, concurrency)] * clients)
+        )
+
+
+async def measure_throughput(url: str, rounds: int) -> float:
+    timeout = aiohttp.ClientTimeout(total=None)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        total, start = 0, time.perf_counter()
+        for _ in range(rounds):
+            async with session.get(url) as response:
+                async for chunk in response.content.iter_chunked(1048576):
+                    total += len(chunk)
+        return total / 1048576 / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--size", type=int, default=256, help="大文件大小(MB)")
+    parser.add_argument("--rounds", type=int, default=3, help="大文件下载次数")
+    parser.add_argument(
+        "--workers", type=int, default=0, help="HTTP工作进程数, 为0时在当前进程中运行服务"
+    )
+    parser.add_argument("--clients", type=int, default=1, help="客户端进程数")
+    parser.add_argument(
+        "--profile",
+        choices=[profile.value for profile in ServingProfile],
+        default=settings.HTTP_SERVING_PROFILE.value,
+        help="HTTP服务运行方案",
+    )
+    args = parser.parse_args()
+    # 不写入访问日志, 避免日志IO影响统计结果
+    settings.SAVE_SHARER_LOG = False
+    settings.HTTP_SERVING_PROFILE = ServingProfile(args.profile)
+
+    root = tempfile.mkdtemp()
+    try:
+        with open(os.path.join(root, "small.bin"), "wb") as f:
+            f.write(os.urandom(4096))
+        large_path = os.path.join(root, "large.bin")
+        with open(large_path, "wb") as f:
+            block = os.urandom(1048576)
+            for _ in range(args.size):
+                f.write(block)
+        if args.workers > 0:
+            base_url, stop = start_workers(root, large_path, args.workers)
+        else:
+            base_url, stop = start_server(root, large_path)
+        print(f"profile: {args.profile}, {HttpService.serving_options()}")
+
+        for name, uri in (
+            ("file_list", "/file_list/hbench"),
+            ("download 4KB", "/download/hsmall"),
+        ):
+            rps = measure_clients(
+                base_url + uri, args.requests, args.concurrency, args.clients
+            )
+            print(f"{name}: {rps:.0f} req/s")
+        mbps = asyncio.run(
+            measure_throughput(base_url + "/download/hlarge", args.rounds)
+        )
+        print(f"download {args.size}MB: {mbps:.0f} MB/s")
+        stop()
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
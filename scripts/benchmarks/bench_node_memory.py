@@ -0,0 +1,115 @@
+"""
+分享节点内存基准测试: 统计读取整个文件夹树后每个文件/文件夹对象占用的字节数,
+并与git历史中指定版本的文件/文件夹模型读取同一文件夹树的结果对比
+
+用法: python scripts/benchmarks/bench_node_memory.py [--dirs 100] [--files 500] [--shares 1]
+      [--baseline 028db92^]
+"""
+import os
+import sys
+import shutil
+import types
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, BASE_DIR)
+
+from model.file import DirModel
+from settings import settings
+
+# 精简节点(__slots__及父级引用)之前的提交
+BASELINE_REV = "028db92^"
+
+
+def build_tree(root: str, dirs: int, files: int) -> None:
+    for dir_index in range(dirs):
+        dir_path = os.path.join(root, f"dir_{dir_index}")
+        os.mkdir(dir_path)
+        for file_index in range(files):
+            open(os.path.join(dir_path, f"file_{file_index}.txt"), "w").close()
+
+
+def load_revision_module(rev: str, path: str, **overrides) -> types.ModuleType:
+    """
+    从git历史中加载指定版本的模块, 不影响当前已导入的同名模块
+
+    Args:
+        rev: git版本
+        path: 模块相对于项目根目录的路径
+        **overrides: 加载后替换的模块属性, 用于指定同一版本的依赖模块
+
+    Returns:
+        types.ModuleType: 加载的模块
+    """
+    source = subprocess.run(
+        ["git", "-C", BASE_DIR, "show", f"{rev}:{path}"],
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        check=True,
+    ).stdout
+    module = types.ModuleType(f"{rev}:{path}")
+    exec(compile(source, f"{rev}:{path}", "exec"), module.__dict__)
+    module.__dict__.update(overrides)
+    return module
+
+
+def materialize(dirObj: DirModel) -> int:
+    count, stack = 0, [dirObj]
+    while stack:
+        currObj = stack.pop()
+        for child in currObj.children:
+            count += 1
+            if child.isDir:
+                stack.append(child)
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dirs", type=int, default=100)
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--shares", type=int, default=1, help="同时分享同一文件夹的分享个数")
+    parser.add_argument("--baseline", default=BASELINE_REV, help="作为对比基准的git版本")
+    args = parser.parse_args()
+    # 避免子级被LRU释放影响统计
+    settings.DIR_CHILDREN_CACHE_SIZE = args.dirs * args.shares + args.shares
+    # 基准版本的模型依赖同一版本的公共类型
+    baseline_ptype = load_revision_module(args.baseline, "model/public_types.py")
+    baseline_file = load_revision_module(
+        args.baseline, "model/file.py", ptype=baseline_ptype
+    )
+
+    root = tempfile.mkdtemp()
+    try:
+        build_tree(root, args.dirs, args.files)
+        results = []
+        for name, dirModel in (
+            (f"before ({args.baseline})", baseline_file.DirModel),
+            ("after (HEAD)", DirModel),
+        ):
+            tracemalloc.start()
+            shares, nodes = [], 0
+            for index in range(args.shares):
+                dirObj = dirModel(root, f"hbench{index}")
+                nodes += materialize(dirObj)
+                shares.append(dirObj)
+            size, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results.append((name, size, nodes))
+            del shares, dirObj
+
+        for name, size, nodes in results:
+            print(
+                f"{name}: shares {args.shares}, nodes {nodes}, "
+                f"total {size / 1048576:.2f} MB, per node {size / nodes:.1f} bytes"
+            )
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+HTTP服务运行方案对比基准测试: 依次以各运行方案开启服务, 统计复用连接和每个请求新建连接
+(模拟大量手机端短请求)时文件列表/小文件下载的每秒请求数, 以及超出并发上限时被拒绝(503)的请求数
+
+用法: python scripts/benchmarks/bench_serving_profiles.py [--requests 2000] [--concurrency 64]
+      python scripts/benchmarks/bench_serving_profiles.py --profiles compat throughput
+"""
+import os
+import sys
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+from typing import Tuple
+from multiprocessing import Process, Queue
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, BASE_DIR)
+
+import aiohttp
+
+from bench_http_pipeline import start_server
+from command.services.http_service import HttpService
+from model.public_types import ServingProfile
+from settings import settings
+
+
+def serve(root: str, profile: ServingProfile, base_url_q: Queue) -> None:
+    # 每个运行方案在独立进程中开启服务, 避免事件循环策略相互影响
+    settings.SAVE_SHARER_LOG = False
+    base_url, _ = start_server(root, os.path.join(root, "small.bin"), profile)
+    base_url_q.put(base_url)
+    while True:
+        time.sleep(60)
+
+
+async def measure_requests(
+    url: str, number: int, concurrency: int, keep_alive: bool
+) -> Tuple[float, int]:
+    connector = aiohttp.TCPConnector(limit=0, force_close=not keep_alive)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        rejected = 0
+
+        async def worker(count: int) -> None:
+            nonlocal rejected
+            for _ in range(count):
+                async with session.get(url) as response:
+                    await response.read()
+                    if response.status == 503:
+                        rejected += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *[worker(number // concurrency) for _ in range(concurrency)]
+        )
+        rps = number // concurrency * concurrency / (time.perf_counter() - start)
+        return rps, rejected
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument(
+        "--profiles",
+        nargs="+",
+        choices=[profile.value for profile in ServingProfile],
+        default=[profile.value for profile in ServingProfile],
+    )
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    try:
+        with open(os.path.join(root, "small.bin"), "wb") as f:
+            f.write(os.urandom(4096))
+        for profile in map(ServingProfile, args.profiles):
+            base_url_q = Queue()
+            process = Process(
+                target=serve, args=(root, profile, base_url_q), daemon=True
+            )
+            process.start()
+            base_url = base_url_q.get(timeout=30)
+            print(f"{profile.value}: {HttpService.serving_options(profile)}")
+            for name, uri in (
+                ("file_list", "/file_list/hbench"),
+                ("download 4KB", "/download/hsmall"),
+            ):
+                for keep_alive in (True, False):
+                    rps, rejected = asyncio.run(
+                        measure_requests(
+                            base_url + uri, args.requests, args.concurrency, keep_alive
+                        )
+                    )
+                    print(
+                        f"  {name} ({'keep-alive' if keep_alive else 'short'}): "
+                        f"{rps:.0f} req/s, rejected: {rejected}"
+                    )
+            process.terminate()
+            process.join()
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
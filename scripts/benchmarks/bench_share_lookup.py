@@ -0,0 +1,79 @@
+"""
+分享节点查找基准测试: 对比逐级递归查找与扁平索引查找在深层目录下的耗时
+
+用法: python scripts/benchmarks/bench_share_lookup.py [--depth 20] [--width 3]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, BASE_DIR)
+
+from model.file import DirModel
+from model.sharing import SharingModel
+
+
+def build_tree(root: str, depth: int, width: int) -> None:
+    curr_path = root
+    for level in range(depth):
+        for index in range(width):
+            with open(os.path.join(curr_path, f"file_{level}_{index}.txt"), "w") as f:
+                f.write("x")
+        curr_path = os.path.join(curr_path, f"dir_{level}")
+        os.mkdir(curr_path)
+    with open(os.path.join(curr_path, "target.txt"), "w") as f:
+        f.write("x")
+
+
+def recursive_lookup(sharing: SharingModel, uuid: str):
+    parent_uuid, *child_uuids = uuid.split(">")
+    fileObj = sharing.get(parent_uuid)
+    for child_uuid in child_uuids:
+        if fileObj is None or not fileObj.isDir:
+            return None
+        fileObj = fileObj.get(child_uuid)
+    return fileObj
+
+
+def timeit(func, *args, number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        func(*args)
+    return (time.perf_counter() - start) / number * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--depth", type=int, default=20)
+    parser.add_argument("--width", type=int, default=3)
+    parser.add_argument("--number", type=int, default=100000)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    try:
+        build_tree(root, args.depth, args.width)
+        sharing = SharingModel()
+        dirObj = DirModel(root, "hbench")
+        sharing[dirObj.uuid] = dirObj
+
+        deepest = dirObj
+        while any(child.isDir for child in deepest.children):
+            deepest = [child for child in deepest.children if child.isDir][0]
+        target = deepest.children[0].uuid
+        assert sharing.lookup(target) is recursive_lookup(sharing, target)
+
+        print(f"depth: {args.depth}, uuid length: {len(target)}")
+        recursive = timeit(recursive_lookup, sharing, target, number=args.number)
+        print(f"recursive lookup: {recursive:.3f} us")
+        flat = timeit(sharing.lookup, target, number=args.number)
+        print(f"flat index lookup: {flat:.3f} us")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,7 @@ from utils.public_func import (
 )
 from model.public_types import (
     ThemeColor as themeColor,
+    ServingProfile as servingProfile,
     ColorCardStruct,
     ControlColorStruct,
 )
@@ -133,6 +134,16 @@ class FuseSettings:
         self._wrapper.THEME_OPACITY = (
             theme_opacity if isinstance(theme_opacity, int) else 99
         )
+        http_workers = settings_config.get("httpWorkers", 1)
+        self._wrapper.HTTP_WORKERS = (
+            http_workers if isinstance(http_workers, int) and http_workers > 0 else 1
+        )
+        serving_profile = servingProfile.dispatch(
+            settings_config.get("httpServingProfile", "balanced")
+        )
+        self._wrapper.HTTP_SERVING_PROFILE = (
+            serving_profile or self.HTTP_SERVING_PROFILE
+        )
         color_card_map = generate_color_card_map()
         self._wrapper.COLOR_CARD = ColorCardStruct.dispatch(**color_card_map)
         sysLogger.debug("读取配置完成")
@@ -168,6 +179,8 @@ class FuseSettings:
                     "downloadPath": self.DOWNLOAD_DIR,
                     "theme_color": self.THEME_COLOR.name,
                     "theme_opacity": self.THEME_OPACITY,
+                    "httpWorkers": self.HTTP_WORKERS,
+                    "httpServingProfile": self.HTTP_SERVING_PROFILE.value,
                 }
             }
         )
@@ -8,7 +8,7 @@ from utils.public_func import (
     generate_product_version,
     generate_secret_key,
 )
-from model.public_types import ThemeColor, ColorCardStruct
+from model.public_types import ThemeColor, ColorCardStruct, ServingProfile
 
 """
 请移步 `development.py` 或 `production.py` 修改配置, 配置名称字母均大写才有效
@@ -64,6 +64,98 @@ COLOR_CARD: ColorCardStruct = ColorCardStruct.dispatch()
 # 随机的盐值
 SECRET_KEY = generate_secret_key()
 
+# 会话令牌有效期(秒), 移动端凭据校验通过后在有效期内无需重复校验
+SESSION_TOKEN_TTL: int = 1800
+
+# 上传任务的过期时间(秒), 超过该时间未接收分片的上传任务视为已放弃, 删除其预分配的临时文件
+UPLOAD_SESSION_TTL: int = 24 * 60 * 60
+
+# 凭据校验线程池大小
+CREDENTIALS_POOL_SIZE: int = 2
+
+# 凭据校验最大排队数, 超过后直接返回服务繁忙
+CREDENTIALS_QUEUE_LENGTH: int = 8
+
+# 每个进程最多缓存子级的文件夹个数, 超过后最久未访问的文件夹释放子级, 再次访问时重新读取
+DIR_CHILDREN_CACHE_SIZE: int = 4096
+
+# 文件列表序列化结果缓存的最大字节数
+LISTING_CACHE_BYTES: int = 32 * 1024 * 1024
+
+# 文件元数据(stat)缓存的有效期(秒)
+STAT_CACHE_TTL: float = 2.0
+
+# 文件元数据(stat)缓存的最大条目数
+STAT_CACHE_SIZE: int = 65536
+
+# Linux下inotify监听文件夹的最大个数, 超过后仅按有效期失效
+STAT_CACHE_MAX_WATCHES: int = 1024
+
+# 浏览次数汇总上报的间隔(秒), 间隔内同一分享的浏览次数合并为一条消息
+BROWSE_FLUSH_INTERVAL: float = 0.5
+
+# 历史分享记录日志的记录条数超过该值且超过分享个数的两倍时, 在后台压缩为每个分享一条记录
+SHARE_JOURNAL_COMPACT_RECORDS: int = 1000
+
+# 后台统计分享文件个数的并行线程数
+SHARE_INDEX_WORKERS: int = 4
+
+# 分享的文件夹内文件个数超过该值时提示打包后再分享, 统计到该值即停止
+SHARE_FILE_COUNT_WARNING: int = 10000
+
+# HTTP服务的工作进程数, 大于1时各进程以端口复用(SO_REUSEPORT)方式监听同一端口, 不支持的系统上只开启1个
+HTTP_WORKERS: int = 1
+
+# 小于该字节数的文件列表/静态文件不压缩
+COMPRESS_MIN_BYTES: int = 1024
+
+# 小于该字节数的文件列表在事件循环中直接压缩(耗时在1毫秒左右), 不小于时放到线程池中压缩
+LISTING_COMPRESS_INLINE_BYTES: int = 64 * 1024
+
+# 不小于该字节数的文件列表改用最快的压缩等级
+LISTING_COMPRESS_FAST_BYTES: int = 1024 * 1024
+
+# 预压缩的移动端静态文件缓存路径, 源文件未修改时启动服务直接复用
+STATIC_COMPRESS_CACHE_DIR: str = os.path.join(BASE_DIR, "cache", "static")
+
+# 文件名含内容哈希的移动端静态文件的缓存有效期(秒)
+STATIC_IMMUTABLE_MAX_AGE: int = 365 * 24 * 60 * 60
+
+# 每个进程缓存的移动端入口页个数, 按(BASE_URL, uuid)缓存渲染结果
+START_PAGE_CACHE_SIZE: int = 256
+
+# HTTP服务的运行方案, compat: 纯Python实现的事件循环和解析器及uvicorn默认参数, 用于排查兼容问题;
+# balanced: 优先使用uvloop/httptools, 适当延长长连接并限制并发连接数; throughput: 面向大量手机端短请求
+HTTP_SERVING_PROFILE: ServingProfile = ServingProfile.balanced
+
+# 各运行方案的uvicorn参数, loop/http为auto时优先使用已安装的uvloop/httptools, 未安装时回退到asyncio/h11
+# backlog: 监听队列长度; timeout_keep_alive: 长连接空闲超时(秒); limit_concurrency: 最大并发连接(及任务)数;
+# h11_max_incomplete_event_size: 使用h11时单个连接缓存的不完整请求头上限(字节), 超出时拒绝该请求, 仅对h11生效;
+# balanced放宽到32KB以容纳较长的中文文件名链接, throughput并发连接多, 保持16KB以限制缓存占用的内存
+HTTP_SERVING_PROFILES: dict = {
+    ServingProfile.compat: {
+        "loop": "asyncio",
+        "http": "h11",
+        "h11_max_incomplete_event_size": 16 * 1024,
+    },
+    ServingProfile.balanced: {
+        "loop": "auto",
+        "http": "auto",
+        "backlog": 2048,
+        "timeout_keep_alive": 15,
+        "limit_concurrency": 512,
+        "h11_max_incomplete_event_size": 32 * 1024,
+    },
+    ServingProfile.throughput: {
+        "loop": "auto",
+        "http": "auto",
+        "backlog": 4096,
+        "timeout_keep_alive": 30,
+        "limit_concurrency": 2048,
+        "h11_max_incomplete_event_size": 16 * 1024,
+    },
+}
+
 # 基本样式
 BASIC_QSS = """
 /* ///////////////////////////////////////////////////////////////////////////////
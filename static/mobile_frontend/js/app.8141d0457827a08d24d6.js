@@ -1,2 +0,0 @@
-webpackJsonp([6],{"0RrJ":function(e,t,r){"use strict";var n=r("mtWM").a.create({baseURL:"http://127.0.0.1",timeout:5e3});n.interceptors.request.use(function(e){return e},function(e){return e}),n.interceptors.response.use(function(e){return e.data},function(e){return e}),t.a=n},"59kE":function(e,t,r){"use strict";t.b=function(e){return i.a.get("/file_size/"+e)},r.d(t,"a",function(){return c});var n=r("Xxa5"),a=r.n(n),u=r("exGp"),s=r.n(u),i=r("0RrJ");var o,c=(o=s()(a.a.mark(function e(t,r,n,u,s){var o,c,d,l=arguments.length>5&&void 0!==arguments[5]&&arguments[5];return a.a.wrap(function(e){for(;;)switch(e.prev=e.next){case 0:return o=l?"/download/"+t+"?hit_log=true":"/download/"+t,e.next=3,i.a.post(o,{secret_key:r,ciphertext:n},{headers:{Range:"bytes="+u+"-"+s},responseType:"blob"});case 3:if(void 0==(c=e.sent).errno){e.next=6;break}return e.abrupt("return",{succed:!1,data:c.errmsg});case 6:if(!(!c instanceof Blob)){e.next=8;break}return e.abrupt("return",{succed:!1,data:"后端异常, 返回非预期数据类型"});case 8:if(!((d=s-u)>0&&d!=c.size)){e.next=11;break}return e.abrupt("return",{succed:!1,data:"下载片段失败, 服务器网络异常"});case 11:return e.abrupt("return",{succed:!0,data:c});case 12:case"end":return e.stop()}},e,this)})),function(e,t,r,n,a){return o.apply(this,arguments)})},NHnr:function(e,t,r){"use strict";Object.defineProperty(t,"__esModule",{value:!0});var n=r("7+uW"),a=(r("tvR6"),r("Dd8w")),u=r.n(a),s=r("0RrJ"),i={render:function(){var e=this,t=e.$createElement,r=e._self._c||t;return r("el-menu",{attrs:{collapse:e.isCollapse,"default-active":e.$route.path}},[r("el-menu-item",{attrs:{index:"/browse"},on:{click:function(t){return e.itemClick("/browse")}}},[r("i",{staticClass:"el-icon-mobile-phone"}),e._v(" "),r("span",{attrs:{slot:"title"},slot:"title"},[e._v("文件列表")])]),e._v(" "),r("el-menu-item",{attrs:{index:"/history"},on:{click:function(t){return e.itemClick("/history")}}},[r("i",{staticClass:"el-icon-time"}),e._v(" "),r("span",{attrs:{slot:"title"},slot:"title"},[e._v("浏览历史")])]),e._v(" "),r("el-menu-item",{attrs:{index:"/downloads"},on:{click:function(t){return e.itemClick("/downloads")}}},[r("i",{staticClass:"el-icon-download"}),e._v(" "),r("span",{attrs:{slot:"title"},slot:"title"},[e._v("下载记录")])]),e._v(" "),r("el-menu-item",{attrs:{index:"/uploads"},on:{click:function(t){return e.itemClick("/uploads")}}},[r("i",{staticClass:"el-icon-upload2"}),e._v(" "),r("span",{attrs:{slot:"title"},slot:"title"},[e._v("上传记录")])]),e._v(" "),r("el-menu-item",{attrs:{index:"/settings"},on:{click:function(t){return e.itemClick("/settings")}}},[r("i",{staticClass:"el-icon-setting"}),e._v(" "),r("span",{attrs:{slot:"title"},slot:"title"},[e._v("设置")])])],1)},staticRenderFns:[]};var o=r("VU/8")({name:"MenuBar",data:function(){return{isCollapse:!0}},methods:{itemClick:function(e){this.$router.replace(e)}}},i,!1,function(e){r("gUnV")},"data-v-5e29923c",null).exports,c=r("NYxO"),d={name:"App",components:{MenuBar:o},data:function(){return{show_backup:!0,show_msg_box:!0}},created:function(){this.PAUSE_ALL_DOWNLOAD_HISTORY(),this.PAUSE_ALL_UPLOAD_HISTORY(),document.title="File-Sharer"},mounted:function(){var e=this,t=document.getElementById("baseUrl").innerText;s.a.defaults.baseURL=t,this.$alert("请勿在任何情况下刷新页面,否则上传/下载会暂停(下载进度也会消失),且需重新扫码!!!","温馨提示",{showClose:!1,center:!0,confirmButtonText:"确定并进入",callback:function(t){e.show_msg_box=!1,e.$store.dispatch("GEN_CHUNK_SIZE"),e.$router.replace("/browse")}})},methods:u()({},Object(c.c)(["PAUSE_ALL_DOWNLOAD_HISTORY","PAUSE_ALL_UPLOAD_HISTORY"]))},l={render:function(){var e=this.$createElement,t=this._self._c||e;return t("div",{attrs:{id:"app"}},[t("div",[this.show_msg_box?this._e():t("el-container",[t("el-header",{attrs:{height:"40px"}},[this._v("File-Sharer")]),this._v(" "),t("el-container",[t("el-aside",{attrs:{width:"65px"}},[t("menu-bar")],1),this._v(" "),t("el-main",[t("router-view")],1)],1)],1)],1)])},staticRenderFns:[]};var _=r("VU/8")(d,l,!1,function(e){r("r8W7")},null,null).exports,p=r("/ocq");n.default.use(p.a);var f=p.a.prototype.push;p.a.prototype.push=function(e){return f.call(this,e).catch(function(e){})};var h=p.a.prototype.replace;p.a.prototype.replace=function(e){return h.call(this,e).catch(function(e){})};var m,O,v,A=new p.a({routes:[{path:"/browse",name:"Browse",component:function(){return r.e(0).then(r.bind(null,"10yi"))}},{path:"/history",name:"History",component:function(){return r.e(3).then(r.bind(null,"bSHD"))}},{path:"/downloads",name:"Downloads",component:function(){return r.e(2).then(r.bind(null,"kcPi"))}},{path:"/uploads",name:"Uploads",component:function(){return r.e(1).then(r.bind(null,"Ir6P"))}},{path:"/settings",name:"Settings",component:function(){return r.e(4).then(r.bind(null,"EXBt"))}}],mode:"history"}),D=r("Xxa5"),b=r.n(D),k=r("Gu7T"),E=r.n(k),w=r("exGp"),T=r.n(w),y=r("d7EF"),x=r.n(y),S=r("gRE1"),L=r.n(S),U=r("mvHQ"),R=r.n(U),I={set:function(e,t){localStorage.setItem(e,t)},get:function(e){return localStorage.getItem(e)},remove:function(e){localStorage.removeItem(e)},clear:function(){localStorage.clear()},BROWSE_PARAMS:"fileSharer_browse_params",BROWSE_HISTORY:"fileSharer_browse_history",DOWNLOAD_HISTORY:"fileSharer_download_history",UPLOAD_HISTORY:"fileSharer_upload_history"},P=r("Nncb"),g=r("59kE"),M=(m=T()(b.a.mark(function e(t,r,n,a,u,i,o){var c,d,l,_=arguments.length>7&&void 0!==arguments[7]&&arguments[7];return b.a.wrap(function(e){for(;;)switch(e.prev=e.next){case 0:return c=_?"/upload/"+t+"?hit_log=true":"/upload/"+t,(d=new FormData).append("secret_key",r),d.append("ciphertext",n),d.append("file",a),d.append("file_name",u),d.append("chunk_id",i),d.append("curr_path",o),e.next=10,s.a.post(c,d,{headers:{"Content-Type":"multipart/form-data"}});case 10:if(200==(l=e.sent).errno||4006==l.errno){e.next=13;break}return e.abrupt("return",{succed:!1,data:l.errmsg});case 13:return e.abrupt("return",{succed:!0,data:l.errmsg});case 14:case"end":return e.stop()}},e,this)})),function(e,t,r,n,a,u,s){return m.apply(this,arguments)}),H=(O=T()(b.a.mark(function e(t,r,n,a,u,i){var o,c;return b.a.wrap(function(e){for(;;)switch(e.prev=e.next){case 0:return(o=new FormData).append("secret_key",r),o.append("ciphertext",n),o.append("file_name",a),o.append("chunk_count",u),o.append("curr_path",i),e.next=8,s.a.post("/upload/merge/"+t,o,{headers:{"Content-Type":"multipart/form-data"}});case 8:if(200==(c=e.sent).errno){e.next=11;break}return e.abrupt("return",{succed:!1,data:c.errmsg});case 11:return e.abrupt("return",{succed:!0,data:c.errmsg});case 12:case"end":return e.stop()}},e,this)})),function(e,t,r,n,a,u){return O.apply(this,arguments)}),W=(v=T()(b.a.mark(function e(t,r,n,a,u){var i,o;return b.a.wrap(function(e){for(;;)switch(e.prev=e.next){case 0:return(i=new FormData).append("secret_key",r),i.append("ciphertext",n),i.append("file_name",a),i.append("curr_path",u),e.next=7,s.a.post("/upload/remove/"+t,i,{headers:{"Content-Type":"multipart/form-data"}});case 7:if(200==(o=e.sent).errno){e.next=10;break}return e.abrupt("return",{succed:!1,data:o.errmsg});case 10:return e.abrupt("return",{succed:!0,data:o.errmsg});case 11:case"end":return e.stop()}},e,this)})),function(e,t,r,n,a){return v.apply(this,arguments)}),N=r("pFYg"),Y=r.n(N);function C(e){if("object"!==(void 0===e?"undefined":Y()(e))||null===e)return e;var t=void 0;if(Array.isArray(e)){t=[];for(var r=0;r<e.length;r++)t.push(C(e[r]))}else for(var n in t={},e)e.hasOwnProperty(n)&&(t[n]=C(e[n]));return t}function B(e){if(null==e)return e;var t={};return L()(e).forEach(function(e){var r=C(e);r.merged?r.succed_chunks=new Array(r.chunk_count).fill(0):r.succed_chunks=[],t[r.uuid]=r}),t}function z(e,t){var r=new Blob(e),n=document.createElement("a"),a=window.URL.createObjectURL(r);n.href=a,n.download=t,document.body.appendChild(n),n.click(),document.body.removeChild(n),window.URL.revokeObjectURL(a)}function F(e){if(null==e)return e;var t={};return L()(e).forEach(function(e){var r=C(e);r.file=null,t[r.file_id]=r}),t}function $(e){return e>1e3?524288:e>500?1048576:e>200?2097152:e>100?5242880:10485760}n.default.use(c.a);var j=new c.a.Store({strict:!1,state:{browse_params:JSON.parse(I.get(I.BROWSE_PARAMS)),browse_history:JSON.parse(I.get(I.BROWSE_HISTORY)),download_history:JSON.parse(I.get(I.DOWNLOAD_HISTORY)),upload_history:JSON.parse(I.get(I.UPLOAD_HISTORY)),Dchunk_size:1048576,Uchunk_size:1048576},mutations:{SET_BROWSE_PARAMS:function(e,t){e.browse_params=t,I.set(I.BROWSE_PARAMS,R()(t))},SET_BROWSE_HISTORY:function(e,t){e.browse_history=t,I.set(I.BROWSE_HISTORY,R()(t))},UPDATE_BROWSE_HISTORY:function(e,t){var r=e.browse_history;if(null==r)r=[t];else{var n=r.findIndex(function(e){return e.uuid==t.uuid});-1!=n?r.splice(n,1,t):r.push(t)}e.browse_history=r,I.set(I.BROWSE_HISTORY,R()(r))},REMOVE_BROWSE_HISTORY:function(e,t){var r=e.browse_history;if(null!=r){var n=r.findIndex(function(e){return e.uuid==t});-1!=n&&(r.splice(n,1),e.browse_history=r,I.set(I.BROWSE_HISTORY,R()(r)))}},CLEAR_BROWSE_HISTORY:function(e){e.browse_history=null,I.remove(I.BROWSE_HISTORY)},UPDATE_DOWNLOAD_HISTORY:function(e,t){var r=e.download_history;null==r&&(r={}),n.default.set(r,t.uuid,t),e.download_history=r;var a=B(r);I.set(I.DOWNLOAD_HISTORY,R()(a))},UPDATE_DOWNLOAD_ITEM:function(e,t){var r=e.download_history;if(null!=r){var a=t.uuid,s=t.data,i=r[a];if(void 0!=i){var o=u()({},i,s);n.default.set(r,a,o)}e.download_history=r;var c=B(r);I.set(I.DOWNLOAD_HISTORY,R()(c))}},PAUSE_DOWNLOAD_ITEM:function(e,t){var r=e.download_history;if(null!=r){var n=r[t];if(void 0!=n){n.is_pause=!0,e.download_history=r;var a=B(r);I.set(I.DOWNLOAD_HISTORY,R()(a))}}},REMOVE_DOWNLOAD_ITEM:function(e,t){var r=e.download_history;if(null!=r&&void 0!=r[t]){n.default.delete(r,t),e.download_history=r;var a=B(r);I.set(I.DOWNLOAD_HISTORY,R()(a))}},PAUSE_ALL_DOWNLOAD_HISTORY:function(e){var t=e.download_history;if(null!=t){L()(t).forEach(function(e){e.merged||(e.is_pause=!0)}),e.download_history=t;var r=B(t);I.set(I.DOWNLOAD_HISTORY,R()(r))}},CLEAR_DOWNLOAD_HISTORY:function(e){e.download_history=null,I.remove(I.DOWNLOAD_HISTORY)},UPDATE_UPLOAD_HISTORY:function(e,t){var r=e.upload_history;null==r&&(r={}),n.default.set(r,t.file_id,t),e.upload_history=r;var a=F(r);I.set(I.UPLOAD_HISTORY,R()(a))},UPDATE_UPLOAD_ITEM:function(e,t){var r=e.upload_history;if(null!=r){var a=t.file_id,s=t.data,i=r[a];if(void 0!=i){var o=u()({},i,s);n.default.set(r,a,o)}e.upload_history=r;var c=F(r);I.set(I.UPLOAD_HISTORY,R()(c))}},PAUSE_UPLOAD_ITEM:function(e,t){var r=e.upload_history;if(null!=r){var n=r[t];if(void 0!=n){n.is_pause=!0,e.upload_history=r;var a=F(r);I.set(I.UPLOAD_HISTORY,R()(a))}}},REMOVE_UPLOAD_ITEM:function(e,t){var r=e.upload_history;if(null!=r&&void 0!=r[t]){n.default.delete(r,t),e.upload_history=r;var a=F(r);I.set(I.UPLOAD_HISTORY,R()(a))}},PAUSE_ALL_UPLOAD_HISTORY:function(e){var t=e.upload_history;if(null!=t){L()(t).forEach(function(e){e.merged||(e.is_pause=!0)}),e.upload_history=t;var r=F(t);I.set(I.UPLOAD_HISTORY,R()(r))}},CLEAR_UPLOAD_HISTORY:function(e){e.upload_history=null,I.remove(I.UPLOAD_HISTORY)},UPDATE_CHUNK_SIZE:function(e,t){var r=x()(t,2),n=r[0],a=r[1];0!=n&&(e.Dchunk_size=n),0!=a&&(e.Uchunk_size=a)}},actions:{START_DOWNLOAD_FILE:function(e,t){var r=this;return T()(b.a.mark(function n(){var a,u,s,i,o,c;return b.a.wrap(function(r){for(;;)switch(r.prev=r.next){case 0:if(null!=(a=e.state.download_history)&&void 0!=a[t]){r.next=3;break}return r.abrupt("return");case 3:u=a[t],e.commit("UPDATE_DOWNLOAD_ITEM",{uuid:t,data:{succed_chunks:[]}}),s=0;case 6:if(!(s<u.chunk_count)){r.next=21;break}if(!e.state.download_history[t].is_pause){r.next=9;break}return r.abrupt("return");case 9:return i=s*u.chunk_size,o=Math.min(i+u.chunk_size,u.file_size),r.next=13,Object(g.a)(u.uuid,u.secret_key,u.pwd,i,o,0==s);case 13:if((c=r.sent).succed){r.next=17;break}return e.commit("UPDATE_DOWNLOAD_ITEM",{uuid:t,data:{failed:!0,err_msg:c.data}}),r.abrupt("return");case 17:e.commit("UPDATE_DOWNLOAD_ITEM",{uuid:t,data:{succed_chunks:[].concat(E()(e.state.download_history[t].succed_chunks),[c.data])}});case 18:s++,r.next=6;break;case 21:z(e.state.download_history[t].succed_chunks,u.file_name),e.commit("UPDATE_DOWNLOAD_ITEM",{uuid:t,data:{merged:!0,succed_chunks:new Array(u.chunk_count).fill(0)}});case 24:case"end":return r.stop()}},n,r)}))()},REDOWNLOAD_FILE:function(e,t){var r=this;return T()(b.a.mark(function n(){var a,u,s,i,o,c;return b.a.wrap(function(r){for(;;)switch(r.prev=r.next){case 0:if(null!=(a=e.state.download_history)&&void 0!=a[t]){r.next=3;break}return r.abrupt("return");case 3:u=a[t],e.commit("UPDATE_DOWNLOAD_ITEM",{uuid:t,data:{failed:!1,err_msg:"",is_pause:!1}}),s=u.succed_chunks.length;case 6:if(!(s<u.chunk_count)){r.next=21;break}if(!e.state.download_history[t].is_pause){r.next=9;break}return r.abrupt("return");case 9:return i=s*u.chunk_size,o=Math.min(i+u.chunk_size,u.file_size),r.next=13,Object(g.a)(u.uuid,u.secret_key,u.pwd,i,o);case 13:if((c=r.sent).succed){r.next=17;break}return e.commit("UPDATE_DOWNLOAD_ITEM",{uuid:t,data:{failed:!0,err_msg:c.data}}),r.abrupt("return");case 17:e.commit("UPDATE_DOWNLOAD_ITEM",{uuid:t,data:{succed_chunks:[].concat(E()(e.state.download_history[t].succed_chunks),[c.data])}});case 18:s++,r.next=6;break;case 21:z(e.state.download_history[t].succed_chunks,u.file_name),e.commit("UPDATE_DOWNLOAD_ITEM",{uuid:t,data:{merged:!0,succed_chunks:new Array(u.chunk_count).fill(0)}});case 23:case"end":return r.stop()}},n,r)}))()},START_UPLOAD_FILE:function(e,t){var r=this;return T()(b.a.mark(function n(){var a,u,s,i,o,c,d,l;return b.a.wrap(function(r){for(;;)switch(r.prev=r.next){case 0:if(null!=(a=e.state.upload_history)&&void 0!=a[t]){r.next=3;break}return r.abrupt("return");case 3:if(null!=(u=a[t]).file){r.next=7;break}return e.commit("UPDATE_UPLOAD_ITEM",{file_id:t,data:{failed:!0,err_msg:"选择的文件数据丢失"}}),r.abrupt("return");case 7:e.commit("UPDATE_UPLOAD_ITEM",{file_id:t,data:{succed_chunks:[],failed:!1}}),s=0;case 9:if(!(s<u.chunk_count)){r.next=25;break}if(!e.state.upload_history[t].is_pause){r.next=12;break}return r.abrupt("return");case 12:return i=s*u.chunk_size,o=Math.min(i+u.chunk_size,u.file_size),c=u.file.slice(i,o),r.next=17,M(u.uuid,u.secret_key,u.pwd,c,u.file_name,s,u.curr_path,0==s);case 17:if((d=r.sent).succed){r.next=21;break}return e.commit("UPDATE_UPLOAD_ITEM",{file_id:t,data:{failed:!0,err_msg:d.data}}),r.abrupt("return");case 21:e.commit("UPDATE_UPLOAD_ITEM",{file_id:t,data:{succed_chunks:[].concat(E()(e.state.upload_history[t].succed_chunks),[s])}});case 22:s++,r.next=9;break;case 25:return r.next=28,H(u.uuid,u.secret_key,u.pwd,u.file_name,u.chunk_count,u.curr_path);case 28:if((l=r.sent).succed){r.next=32;break}return e.commit("UPDATE_UPLOAD_ITEM",{file_id:t,data:{failed:!0,err_msg:l.data}}),r.abrupt("return");case 32:e.commit("UPDATE_UPLOAD_ITEM",{file_id:t,data:{merged:!0,file:null}});case 33:case"end":return r.stop()}},n,r)}))()},REUPLOAD_FILE:function(e,t){var r=this;return T()(b.a.mark(function n(){var a,u,s,i,o,c,d,l;return b.a.wrap(function(r){for(;;)switch(r.prev=r.next){case 0:if(null!=(a=e.state.upload_history)&&void 0!=a[t]){r.next=3;break}return r.abrupt("return");case 3:if(null!=(u=a[t]).file){r.next=7;break}return e.commit("UPDATE_UPLOAD_ITEM",{file_id:t,data:{failed:!0,err_msg:"选择的文件数据丢失"}}),r.abrupt("return");case 7:e.commit("UPDATE_UPLOAD_ITEM",{file_id:t,data:{failed:!1,err_msg:"",is_pause:!1}}),s=u.succed_chunks.length;case 9:if(!(s<u.chunk_count)){r.next=25;break}if(!e.state.upload_history[t].is_pause){r.next=12;break}return r.abrupt("return");case 12:return i=s*u.chunk_size,o=Math.min(i+u.chunk_size,u.file_size),c=u.file.slice(i,o),r.next=17,M(u.uuid,u.secret_key,u.pwd,c,u.file_name,s,u.curr_path,0==s);case 17:if((d=r.sent).succed){r.next=21;break}return e.commit("UPDATE_UPLOAD_ITEM",{file_id:t,data:{failed:!0,err_msg:d.data}}),r.abrupt("return");case 21:e.commit("UPDATE_UPLOAD_ITEM",{file_id:t,data:{succed_chunks:[].concat(E()(e.state.upload_history[t].succed_chunks),[s])}});case 22:s++,r.next=9;break;case 25:return r.next=28,H(u.uuid,u.secret_key,u.pwd,u.file_name,u.chunk_count,u.curr_path);case 28:if((l=r.sent).succed){r.next=32;break}return e.commit("UPDATE_UPLOAD_ITEM",{file_id:t,data:{failed:!0,err_msg:l.data}}),r.abrupt("return");case 32:e.commit("UPDATE_UPLOAD_ITEM",{file_id:t,data:{merged:!0,file:null}});case 33:case"end":return r.stop()}},n,r)}))()},REMOVE_UPLOAD_FILE:function(e,t){var r=this;return T()(b.a.mark(function n(){var a,u;return b.a.wrap(function(r){for(;;)switch(r.prev=r.next){case 0:if(null!=(a=e.state.upload_history)&&void 0!=a[t]){r.next=3;break}return r.abrupt("return");case 3:if((u=a[t]).merged||0==u.succed_chunks.length){r.next=7;break}return r.next=7,W(u.uuid,u.secret_key,u.pwd,u.file_name,u.curr_path);case 7:e.commit("REMOVE_UPLOAD_ITEM",u.file_id);case 8:case"end":return r.stop()}},n,r)}))()},GEN_CHUNK_SIZE:function(e){var t=this;return T()(b.a.mark(function r(){var n,a,u,s,i;return b.a.wrap(function(t){for(;;)switch(t.prev=t.next){case 0:return n=0,a=0,u=(new Date).getTime(),t.next=5,Object(P.a)();case 5:return(s=t.sent).succed&&(i=(new Date).getTime()-u,n=$(i)),t.next=9,Object(P.d)();case 9:(s=t.sent).succed&&(a=$(s.duration)),e.commit("UPDATE_CHUNK_SIZE",[n,a]);case 12:case"end":return t.stop()}},r,t)}))()}},getters:{download_list:function(e){return e.download_history?L()(e.download_history):[]},upload_list:function(e){return e.upload_history?L()(e.upload_history):[]}},modules:{}}),J=(r("Qbok"),r("zL8q"));n.default.config.productionTip=!1,n.default.use(J.Menu),n.default.use(J.MenuItem),n.default.use(J.Container),n.default.use(J.Header),n.default.use(J.Aside),n.default.use(J.Main),n.default.use(J.Button),n.default.use(J.ButtonGroup),n.default.use(J.Table),n.default.use(J.TableColumn),n.default.use(J.Alert),n.default.use(J.Icon),n.default.use(J.Progress),n.default.use(J.MessageBox),n.default.use(J.Message),n.default.use(J.Loading),n.default.prototype.$alert=J.MessageBox.alert,n.default.prototype.$prompt=J.MessageBox.prompt,n.default.prototype.$confirm=J.MessageBox.confirm,n.default.prototype.$message=J.Message,new n.default({el:"#app",router:A,store:j,components:{App:_},template:"<App/>"})},Nncb:function(e,t,r){"use strict";t.b=function(e){return i.a.get("/file_list/"+e)},t.c=function(e,t,r){return i.a.post("/file_list/"+e,{secret_key:t,ciphertext:r})},r.d(t,"a",function(){return d}),r.d(t,"d",function(){return l});var n=r("Xxa5"),a=r.n(n),u=r("exGp"),s=r.n(u),i=r("0RrJ");var o,c,d=(o=s()(a.a.mark(function e(){return a.a.wrap(function(e){for(;;)switch(e.prev=e.next){case 0:return e.next=2,i.a.get("/speed-test/download",{headers:{"Cache-Control":"no-cache"}});case 2:return e.sent,e.abrupt("return",{succed:!0});case 4:case"end":return e.stop()}},e,this)})),function(){return o.apply(this,arguments)}),l=(c=s()(a.a.mark(function e(){var t,r,n,u;return a.a.wrap(function(e){for(;;)switch(e.prev=e.next){case 0:return(t=new Uint8Array(1048576)).fill(0),r=new Blob([t],{type:"application/octet-stream"}),(n=new FormData).append("file",r,"speed_test.bin"),e.next=7,i.a.post("/speed-test/upload",n,{headers:{"Content-Type":"multipart/form-data"}});case 7:if(200==(u=e.sent).errno&&1048576==u.data.received_size){e.next=12;break}return e.abrupt("return",{succed:!1,duration:0});case 12:return e.abrupt("return",{succed:!0,duration:u.data.duration});case 13:case"end":return e.stop()}},e,this)})),function(){return c.apply(this,arguments)})},Qbok:function(e,t){},gUnV:function(e,t){},r8W7:function(e,t){},tvR6:function(e,t){}},["NHnr"]);
-//# sourceMappingURL=app.8141d0457827a08d24d6.js.map
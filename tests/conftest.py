@@ -0,0 +1,59 @@
+import os
+import sys
+import shutil
+import tempfile
+from multiprocessing import Queue
+from typing import Callable, Iterator, Optional
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from settings import settings
+
+
+@pytest.fixture
+def share_dir() -> Iterator[str]:
+    path = tempfile.mkdtemp()
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+@pytest.fixture
+def http_client(share_dir: str) -> Iterator[Callable]:
+    """
+    在当前进程中初始化HTTP服务路由, 返回分享文件并获取测试客户端的函数
+    """
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from command.services.http_service import HttpService
+    from model.file import DirModel, FileModel
+
+    # 配置首次访问时才初始化, 先访问再修改, 避免修改被覆盖
+    settings.IS_WINDOWS
+    settings.WSGI_PORT = 8080
+    settings.SAVE_SHARER_LOG = False
+    settings.STATIC_COMPRESS_CACHE_DIR = os.path.join(share_dir, ".cache")
+    service = HttpService(Queue(), Queue())
+    service._app = FastAPI()
+    service._setup()
+
+    def share(
+        file_name: str,
+        content: Optional[bytes] = None,
+        uuid: str = "htest",
+        **share_options,
+    ) -> TestClient:
+        # content为None时分享已存在的文件/文件夹, share_options为文件/文件夹对象的其他参数
+        path = os.path.join(share_dir, file_name)
+        if content is not None:
+            with open(path, "wb") as f:
+                f.write(content)
+        fileModel = DirModel if os.path.isdir(path) else FileModel
+        service._add_share(fileModel(path, uuid, **share_options))
+        return TestClient(service._app)
+
+    share.service = service
+    yield share
@@ -0,0 +1,85 @@
+import io
+import os
+import zipfile
+
+from command.services._archive import collect_entries
+from model.file import DirModel
+
+
+def test_collect_entries_skips_symlink_loop(share_dir):
+    os.mkdir(os.path.join(share_dir, "a"))
+    with open(os.path.join(share_dir, "a", "file.txt"), "w") as f:
+        f.write("content")
+    os.symlink("..", os.path.join(share_dir, "a", "link"))
+
+    entries = collect_entries(DirModel(share_dir, "harchive"))
+    names = [entry.arcname for entry in entries]
+    root = os.path.basename(share_dir)
+    assert f"{root}/a/file.txt" in names
+    assert all("/link/" not in name for name in names)
+
+
+def make_tree(share_dir, name="tree", count=3):
+    root = os.path.join(share_dir, name)
+    os.mkdir(root)
+    for index in range(count):
+        with open(os.path.join(root, f"file_{index}.txt"), "wb") as f:
+            f.write(f"content {index}".encode() * (index + 1))
+    return root
+
+
+def download_zip(client, uuid, **headers):
+    response = client.get(f"/download/{uuid}", headers=headers)
+    assert response.status_code in (200, 206), response.text
+    return response
+
+
+def test_dangling_symlink_is_skipped(http_client, share_dir):
+    root = make_tree(share_dir)
+    os.symlink(os.path.join(root, "missing"), os.path.join(root, "dangling"))
+    client = http_client("tree", uuid="hdir")
+
+    response = download_zip(client, "hdir")
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.testzip() is None
+        names = archive.namelist()
+    assert "tree/file_0.txt" in names
+    assert "tree/dangling" not in names
+
+
+def test_archive_follows_folder_changes(http_client, share_dir):
+    root = make_tree(share_dir)
+    client = http_client("tree", uuid="hdir")
+    download_zip(client, "hdir")
+
+    os.remove(os.path.join(root, "file_0.txt"))
+    with open(os.path.join(root, "added.txt"), "wb") as f:
+        f.write(b"added")
+    # 保证文件夹修改时间变化
+    stat_result = os.stat(root)
+    os.utime(root, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 10**9))
+
+    response = download_zip(client, "hdir")
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.testzip() is None
+        names = archive.namelist()
+    assert "tree/added.txt" in names
+    assert "tree/file_0.txt" not in names
+
+
+def test_resume_inside_central_directory(http_client, share_dir):
+    make_tree(share_dir, count=50)
+    client = http_client("tree", uuid="hdir")
+    full = download_zip(client, "hdir").content
+    with zipfile.ZipFile(io.BytesIO(full)) as archive:
+        assert archive.testzip() is None
+
+    start = full.rindex(b"PK\x01\x02") - 10
+    response = download_zip(
+        client,
+        "hdir",
+        range=f"bytes={start}-",
+        **{"if-range": download_zip(client, "hdir").headers["etag"]},
+    )
+    assert response.status_code == 206
+    assert response.content == full[start:]
@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+from command.services import _compression
+from command.services._compression import compress_listing
+from settings import settings
+
+
+@pytest.fixture
+def offloaded(monkeypatch):
+    calls = []
+
+    async def run_in_threadpool(func, *args):
+        calls.append(args[-1])
+        return func(*args)
+
+    monkeypatch.setattr(_compression, "run_in_threadpool", run_in_threadpool)
+    return calls
+
+
+@pytest.mark.parametrize(
+    "size, expected",
+    [
+        (settings.COMPRESS_MIN_BYTES - 1, None),
+        (settings.LISTING_COMPRESS_INLINE_BYTES - 1, []),
+        (settings.LISTING_COMPRESS_INLINE_BYTES, ["default"]),
+        (settings.LISTING_COMPRESS_FAST_BYTES, ["fast"]),
+    ],
+)
+def test_large_listings_are_compressed_off_the_loop(offloaded, size, expected):
+    body = b"a" * size
+    compressed, headers = asyncio.run(compress_listing(body, "gzip"))
+    if expected is None:
+        assert compressed == body and "Content-Encoding" not in headers
+        return
+    assert headers["Content-Encoding"] == "gzip"
+    assert len(compressed) < size
+    assert offloaded == expected
@@ -0,0 +1,46 @@
+import gc
+import os
+
+from model.file import DirModel, dir_children_cache
+
+
+def test_removed_share_is_not_kept_alive(share_dir):
+    for index in range(5):
+        os.mkdir(os.path.join(share_dir, f"dir_{index}"))
+    dirObj = DirModel(share_dir, "hcache")
+    for child in dirObj.children:
+        child.children
+    before = len(dir_children_cache)
+    assert before >= 6
+
+    del dirObj, child
+    gc.collect()
+    assert len(dir_children_cache) <= before - 6
+
+
+def test_gatekeeper_scans_off_the_event_loop(http_client, share_dir, monkeypatch):
+    import asyncio
+
+    from model import public_types as ptype
+
+    os.mkdir(os.path.join(share_dir, "big"))
+    with open(os.path.join(share_dir, "big", "a.txt"), "wb") as f:
+        f.write(b"a")
+    client = http_client("big", uuid="hgate")
+    sharing_dict = http_client.service._sharing_dict
+    lookup = sharing_dict.lookup
+    loop_running = []
+
+    def record_lookup(uuid):
+        try:
+            asyncio.get_running_loop()
+            loop_running.append(True)
+        except RuntimeError:
+            loop_running.append(False)
+        return lookup(uuid)
+
+    monkeypatch.setattr(sharing_dict, "lookup", record_lookup)
+    child_uuid = sharing_dict["hgate"].child_uuid("a.txt")
+    response = client.get(f"{ptype.FILE_LIST_URI}/hgate>{child_uuid}")
+    assert response.status_code == 200
+    assert loop_running and not any(loop_running)
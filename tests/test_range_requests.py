@@ -0,0 +1,172 @@
+import pytest
+
+from command.services._file_response import parse_ranges
+
+CONTENT = bytes(range(256)) * 8
+SIZE = len(CONTENT)
+
+
+@pytest.mark.parametrize(
+    "range_str, expected",
+    [
+        ("bytes=0-1023", [(0, 1023)]),
+        ("bytes=100-", [(100, SIZE - 1)]),
+        ("bytes=-100", [(SIZE - 100, SIZE - 1)]),
+        ("bytes=-100000", [(0, SIZE - 1)]),
+        ("bytes=0-99999", [(0, SIZE - 1)]),
+        ("bytes=0-10,5-20", [(0, 20)]),
+        ("bytes=0-10,11-20", [(0, 20)]),
+        ("bytes=50-60,0-10", [(0, 10), (50, 60)]),
+        ("bytes=0-10,100-", [(0, 10), (100, SIZE - 1)]),
+    ],
+)
+def test_parse_satisfiable(range_str, expected):
+    assert parse_ranges(range_str, SIZE) == expected
+
+
+@pytest.mark.parametrize(
+    "range_str", ["bytes=9999-", "bytes=-0", f"bytes={SIZE}-{SIZE + 10}"]
+)
+def test_parse_unsatisfiable(range_str):
+    assert parse_ranges(range_str, SIZE) == []
+
+
+@pytest.mark.parametrize(
+    "range_str",
+    [
+        "items=0-10",
+        "bytes=",
+        "bytes=-",
+        "bytes=10-5",
+        "bytes=a-b",
+        # 超过16个区间
+        "bytes=" + ",".join(f"{index * 10}-{index * 10 + 1}" for index in range(17)),
+    ],
+)
+def test_parse_invalid(range_str):
+    assert parse_ranges(range_str, SIZE) is None
+
+
+def test_full_download(http_client):
+    response = http_client("data.bin", CONTENT).get("/download/htest")
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["content-length"] == str(SIZE)
+    assert response.headers["accept-ranges"] == "bytes"
+
+
+def test_single_range_is_inclusive(http_client):
+    response = http_client("data.bin", CONTENT).get(
+        "/download/htest", headers={"range": "bytes=0-1023"}
+    )
+    assert response.status_code == 206
+    assert response.content == CONTENT[:1024]
+    assert response.headers["content-range"] == f"bytes 0-1023/{SIZE}"
+    assert response.headers["content-length"] == "1024"
+
+
+def test_suffix_range(http_client):
+    client = http_client("data.bin", CONTENT)
+    response = client.get("/download/htest", headers={"range": "bytes=-100"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[-100:]
+    assert response.headers["content-range"] == f"bytes {SIZE - 100}-{SIZE - 1}/{SIZE}"
+
+    response = client.get("/download/htest", headers={"range": "bytes=-100000"})
+    assert response.status_code == 206
+    assert response.content == CONTENT
+    assert response.headers["content-range"] == f"bytes 0-{SIZE - 1}/{SIZE}"
+
+
+def test_open_ended_range(http_client):
+    response = http_client("data.bin", CONTENT).get(
+        "/download/htest", headers={"range": "bytes=2000-"}
+    )
+    assert response.status_code == 206
+    assert response.content == CONTENT[2000:]
+    assert response.headers["content-range"] == f"bytes 2000-{SIZE - 1}/{SIZE}"
+
+
+def test_multi_range_multipart(http_client):
+    response = http_client("data.bin", CONTENT).get(
+        "/download/htest", headers={"range": "bytes=0-9,100-109,105-119"}
+    )
+    assert response.status_code == 206
+    content_type = response.headers["content-type"]
+    assert content_type.startswith("multipart/byteranges; boundary=")
+    boundary = content_type.split("boundary=", 1)[1]
+    assert response.headers["content-length"] == str(len(response.content))
+
+    parts = response.content.split(f"--{boundary}".encode())
+    assert parts[0] == b""
+    assert parts[-1] == b"--\r\n"
+    bodies = []
+    for part in parts[1:-1]:
+        head, _, body = part.partition(b"\r\n\r\n")
+        assert b"content-range: bytes" in head
+        bodies.append(body[:-2] if body.endswith(b"\r\n") else body)
+    # 重叠的区间合并为一段
+    assert bodies == [CONTENT[0:10], CONTENT[100:120]]
+
+
+def test_unsatisfiable_range(http_client):
+    response = http_client("data.bin", CONTENT).get(
+        "/download/htest", headers={"range": f"bytes={SIZE}-"}
+    )
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{SIZE}"
+    assert response.content == b""
+
+
+def test_if_range(http_client):
+    client = http_client("data.bin", CONTENT)
+    etag = client.get("/download/htest").headers["etag"]
+    assert etag.startswith('"') and etag.endswith('"')
+
+    response = client.get(
+        "/download/htest", headers={"range": "bytes=0-9", "if-range": etag}
+    )
+    assert response.status_code == 206
+    assert response.content == CONTENT[:10]
+
+    response = client.get(
+        "/download/htest", headers={"range": "bytes=0-9", "if-range": '"stale"'}
+    )
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+
+def test_head(http_client):
+    client = http_client("data.bin", CONTENT)
+    response = client.head("/download/htest")
+    assert response.status_code == 200
+    assert response.content == b""
+    assert response.headers["content-length"] == str(SIZE)
+
+    response = client.head("/download/htest", headers={"range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert response.content == b""
+    assert response.headers["content-length"] == "10"
+
+
+def test_zero_length_file(http_client):
+    client = http_client("empty.bin", b"")
+    response = client.get("/download/htest")
+    assert response.status_code == 200
+    assert response.content == b""
+    assert response.headers["content-length"] == "0"
+
+    response = client.get("/download/htest", headers={"range": "bytes=0-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */0"
+
+
+def test_length_follows_changed_file(http_client, share_dir):
+    client = http_client("data.bin", CONTENT)
+    assert client.get("/download/htest").content == CONTENT
+    with open(f"{share_dir}/data.bin", "wb") as f:
+        f.write(CONTENT[:100])
+
+    response = client.get("/download/htest")
+    assert response.headers["content-length"] == "100"
+    assert response.content == CONTENT[:100]
@@ -0,0 +1,18 @@
+import pytest
+import uvicorn
+
+from command.services.http_service import HttpService
+from model.public_types import ServingProfile
+from settings import settings
+
+
+@pytest.mark.parametrize("profile", list(ServingProfile))
+def test_options_are_valid_uvicorn_config(profile):
+    options = HttpService.serving_options(profile)
+    assert options["loop"] != "auto" and options["http"] != "auto"
+
+    config = uvicorn.Config(app=None, **options)
+    assert (
+        config.h11_max_incomplete_event_size
+        == settings.HTTP_SERVING_PROFILES[profile]["h11_max_incomplete_event_size"]
+    )
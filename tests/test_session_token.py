@@ -0,0 +1,99 @@
+import os
+import time
+
+from model.file import DirModel, FileModel
+from settings import settings
+from utils.credentials import SessionToken
+
+
+def make_share(share_dir: str, uuid: str = "htoken") -> DirModel:
+    os.makedirs(os.path.join(share_dir, "sub"), exist_ok=True)
+    with open(os.path.join(share_dir, "sub", "a.txt"), "wb") as f:
+        f.write(b"a")
+    return DirModel(share_dir, uuid)
+
+
+def test_token_covers_whole_share(share_dir):
+    session_token = SessionToken()
+    share = make_share(share_dir)
+    token = session_token.issue(share)
+
+    child = share.children[0].children[0]
+    assert child.uuid.startswith("htoken>")
+    assert session_token.verify(token, share)
+    assert session_token.verify(token, child)
+
+
+def test_tampered_token_is_rejected(share_dir):
+    session_token = SessionToken()
+    share = make_share(share_dir)
+    share_uuid, expires, generation, signature = session_token.issue(share).split(".")
+
+    forged = f"{share_uuid}.{int(expires) + 3600}.{generation}.{signature}"
+    assert not session_token.verify(forged, share)
+    flipped = signature[:-1] + ("0" if signature[-1] != "0" else "1")
+    assert not session_token.verify(
+        f"{share_uuid}.{expires}.{generation}.{flipped}", share
+    )
+    assert not session_token.verify("", share)
+    assert not session_token.verify("not-a-token", share)
+    # 其他密钥签发的令牌无效
+    assert not SessionToken().verify(session_token.issue(share), share)
+
+
+def test_expired_token_is_rejected(share_dir, monkeypatch):
+    session_token = SessionToken()
+    share = make_share(share_dir)
+    token = session_token.issue(share)
+
+    monkeypatch.setattr(time, "time", lambda: 10**10)
+    assert not session_token.verify(token, share)
+
+
+def test_token_is_bound_to_its_share(share_dir):
+    session_token = SessionToken()
+    share = make_share(share_dir)
+    other = FileModel(os.path.join(share_dir, "sub", "a.txt"), "hother")
+
+    assert not session_token.verify(session_token.issue(share), other)
+    assert not session_token.verify(session_token.issue(other), share)
+
+
+def test_revoked_tokens_stay_revoked_across_workers(share_dir):
+    # 两个工作进程使用相同的签名密钥, 各自由管理进程下发的分享描述创建分享
+    key = os.urandom(32)
+    gui_share = make_share(share_dir)
+    gui_share.token_generation += 1
+    worker_a, worker_b = SessionToken(key), SessionToken(key)
+    share_a = gui_share.to_descriptor().to_model()
+    share_b = gui_share.to_descriptor().to_model()
+
+    token = worker_a.issue(share_a)
+    assert worker_b.verify(token, share_b)
+
+    # 修改免密状态时管理进程与各工作进程同步递增令牌代数
+    for share in (gui_share, share_a, share_b):
+        share.token_generation += 1
+    assert not worker_a.verify(token, share_a)
+    assert not worker_b.verify(token, share_b)
+
+    # 重新打开分享后的新工作进程同样拒绝旧令牌
+    gui_share.token_generation += 1
+    share_c = gui_share.to_descriptor().to_model()
+    assert not SessionToken(key).verify(token, share_c)
+    assert SessionToken(key).verify(worker_a.issue(share_c), share_c)
+
+
+def test_change_free_secret_revokes_tokens(http_client, share_dir):
+    with open(os.path.join(share_dir, "f.txt"), "wb") as f:
+        f.write(b"f")
+    http_client("f.txt", uuid="hfree")
+    service = http_client.service
+    fileObj = service._sharing_dict["hfree"]
+    token = service._session_token.issue(fileObj)
+
+    service._change_free_secret("hfree", True)
+    assert fileObj.free_secret
+    assert not service._session_token.verify(token, fileObj)
+    service._remove_share("hfree")
+    assert "hfree" not in service._sharing_dict
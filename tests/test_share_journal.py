@@ -0,0 +1,84 @@
+import os
+import json
+
+from model import sharing
+from model.file import DirModel, FileModel
+from model.share_journal import ShareJournal
+
+
+def share_record(path: str, uuid: str) -> dict:
+    fileModel = DirModel if os.path.isdir(path) else FileModel
+    return fileModel(path, uuid).to_dump_backup()
+
+
+def journal_lines(base_dir: str) -> list:
+    with open(os.path.join(base_dir, ShareJournal.FILE_NAME), encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_journal_round_trip(share_dir):
+    journal = ShareJournal(share_dir)
+    assert journal.load() == []
+    first, second = share_record(share_dir, "hfirst"), share_record(
+        share_dir, "hsecond"
+    )
+    journal.append({"op": "add", "share": first})
+    journal.append({"op": "add", "share": second})
+    journal.append({"op": "update", "uuid": "hfirst", "fields": {"browse_number": 3}})
+    journal.append({"op": "remove", "uuid": "hsecond"})
+    journal.close()
+
+    with open(os.path.join(share_dir, ShareJournal.FILE_NAME), "a") as f:
+        f.write('{"op": "add", "sha')
+    shares = ShareJournal(share_dir).load()
+    assert [share["uuid"] for share in shares] == ["hfirst"]
+    assert shares[0]["browse_number"] == 3
+
+
+def test_journal_compaction_keeps_tail(share_dir):
+    journal = ShareJournal(share_dir)
+    journal.load()
+    share = share_record(share_dir, "hcompact")
+    journal.append({"op": "add", "share": share})
+    for number in range(10):
+        journal.append(
+            {"op": "update", "uuid": "hcompact", "fields": {"browse_number": number}}
+        )
+
+    # 压缩开始后追加的记录补写到新日志末尾
+    journal._compact_tail = []
+    journal.append({"op": "update", "uuid": "hcompact", "fields": {"secret_key": "s"}})
+    journal._compact([dict(share, browse_number=9)])
+    journal.close()
+
+    assert len(journal_lines(share_dir)) == 2
+    shares = ShareJournal(share_dir).load()
+    assert shares[0]["browse_number"] == 9
+    assert shares[0]["secret_key"] == "s"
+
+
+def test_journal_migrates_legacy_backups(share_dir):
+    legacy = [share_record(share_dir, "hlegacy"), "broken"]
+    with open(os.path.join(share_dir, ShareJournal.LEGACY_FILE_NAME), "w") as f:
+        json.dump(legacy, f)
+
+    shares = ShareJournal(share_dir).load()
+    assert [share["uuid"] for share in shares] == ["hlegacy"]
+    assert journal_lines(share_dir) == [{"op": "add", "share": legacy[0]}]
+
+
+def test_load_prunes_missing_paths(share_dir, monkeypatch):
+    kept_path = os.path.join(share_dir, "kept")
+    os.mkdir(kept_path)
+    journal = ShareJournal(share_dir)
+    journal.load()
+    journal.append({"op": "add", "share": share_record(kept_path, "hkept")})
+    gone = dict(share_record(kept_path, "hgone"), path=os.path.join(share_dir, "gone"))
+    journal.append({"op": "add", "share": gone})
+    journal.close()
+
+    monkeypatch.setattr(sharing, "ShareJournal", lambda: ShareJournal(share_dir))
+    model = sharing.FuseSharingModel.load()
+    assert [fileObj.uuid for fileObj in model] == ["hkept"]
+    model.dump()
+    assert [share["uuid"] for share in ShareJournal(share_dir).load()] == ["hkept"]
@@ -0,0 +1,134 @@
+import os
+import json
+import time
+
+import pytest
+
+from model import public_types as ptype
+from model.file import DirModel
+from model.upload import UploadSession
+from settings import settings
+from utils.credentials import Credentials
+from utils.response_code import RET
+
+
+def test_upload_files_do_not_collide(share_dir):
+    names = ["x", "x.state", "x.part", "x.state.tmp"]
+    paths = []
+    for name in names:
+        session = UploadSession(share_dir, name, 10, 10)
+        paths.extend(
+            [session.temp_path, session.state_path, session.state_path + ".tmp"]
+        )
+    assert len(set(paths)) == len(paths)
+
+
+def test_only_upload_dir_is_hidden(share_dir):
+    with open(os.path.join(share_dir, "report.uploading"), "w") as f:
+        f.write("user file")
+    session = UploadSession(share_dir, "new.bin", 4, 4)
+    session.prepare()
+    session.save()
+
+    names = [child.file_name for child in DirModel(share_dir, "hupload").children]
+    assert names == ["report.uploading"]
+
+    session.commit()
+    names = sorted(child.file_name for child in DirModel(share_dir, "hupload").children)
+    assert names == ["new.bin", "report.uploading"]
+
+
+def test_commit_does_not_replace_existing_file(share_dir, monkeypatch):
+    session = UploadSession(share_dir, "new.bin", 4, 4)
+    session.prepare()
+    with open(session.target_path, "w") as f:
+        f.write("keep")
+
+    with pytest.raises(FileExistsError):
+        session.commit()
+    with open(session.target_path) as f:
+        assert f.read() == "keep"
+    assert os.path.exists(session.temp_path)
+
+    # 不支持硬链接时回退为独占创建
+    def no_link(src, dst):
+        raise PermissionError(src)
+
+    monkeypatch.setattr(os, "link", no_link)
+    with pytest.raises(FileExistsError):
+        session.commit()
+    os.remove(session.target_path)
+    session.commit()
+    assert os.path.getsize(session.target_path) == 4
+    assert not os.path.exists(session.temp_path)
+
+
+def test_stale_sessions_are_removed(share_dir, monkeypatch):
+    fresh = UploadSession(share_dir, "fresh.bin", 4, 4)
+    stale = UploadSession(share_dir, "stale.bin", 4, 4)
+    legacy = UploadSession(share_dir, "legacy.bin", 4, 4)
+    for session in (fresh, stale, legacy):
+        session.prepare()
+        session.save()
+    expired = time.time() - settings.UPLOAD_SESSION_TTL - 60
+    with open(stale.state_path) as f:
+        state = json.load(f)
+    state["updatedAt"] = expired
+    with open(stale.state_path, "w") as f:
+        json.dump(state, f)
+    # 没有记录活动时间的状态文件按临时文件的修改时间判断
+    state.pop("updatedAt")
+    with open(legacy.state_path, "w") as f:
+        json.dump(state, f)
+    os.utime(legacy.temp_path, (expired, expired))
+
+    removed = UploadSession.remove_stale(share_dir)
+    assert sorted(removed) == sorted([stale.target_path, legacy.target_path])
+    assert sorted(os.listdir(fresh.temp_dir)) == ["fresh.bin.part", "fresh.bin.state"]
+
+    fresh.discard()
+    assert UploadSession.remove_stale(share_dir) == []
+    assert not os.path.exists(fresh.temp_dir)
+
+
+def test_upload_stream_takes_token_from_header(http_client, share_dir):
+    os.mkdir(os.path.join(share_dir, "upload"))
+    client = http_client(
+        "upload",
+        uuid="hupload",
+        secret_key="key",
+        credentials=Credentials.encode("key", "pwd"),
+    )
+    service = http_client.service
+    token = service._session_token.issue(service._sharing_dict["hupload"])
+    curr_path = os.path.join(share_dir, "upload")
+    params = {"file_name": "a.bin", "curr_path": curr_path}
+
+    # 查询参数中的凭据不再被接受
+    response = client.get(
+        "/mobile/upload/status/hupload", params=dict(params, token=token)
+    )
+    assert response.json()["errno"] == RET.REQUIREPWD
+    response = client.get(
+        "/mobile/upload/status/hupload",
+        params=params,
+        headers={ptype.SESSION_TOKEN_HEADER: token},
+    )
+    assert response.json()["errno"] == RET.UPLOADNOTFOUND
+
+    stream_params = dict(params, chunk_id=0, chunk_size=4, file_size=4)
+    response = client.post(
+        "/mobile/upload/stream/hupload",
+        params=stream_params,
+        content=b"data",
+        headers={ptype.SESSION_TOKEN_HEADER: token},
+    )
+    assert response.json()["errno"] == RET.OK
+    response = client.post(
+        "/mobile/upload/commit/hupload",
+        data=params,
+        headers={ptype.SESSION_TOKEN_HEADER: token},
+    )
+    assert response.json()["errno"] == RET.OK
+    with open(os.path.join(curr_path, "a.bin"), "rb") as f:
+        assert f.read() == b"data"
@@ -1,8 +1,13 @@
-__all__ = ["Credentials"]
+__all__ = ["Credentials", "SessionToken", "CredentialsPool"]
 
+import os
+import hmac
+import time
+import asyncio
 import hashlib
 import base64
-from typing import Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union, Optional
 
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.backends import default_backend
@@ -11,6 +16,7 @@ from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.primitives import hashes
 
 from model.file import FileModel, DirModel
+from settings import settings
 from utils.logger import sysLogger
 
 
@@ -48,7 +54,11 @@ class Credentials:
         Returns:
             bool: 是否通过校验
         """
-        pwd = cls.__decrypt(pwd)
+        try:
+            pwd = cls.__decrypt(pwd)
+        except Exception as e:
+            sysLogger.warning(f"密码解密失败, 非法的密文, 错误信息: {e}")
+            return False
         new_hash = cls.encode(fileObj.secret_key, pwd)
         return new_hash == fileObj.credentials
 
@@ -91,3 +101,133 @@ class Credentials:
         plaintext = unpadder.update(padded_plaintext) + unpadder.finalize()
 
         return plaintext.decode()
+
+
+class CredentialsPool:
+    def __init__(self):
+        """
+        凭据校验线程池类初始化函数, PBKDF2运算放到有界线程池中执行, 避免阻塞事件循环,
+        排队数超过上限时直接拒绝, 由调用方返回繁忙响应
+
+        线程池在首次使用时才创建, 以便对象可随服务对象传递给子进程
+        """
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+
+    @property
+    def isBusy(self) -> bool:
+        """
+        线程池是否已饱和
+
+        Returns:
+            bool: 是否已饱和
+        """
+        limit = settings.CREDENTIALS_POOL_SIZE + settings.CREDENTIALS_QUEUE_LENGTH
+        return self._pending >= limit
+
+    async def verification(
+        self, fileObj: Union[FileModel, DirModel], pwd: str
+    ) -> Optional[bool]:
+        """
+        在线程池中进行凭据验证, 需在事件循环中调用
+
+        Args:
+            fileObj: 待验证凭据文件对象
+            pwd: 输入的密码
+
+        Returns:
+            Optional[bool]: 是否通过校验, 线程池饱和时返回None
+        """
+        if self.isBusy:
+            sysLogger.warning(f"凭据校验线程池已饱和, 当前排队数: {self._pending}")
+            return None
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.CREDENTIALS_POOL_SIZE,
+                thread_name_prefix="credentials",
+            )
+
+        self._pending += 1
+        start_time = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, Credentials.verification, fileObj, pwd
+            )
+        finally:
+            self._pending -= 1
+            duration = (time.perf_counter() - start_time) * 1000
+            sysLogger.info(f"凭据校验完成, 耗时: {duration:.1f}ms, 当前排队数: {self._pending}")
+
+
+class SessionToken:
+    def __init__(self, key: Optional[bytes] = None):
+        """
+        会话令牌类初始化函数, 凭据校验通过后签发短期令牌, 后续请求校验令牌即可,
+        无需再次进行PBKDF2运算
+
+        Args:
+            key: HMAC签名密钥, 为None时随机生成
+        """
+        self._key = key or os.urandom(32)
+
+    @staticmethod
+    def share_uuid(uuid: str) -> str:
+        """
+        获取文件/文件夹对象所属分享的uuid, 令牌作用域为整个分享(含子级)
+
+        Args:
+            uuid: 文件/文件夹对象的uuid
+
+        Returns:
+            str: 所属分享的uuid
+        """
+        return uuid.split(">", 1)[0]
+
+    def issue(self, fileObj: Union[FileModel, DirModel]) -> str:
+        """
+        签发令牌, 令牌中携带分享当前的令牌代数
+
+        Args:
+            fileObj: 通过凭据校验的文件/文件夹对象
+
+        Returns:
+            str: 签发的令牌
+        """
+        share_uuid = self.share_uuid(fileObj.uuid)
+        expires = int(time.time()) + settings.SESSION_TOKEN_TTL
+        payload = f"{share_uuid}.{expires}.{fileObj.token_generation}"
+        sysLogger.debug(f"签发会话令牌成功, 分享的uuid: {share_uuid}")
+        return f"{payload}.{self._sign(payload)}"
+
+    def verify(self, token: str, fileObj: Union[FileModel, DirModel]) -> bool:
+        """
+        令牌校验, 分享的令牌代数递增后此前签发的令牌全部失效
+
+        Args:
+            token: 待校验的令牌
+            fileObj: 访问的文件/文件夹对象
+
+        Returns:
+            bool: 是否通过校验
+        """
+        if not token:
+            return False
+        try:
+            share_uuid, expires, generation, signature = token.split(".")
+        except ValueError:
+            return False
+        payload = f"{share_uuid}.{expires}.{generation}"
+        if not hmac.compare_digest(signature, self._sign(payload)):
+            return False
+        if share_uuid != self.share_uuid(fileObj.uuid):
+            return False
+        if not expires.isdigit() or int(expires) < time.time():
+            return False
+
+        # 令牌代数保存在分享状态中, 由管理进程下发, 各工作进程一致
+        return generation == str(fileObj.token_generation)
+
+    def _sign(self, payload: str) -> str:
+        digest = hmac.new(self._key, payload.encode("utf-8"), hashlib.sha256)
+        return digest.hexdigest()[:32]
@@ -1,6 +1,7 @@
 __all__ = [
     "get_system",
     "generate_uuid",
+    "generate_child_uuid",
     "generate_timestamp",
     "get_local_ip",
     "generate_ftp_passwd",
@@ -19,6 +20,7 @@ import sys
 import platform
 import uuid
 import json
+import hashlib
 from typing import Dict, Any, Callable, Tuple, Optional
 
 import toml
@@ -48,6 +50,35 @@ def generate_uuid() -> str:
     return str(uuid.uuid1()).replace("-", "")
 
 
+BASE62_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+
+
+def generate_child_uuid(share_uuid: str, parent_uuid: str, name: str) -> str:
+    """
+    由父级uuid和名称生成子级uuid(以分享uuid为密钥的短哈希, base62编码),
+    同一分享下相同相对路径的文件/文件夹uuid始终一致, 重启或重新读取后链接依然有效
+
+    Args:
+        share_uuid: 分享的文件夹的uuid
+        parent_uuid: 父级文件夹的uuid(不含上级部分), 父级为分享的文件夹时即为分享的uuid
+        name: 文件/文件夹名称
+
+    Returns:
+        str: 子级uuid
+    """
+    digest = hashlib.blake2b(
+        f"{parent_uuid}/{name}".encode("utf-8", "surrogateescape"),
+        key=share_uuid.encode("utf-8")[:64],
+        digest_size=10,
+    ).digest()
+    number, chars = int.from_bytes(digest, "big"), []
+    while number:
+        number, remainder = divmod(number, 62)
+        chars.append(BASE62_ALPHABET[remainder])
+
+    return "".join(reversed(chars)).rjust(14, BASE62_ALPHABET[0])
+
+
 def generate_timestamp() -> int:
     """
     获取毫秒
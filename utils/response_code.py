@@ -14,8 +14,12 @@ class RET:
     UPLOADFILEISEXISTS = 4005
     UPLOADCHUNKEXISTS = 4006
     MERGELOSSCHUNK = 4007
+    UPLOADCHUNKINVALID = 4008
+    UPLOADNOTFOUND = 4009
+    UPLOADNOSPACE = 4010
     FILETRANSFERERR = 5001
     FTPTYPEERR = 5002
+    SERVERBUSY = 5003
 
 
 MSG_MAP = {
@@ -31,6 +35,10 @@ MSG_MAP = {
     RET.UPLOADFILEISEXISTS: "已存在同名文件",
     RET.UPLOADCHUNKEXISTS: "已存在同名分片",
     RET.MERGELOSSCHUNK: "上传的分片不是完整的",
+    RET.UPLOADCHUNKINVALID: "上传的分片不合法",
+    RET.UPLOADNOTFOUND: "上传任务不存在或已失效",
+    RET.UPLOADNOSPACE: "磁盘剩余空间不足",
     RET.FILETRANSFERERR: "文件/文件夹对象没有被正确传递",
     RET.FTPTYPEERR: "非预期的分享类型",
+    RET.SERVERBUSY: "服务繁忙, 请稍后重试",
 }
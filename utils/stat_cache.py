@@ -0,0 +1,239 @@
+__all__ = ["StatRecord", "StatCache", "stat_cache"]
+
+import os
+import sys
+import time
+import stat
+import struct
+import ctypes
+import ctypes.util
+from threading import Lock, Thread
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Dict
+
+from settings import settings
+from utils.logger import sysLogger
+
+
+class StatRecord(NamedTuple):
+    exists: bool
+    isDir: bool
+    size: int
+    mtime: float
+    mtime_ns: int
+
+
+MISSING_RECORD = StatRecord(False, False, 0, 0.0, 0)
+
+
+class _Inotify:
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_CLOEXEC = 0o2000000
+    WATCH_MASK = (
+        IN_MODIFY
+        | IN_ATTRIB
+        | IN_CLOSE_WRITE
+        | IN_MOVED_FROM
+        | IN_MOVED_TO
+        | IN_CREATE
+        | IN_DELETE
+        | IN_DELETE_SELF
+        | IN_MOVE_SELF
+    )
+    EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self, cache: "StatCache"):
+        """
+        Linux下基于inotify的文件夹变化监听, 文件夹内有变化时使对应的stat缓存失效
+
+        Args:
+            cache: 需要失效通知的stat缓存
+        """
+        self._cache = cache
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._libc.inotify_init1(self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watches: Dict[str, int] = {}
+        self._paths: Dict[int, str] = {}
+        self._lock = Lock()
+        self._thread = Thread(target=self._read_events, daemon=True)
+        self._thread.start()
+
+    def watch(self, dir_path: str) -> None:
+        """
+        监听文件夹, 超过最大监听数时不再添加, 由TTL保证缓存时效
+
+        Args:
+            dir_path: 文件夹路径
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if dir_path in self._watches:
+                return
+            if len(self._watches) >= settings.STAT_CACHE_MAX_WATCHES:
+                return
+            wd = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(dir_path), self.WATCH_MASK
+            )
+            if wd < 0:
+                return
+            self._watches[dir_path] = wd
+            self._paths[wd] = dir_path
+
+    def _read_events(self) -> None:
+        while True:
+            try:
+                buffer = os.read(self._fd, 65536)
+            except OSError:
+                return
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _, name_length = self.EVENT_HEADER.unpack_from(buffer, offset)
+                offset += self.EVENT_HEADER.size
+                name = buffer[offset : offset + name_length].rstrip(b"\0")
+                offset += name_length
+                if mask & self.IN_Q_OVERFLOW:
+                    self._cache.clear()
+                    continue
+                with self._lock:
+                    dir_path = self._paths.get(wd)
+                    if dir_path is not None and mask & self.IN_IGNORED:
+                        self._paths.pop(wd, None)
+                        self._watches.pop(dir_path, None)
+                if dir_path is None:
+                    continue
+                self._cache.invalidate(dir_path)
+                if name:
+                    self._cache.invalidate(os.path.join(dir_path, os.fsdecode(name)))
+
+
+class StatCache:
+    # 每多少次查询输出一次命中统计
+    REPORT_INTERVAL = 10000
+
+    def __init__(self):
+        """
+        文件元数据(stat)缓存类初始化函数, 一次stat得到存在性, 类型, 大小和修改时间,
+        在TTL内重复使用; Linux下额外通过inotify在文件夹内容变化时即时失效
+        """
+        self._reset()
+
+    def _reset(self) -> None:
+        """
+        重置缓存状态, 服务进程由fork创建时, 锁和inotify监听线程均不可继承, 需重新初始化
+
+        Returns:
+            None
+        """
+        self._records: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = Lock()
+        self._inotify: Optional[_Inotify] = None
+        self._inotify_started = False
+        self.hits = 0
+        self.misses = 0
+
+    def stat(self, path: str) -> StatRecord:
+        """
+        获取文件/文件夹的元数据记录
+
+        Args:
+            path: 文件/文件夹路径
+
+        Returns:
+            StatRecord: 元数据记录
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._records.get(path)
+            if cached is not None and cached[0] > now:
+                self._records.move_to_end(path)
+                self.hits += 1
+                self._report()
+                return cached[1]
+            self.misses += 1
+            self._report()
+
+        try:
+            stat_result = os.stat(path)
+        except (OSError, ValueError):
+            record = MISSING_RECORD
+        else:
+            record = StatRecord(
+                True,
+                stat.S_ISDIR(stat_result.st_mode),
+                stat_result.st_size,
+                stat_result.st_mtime,
+                stat_result.st_mtime_ns,
+            )
+        self._watch(os.path.dirname(path))
+        if record.isDir:
+            self._watch(path)
+
+        with self._lock:
+            self._records[path] = (now + settings.STAT_CACHE_TTL, record)
+            self._records.move_to_end(path)
+            while len(self._records) > settings.STAT_CACHE_SIZE:
+                self._records.popitem(last=False)
+        return record
+
+    def invalidate(self, path: str) -> None:
+        """
+        使路径的元数据记录失效
+
+        Args:
+            path: 文件/文件夹路径
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._records.pop(path, None)
+
+    def clear(self) -> None:
+        """
+        清空全部元数据记录
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._records.clear()
+
+    def _watch(self, dir_path: str) -> None:
+        if not sys.platform.startswith("linux") or not dir_path:
+            return
+        if not self._inotify_started:
+            self._inotify_started = True
+            try:
+                self._inotify = _Inotify(self)
+            except (OSError, AttributeError, TypeError) as e:
+                sysLogger.debug(f"inotify不可用, stat缓存仅按TTL失效: {e}")
+                self._inotify = None
+        if self._inotify is not None:
+            self._inotify.watch(dir_path)
+
+    def _report(self) -> None:
+        total = self.hits + self.misses
+        if total % self.REPORT_INTERVAL == 0:
+            sysLogger.debug(
+                f"stat缓存统计, 命中: {self.hits}, 未命中: {self.misses}, "
+                f"命中率: {self.hits / total:.2%}"
+            )
+
+
+stat_cache = StatCache()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=stat_cache._reset)
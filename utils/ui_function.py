@@ -47,7 +47,11 @@ class UiFunction:
         self._dragPos: Union[QPoint, None] = None
         self._clicked_menu_name = ""
         self._is_sharing_str = "分享中"
+        self._starting_str = "启动中..."
+        self._not_ready_str = "服务未就绪"
         self._isNot_sharing_str = "已取消分享"
+        self._indexing_str = "索引中..."
+        self._path_missing_str = "路径不存在"
         self._pause_button_str = "暂停下载"
         self._continue_button_str = "继续下载"
         self._reset_button_str = "重新下载"
@@ -288,7 +292,7 @@ class UiFunction:
         self.ui.shareListTable.setItem(
             fileObj.rowIndex, self._ui_function._share_targetPath_col, target_path_item
         )
-        browse_number_item = QTableWidgetItem("0")
+        browse_number_item = QTableWidgetItem(str(fileObj.browse_number))
         browse_number_item.setTextAlignment(Qt.AlignCenter)
         self.ui.shareListTable.setItem(
             fileObj.rowIndex, self._ui_function._browse_number_col, browse_number_item
@@ -314,10 +318,12 @@ class UiFunction:
                     share_status_item,
                 )
             else:
+                if not self.open_share(fileObj):
+                    return
                 button_text = "取消共享"
-                self.open_share(fileObj)
                 fileObj.isSharing = True
-                share_status_item = QTableWidgetItem(self._ui_function._is_sharing_str)
+                # 所有分享服务回复可访问后再显示为分享中
+                share_status_item = QTableWidgetItem(self._ui_function._starting_str)
                 share_status_item.setTextAlignment(Qt.AlignCenter)
                 self.ui.shareListTable.setItem(
                     fileObj.rowIndex,
@@ -432,7 +438,7 @@ class UiFunction:
             status_item = self._elements.shareListTable.item(
                 row, self._share_status_col
             )
-            is_sharing = status_item.text() == self._is_sharing_str
+            is_sharing = self._main_window._sharing_list[row].isSharing
             background, foreground = self.status_item_back_foreground(
                 is_sharing, theme_color
             )
@@ -927,6 +933,46 @@ class UiFunction:
             *[int(x) for x in foreground.split(",")]
         )
 
+    def update_share_status_text(
+        self, fileObj: Union[FileModel, DirModel], text: str
+    ) -> None:
+        """
+        更新分享状态单元格的文字, 用于显示分享服务是否已可访问
+
+        Args:
+            fileObj: 分享文件/文件夹对象
+            text: 状态文字
+
+        Returns:
+            None
+        """
+        status_item = self._elements.shareListTable.item(
+            fileObj.rowIndex, self._share_status_col
+        )
+        if status_item is None:
+            return
+        status_item.setText(text)
+
+    def update_share_status_tooltip(
+        self, fileObj: Union[FileModel, DirModel], tooltip: str = ""
+    ) -> None:
+        """
+        更新分享状态单元格的提示, 用于显示统计文件个数的进度, 单元格文字仍按分享状态显示
+
+        Args:
+            fileObj: 分享文件/文件夹对象
+            tooltip: 提示文字, 为空时清除提示
+
+        Returns:
+            None
+        """
+        status_item = self._elements.shareListTable.item(
+            fileObj.rowIndex, self._share_status_col
+        )
+        if status_item is None:
+            return
+        status_item.setToolTip(tooltip)
+
     def copy_browse_button_style(self, theme_color: Optional[themeColor] = None) -> str:
         """
         复制分享链接按钮的样式